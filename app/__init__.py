@@ -1,5 +1,5 @@
 from dotenv import load_dotenv
-from flask import Flask, flash, redirect, url_for, request
+from flask import Flask, flash, redirect, url_for, request, has_request_context
 from flask_babel import Babel
 import os
 from datetime import datetime
@@ -31,8 +31,38 @@ def create_app():
     instance_base = Path(app.instance_path)
     (instance_base / "indices" / "sessions").mkdir(parents=True, exist_ok=True)
     app.config["DATABASE"] = os.path.join(app.instance_path, "database.db")
+    # Connexions SQLite réutilisées (voir database.py) : taille max du pool par process
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", "8"))
+    # Lecture seule (pages publiques, overlays : @read_only_db) : pool séparé,
+    # base optionnellement remplacée par une copie (snapshot)
+    app.config["DB_READ_POOL_SIZE"] = int(os.environ.get("DB_READ_POOL_SIZE", "8"))
+    app.config["DATABASE_READONLY"] = os.environ.get("DATABASE_READONLY") or app.config["DATABASE"]
+    # Écritures sérialisées par un thread écrivain (voir db_writer.py) : désactivé par défaut
+    app.config["DB_WRITE_QUEUE"] = os.environ.get("DB_WRITE_QUEUE", "0") == "1"
+    app.config["DB_WRITE_BATCH_SIZE"] = int(os.environ.get("DB_WRITE_BATCH_SIZE", "32"))
+    app.config["DB_WRITE_MAX_RETRIES"] = int(os.environ.get("DB_WRITE_MAX_RETRIES", "5"))
+    # Migrations du schéma (voir migrations.py) appliquées au démarrage, sinon : flask migrate-db
+    app.config["DB_MIGRATE_ON_STARTUP"] = os.environ.get("DB_MIGRATE_ON_STARTUP", "1") == "1"
+    # Instrumentation SQL par requête (voir sql_profiling.py) : désactivée par défaut
+    app.config["SQL_PROFILING"] = os.environ.get("SQL_PROFILING", "0") == "1"
+    app.config["SQL_SLOW_QUERY_MS"] = float(os.environ.get("SQL_SLOW_QUERY_MS", "100"))
+    app.config["SQL_N_PLUS_ONE_THRESHOLD"] = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", "5"))
     
     app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024  # 1 Mo
+
+    # Tracker / indices : écriture au plus une fois par intervalle (secondes, 0 = directe).
+    # Opt-in : état gardé en mémoire du process, correct avec UN seul worker
+    app.config['TRACKER_PERSIST_INTERVAL'] = float(os.environ.get("TRACKER_PERSIST_INTERVAL", "0"))
+    app.config['INDICES_PERSIST_INTERVAL'] = float(os.environ.get("INDICES_PERSIST_INTERVAL", "0"))
+
+    # Archivage des sessions de restreams désactivés (0 h = job désactivé)
+    app.config['SESSION_ARCHIVE_AFTER_DAYS'] = int(os.environ.get("SESSION_ARCHIVE_AFTER_DAYS", "30"))
+    app.config['SESSION_ARCHIVE_INTERVAL_HOURS'] = float(os.environ.get("SESSION_ARCHIVE_INTERVAL_HOURS", "24"))
+
+    # Sauvegardes à chaud de instance/ (voir backups.py) : 0 h = job désactivé
+    app.config['BACKUP_DIR'] = os.environ.get("BACKUP_DIR") or os.path.join(app.instance_path, "backups")
+    app.config['BACKUP_INTERVAL_HOURS'] = float(os.environ.get("BACKUP_INTERVAL_HOURS", "24"))
+    app.config['BACKUP_KEEP'] = int(os.environ.get("BACKUP_KEEP", "7"))
     
     app.config['DISCORD_INVITE_URL'] = "https://discord.gg/rHJDPc2FcZ"
     app.config['DISCORD_SERVER_NAME'] = "Team Baguette"
@@ -43,6 +73,9 @@ def create_app():
     app.config['BABEL_SUPPORTED_LOCALES'] = ["fr","en"]
     
     def select_locale():
+        # Hors requête (commandes flask, thread écrivain) : langue par défaut
+        if not has_request_context():
+            return app.config['BABEL_DEFAULT_LOCALE']
         lang = request.cookies.get("lang")
         if lang in app.config["BABEL_SUPPORTED_LOCALES"]:
             return lang
@@ -60,6 +93,9 @@ def create_app():
     # Fermeture automatique des connexions DB
     app.teardown_appcontext(close_db)
 
+    from app.sql_profiling import init_sql_profiling
+    init_sql_profiling(app)
+
     def format_datetime(value):
         try:
             dt = datetime.fromisoformat(value)
@@ -139,5 +175,34 @@ def create_app():
     app.register_blueprint(restream_bp)
     app.register_blueprint(admin_bp)
 
+    # Schéma de la base à jour avant la première requête
+    from app.migrations import migrate_on_startup, register_migration_commands
+    migrate_on_startup(app)
+
+    from app.db_writer import init_db_writer
+    init_db_writer(app)
+
+    # Commandes CLI (flask ...)
+    register_migration_commands(app)
+
+    from app.modules.tournament_io import register_tournament_io_commands
+    register_tournament_io_commands(app)
+
+    from app.modules.tracker.atlas import register_atlas_commands
+    register_atlas_commands(app)
+
+    from app.modules.session_archive import register_archive_commands, start_archive_job
+    register_archive_commands(app)
+    start_archive_job(app)
+
+    from app.backups import register_backup_commands, start_backup_job
+    register_backup_commands(app)
+    start_backup_job(app)
+
+    # Templates d’indices (toutes langues) chargés en mémoire dès le démarrage
+    from app.modules.indices.registry import preload_indices_templates
+    with app.app_context():
+        preload_indices_templates()
+
 
     return app
@@ -1,4 +1,4 @@
-from flask import render_template, request, redirect, url_for, flash, current_app, abort, jsonify
+from flask import render_template, request, redirect, url_for, flash, current_app, abort, jsonify, Response
 from flask_babel import get_locale as babel_get_locale, gettext as _
 from . import admin_bp
 from app.database import get_db
@@ -14,11 +14,15 @@ from app.modules.tournaments import get_tournament_phases, is_reserved_casual_pr
 import secrets
 import string
 import json
+from app.modules.tracker.atlas import catalog_with_atlas
 from app.modules.tracker.registry import get_available_trackers, get_tracker_definition
 from app.modules.tracker.presets import list_presets, create_preset, load_preset, save_preset, rename_preset, delete_preset
-from app.modules.tracker.games.ssr.preset import build_default_preset as ssr_default_preset
 from app.modules import racetime as racetime_mod
 from app.modules.i18n import get_translation
+from app.modules.standings import refresh_group_standings, refresh_tournament_standings, refresh_team_standings
+from app.modules.tournament_io import (
+    TournamentImportError, export_roster_csv, export_tournament, parse_import_file, run_import, validate_import,
+)
 
 @admin_bp.route("/games")
 @login_required
@@ -478,6 +482,10 @@ def teams_edit(team_id):
                     (team_id, pid)
                 )
 
+            # le nom départage les égalités des classements de groupes
+            if name != team["name"]:
+                refresh_team_standings(team_id)
+
             conn.commit()
             return redirect(url_for("admin.teams_list"))
 
@@ -716,6 +724,70 @@ def admin_tournament_edit(tournament_id):
     )
 
 
+# Erreurs d'import affichées (le reste est résumé)
+IMPORT_MAX_ERRORS = 20
+
+
+@admin_bp.route("/tournaments/<int:tournament_id>/export")
+@login_required
+@role_required("admin")
+def admin_tournament_export(tournament_id):
+    data = export_tournament(tournament_id)
+    if data is None:
+        abort(404)
+
+    filename = data["tournament"]["slug"] or f"tournament-{tournament_id}"
+
+    if request.args.get("format") == "csv":
+        body = export_roster_csv(data)
+        mimetype = "text/csv"
+        filename += ".csv"
+    else:
+        body = json.dumps(data, ensure_ascii=False, indent=2)
+        mimetype = "application/json"
+        filename += ".json"
+
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@admin_bp.route("/tournaments/<int:tournament_id>/import", methods=["POST"])
+@login_required
+@role_required("admin")
+def admin_tournament_import(tournament_id):
+    upload = request.files.get("file")
+    dry_run = request.form.get("dry_run") == "1"
+
+    if not upload or not upload.filename:
+        flash(_("Aucun fichier sélectionné."), "error")
+        return redirect(url_for("admin.admin_tournament_edit", tournament_id=tournament_id))
+
+    try:
+        plan = validate_import(tournament_id, parse_import_file(upload.read(), upload.filename))
+        # Tout le fichier en une transaction (executemany)
+        counts = plan["counts"] if dry_run else run_import(tournament_id, plan)
+    except TournamentImportError as e:
+        for message in e.errors[:IMPORT_MAX_ERRORS]:
+            flash(message, "error")
+        if len(e.errors) > IMPORT_MAX_ERRORS:
+            flash(_("… et %(count)s autre(s) erreur(s).", count=len(e.errors) - IMPORT_MAX_ERRORS), "error")
+        return redirect(url_for("admin.admin_tournament_edit", tournament_id=tournament_id))
+
+    summary = _(
+        "%(players)s joueur(s), %(teams)s équipe(s), %(registrations)s inscription(s), "
+        "%(phases)s phase(s), %(series)s série(s), %(matches)s match(s)",
+        **counts
+    )
+    if dry_run:
+        flash(_("Fichier valide, rien n'a été écrit : %(summary)s.", summary=summary), "success")
+    else:
+        flash(_("Import terminé : %(summary)s créés.", summary=summary), "success")
+    return redirect(url_for("admin.admin_tournament_edit", tournament_id=tournament_id))
+
+
 @admin_bp.route("/tournaments/<int:tournament_id>/teams")
 @login_required
 @role_required("admin")
@@ -917,6 +989,7 @@ def admin_tournament_add_team(tournament_id):
         """,
         (tournament_id, team_id, group_name, seed)
     )
+    refresh_tournament_standings(tournament_id)
     db.commit()
 
     flash(_("Équipe inscrite avec succès."), "success")
@@ -951,6 +1024,7 @@ def admin_tournament_remove_team(tournament_id, team_id):
         """,
         (tournament_id, team_id)
     )
+    refresh_tournament_standings(tournament_id)
     db.commit()
 
     flash(_("Équipe retirée du tournoi."), "success")
@@ -1025,6 +1099,7 @@ def admin_tournament_teams_update_groups(tournament_id):
         )
         updated += 1
 
+    refresh_tournament_standings(tournament_id)
     db.commit()
     flash(_("Groupes enregistrés (%(name)s équipes).",name=updated), "success")
     return redirect(url_for("admin.admin_tournament_teams", tournament_id=tournament_id))
@@ -1095,10 +1170,11 @@ def admin_matches():
             t2.name AS team2_name,
             tw.name AS winner_name,
 
-            COALESCE(mc.match_count, 0)     AS match_count,
-            COALESCE(mp.matches_played, 0)  AS matches_played,
-            COALESCE(w.team1_wins, 0)       AS team1_wins,
-            COALESCE(w.team2_wins, 0)       AS team2_wins
+            -- compteurs matérialisés (voir refresh_series_counters)
+            s.match_count,
+            s.matches_played,
+            s.team1_wins,
+            s.team2_wins
 
         FROM series s
         JOIN tournament_phases p ON p.id = s.phase_id
@@ -1106,38 +1182,9 @@ def admin_matches():
         LEFT JOIN teams t2 ON t2.id = s.team2_id
         LEFT JOIN teams tw ON tw.id = s.winner_team_id
 
-        -- total matchs (tous)
-        LEFT JOIN (
-            SELECT series_id, COUNT(*) AS match_count
-            FROM matches
-            GROUP BY series_id
-        ) mc ON mc.series_id = s.id
-
-        -- matchs terminés
-        LEFT JOIN (
-            SELECT series_id, COUNT(*) AS matches_played
-            FROM matches
-            WHERE is_completed = 1
-            GROUP BY series_id
-        ) mp ON mp.series_id = s.id
-
-        -- wins (compte 1 win max par match)
-        LEFT JOIN (
-            SELECT
-                m.series_id,
-                COUNT(DISTINCT CASE WHEN mt.is_winner = 1 AND mt.team_id = s2.team1_id THEN m.id END) AS team1_wins,
-                COUNT(DISTINCT CASE WHEN mt.is_winner = 1 AND mt.team_id = s2.team2_id THEN m.id END) AS team2_wins
-            FROM matches m
-            JOIN series s2 ON s2.id = m.series_id
-            JOIN match_teams mt ON mt.match_id = m.id
-            WHERE m.is_completed = 1
-            GROUP BY m.series_id
-        ) w ON w.series_id = s.id
-
         WHERE s.tournament_id = ?
         {phase_filter_sql}
 
-        GROUP BY s.id
         ORDER BY s.created_at
 
         """,
@@ -1350,6 +1397,7 @@ def admin_confrontation_create():
                 source_team2_type
             )
         )
+        refresh_group_standings(phase_id, [team1_id, team2_id])
         db.commit()
 
         flash(_("Confrontation créée."), "success")
@@ -1587,6 +1635,10 @@ def admin_confrontation_edit(series_id):
                     series_id
                 )
             )
+
+            # Classements : ancienne et nouvelle affectation (phase / équipes)
+            refresh_group_standings(series["phase_id"], [series["team1_id"], series["team2_id"]])
+            refresh_group_standings(phase_id, [team1_id, team2_id])
         else:
             # 🔒 conservateur v1 : on ne change pas phase/round/teams/sources si matchs existent
             db.execute(
@@ -1754,6 +1806,10 @@ def admin_match_create():
                     (match_id, tid)
                 )
 
+        if series_id:
+            from app.modules.results import refresh_series_counters
+            refresh_series_counters(series_id)
+
         db.commit()
         flash(_("Match créé."), "success")
 
@@ -1788,21 +1844,7 @@ def admin_confrontation_matches(series_id):
             p.position AS phase_position,
             t1.name AS team1_name,
             t2.name AS team2_name,
-            tw.name AS winner_name,
-
-            SUM(
-                CASE
-                    WHEN mt.team_id = s.team1_id AND mt.is_winner = 1 THEN 1
-                    ELSE 0
-                END
-            ) AS team1_wins,
-
-            SUM(
-                CASE
-                    WHEN mt.team_id = s.team2_id AND mt.is_winner = 1 THEN 1
-                    ELSE 0
-                END
-            ) AS team2_wins
+            tw.name AS winner_name
 
         FROM series s
         JOIN tournament_phases p ON p.id = s.phase_id
@@ -1810,15 +1852,7 @@ def admin_confrontation_matches(series_id):
         LEFT JOIN teams t2 ON t2.id = s.team2_id
         LEFT JOIN teams tw ON tw.id = s.winner_team_id
 
-        LEFT JOIN matches m
-            ON m.series_id = s.id
-            AND m.is_completed = 1
-
-        LEFT JOIN match_teams mt
-            ON mt.match_id = m.id
-
         WHERE s.id = ?
-        GROUP BY s.id
         """,
         (series_id,)
     ).fetchone()
@@ -1936,7 +1970,14 @@ def admin_confrontation_delete(series_id):
         flash(_("Impossible de supprimer une confrontation avec des matchs."), "error")
         return redirect(url_for("admin.admin_matches"))
 
+    series = db.execute(
+        "SELECT phase_id, team1_id, team2_id FROM series WHERE id = ?",
+        (series_id,)
+    ).fetchone()
+
     db.execute("DELETE FROM series WHERE id = ?", (series_id,))
+    if series:
+        refresh_group_standings(series["phase_id"], [series["team1_id"], series["team2_id"]])
     db.commit()
 
     flash(_("Confrontation supprimée."), "success")
@@ -1963,13 +2004,9 @@ def admin_match_delete(match_id):
     series_id = match["series_id"]
     was_completed = match["is_completed"]
 
-    db.execute("DELETE FROM matches WHERE id = ?", (match_id,))
-    db.commit()
-
-    # 🔁 Recalcul du vainqueur si nécessaire
-    if series_id and was_completed:
-        from app.modules.results import update_series_result
-        update_series_result(series_id)
+    from app.modules.results import delete_match
+    from app.db_writer import run_write
+    run_write(delete_match, match_id, series_id, was_completed)
 
     flash(_("Match supprimé."), "success")
 
@@ -2069,42 +2106,10 @@ def admin_match_results(match_id):
             sum(1 for r in ordered if r["final_time"] == first_time) > 1
         )
         
-        # --- Mise à jour ---
-        for idx, r in enumerate(ordered, start=1):
-            is_winner = 1 if idx == 1 and not is_tie_for_first else 0
-
-
-            db.execute(
-                """
-                UPDATE match_teams
-                SET
-                    final_time_raw = ?,
-                    final_time = ?,
-                    position = ?,
-                    is_winner = ?
-                WHERE match_id = ?
-                  AND team_id = ?
-                """,
-                (
-                    r["final_time_raw"],
-                    r["final_time"],
-                    idx,
-                    is_winner,
-                    match_id,
-                    r["team_id"]
-                )
-            )
-
-        db.execute(
-            "UPDATE matches SET is_completed = 1 WHERE id = ?",
-            (match_id,)
-        )
-
-        db.commit()
-        
-        if match["series_id"]:
-            from app.modules.results import update_series_result
-            update_series_result(match["series_id"])
+        # --- Mise à jour (résultats + série, une seule écriture) ---
+        from app.modules.results import save_match_results
+        from app.db_writer import run_write
+        run_write(save_match_results, match_id, match["series_id"], ordered, is_tie_for_first)
 
 
         flash(_("Résultats enregistrés."), "success")
@@ -2274,13 +2279,15 @@ def admin_tournament_phase_create(tournament_id):
         details_json = None
 
 
-    db.execute(
+    cur = db.execute(
         """
         INSERT INTO tournament_phases (tournament_id, name, type, position, details)
         VALUES (?, ?, ?, ?, ?)
         """,
         (tournament_id, name, phase_type, position, details_json)
     )
+    # Phase de groupes : équipes déjà inscrites à 0-0 dans le classement
+    refresh_group_standings(cur.lastrowid)
     db.commit()
 
     flash(_("Phase créée."), "success")
@@ -2358,6 +2365,8 @@ def admin_tournament_phase_edit(tournament_id, phase_id):
         """,
         (name, phase_type, position, details_json, phase_id)
     )
+    # type éventuellement changé (groupes <-> autre)
+    refresh_group_standings(phase_id)
     db.commit()
 
     flash(_("Phase mise à jour."), "success")
@@ -2412,6 +2421,7 @@ def admin_tournament_phase_delete(tournament_id, phase_id):
         "DELETE FROM tournament_phases WHERE id = ?",
         (phase_id,)
     )
+    refresh_group_standings(phase_id)
     db.commit()
 
     flash(_("Phase supprimée."), "success")
@@ -2533,7 +2543,7 @@ def admin_trackers_preset_new(tracker_type):
             ))
 
     participant = _get_default_participant_for_tracker(tracker_type)
-    tracker_catalog = tracker_def["catalog"]()
+    tracker_catalog = catalog_with_atlas(tracker_def["catalog"]())
 
     return render_template(
         "admin/trackers/preset_edit.html",
@@ -2588,7 +2598,7 @@ def admin_trackers_preset_edit(tracker_type, preset_slug):
                 tracker_type=tracker_type,
                 preset_slug=preset_slug
             ))
-    tracker_catalog = tracker_def["catalog"]()
+    tracker_catalog = catalog_with_atlas(tracker_def["catalog"]())
 
     return render_template(
         "admin/trackers/preset_edit.html",
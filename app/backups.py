@@ -0,0 +1,485 @@
+"""
+Sauvegardes à chaud de l'instance (bases SQLite + arbres JSON).
+
+Responsabilités :
+- copier chaque base SQLite de instance/ (database.db, sessions tracker,
+  archives de sessions) pendant que le site tourne, via l'API backup de
+  sqlite3 : copie par paquets de pages, pause entre les paquets, les
+  requêtes continuent d'écrire (WAL)
+- copier les fichiers JSON de instance/ (sessions d'indices, templates,
+  presets tracker) après flush des sessions en mémoire : fichiers
+  remplacés atomiquement, chaque copie est relue et validée
+- une archive .tar.gz horodatée par sauvegarde avec un manifest.json
+  (sha256 de chaque fichier), écrite sous un nom temporaire puis
+  renommée ; rotation des plus anciennes (BACKUP_KEEP)
+- vérifier une archive (sha256, integrity_check SQLite, JSON lisible)
+  et la restaurer
+- job périodique + commandes flask backup / backup-verify / backup-restore
+- une seule sauvegarde à la fois par dossier de sauvegardes (flock) :
+  choix du nom, écriture et rotation ne se croisent jamais entre workers
+
+NE FAIT PAS :
+- restaurer à chaud : site arrêté pendant backup-restore
+- copier les sauvegardes hors de la machine (instance/backups/ à
+  synchroniser ailleurs)
+- garantir la cohérence ENTRE fichiers (base et sessions copiées à
+  quelques secondes d'écart)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tarfile
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+from flask import current_app
+
+from app.jobs import start_periodic_job
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev local) : pas de verrou inter-process
+    fcntl = None
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+ARCHIVE_PREFIX = "backup-"
+ARCHIVE_SUFFIX = ".tar.gz"
+
+# Copie SQLite : pages par étape (4 Ko / page) et pause entre étapes
+PAGES_PER_STEP = 256
+STEP_SLEEP_SECONDS = 0.005
+
+# Base modifiée pendant la copie : l'API backup recommence ; au-delà,
+# copie en une étape (lecture seule en WAL : n'arrête pas les écritures)
+MAX_RESTARTS = 5
+
+# Fichier JSON en cours de remplacement : relu quelques fois
+JSON_READ_ATTEMPTS = 3
+
+# Sous-dossiers de instance/ jamais sauvegardés
+EXCLUDED_DIRS = ("backups", "logs")
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+class BackupInProgress(Exception):
+    """
+    Une autre sauvegarde (autre worker, commande flask) tient le verrou.
+    """
+
+
+def backups_dir() -> Path:
+    return Path(current_app.config.get("BACKUP_DIR") or Path(current_app.instance_path) / "backups")
+
+
+def list_backups() -> List[Path]:
+    """
+    Archives existantes, de la plus ancienne à la plus récente.
+    """
+    folder = backups_dir()
+    if not folder.exists():
+        return []
+    return sorted(
+        folder.glob(f"{ARCHIVE_PREFIX}*{ARCHIVE_SUFFIX}"),
+        key=lambda p: (p.stat().st_mtime, p.name),
+    )
+
+
+@contextmanager
+def _backups_lock(folder: Path):
+    """
+    Verrou exclusif NON bloquant sur le dossier de sauvegardes (fichier
+    .lock dedans), tenu du choix du nom jusqu’à la rotation.
+    Lève BackupInProgress s’il est déjà tenu.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+
+    with open(folder / ".lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise BackupInProgress(str(folder)) from None
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ======================================================================
+# Collecte
+# ======================================================================
+
+def _instance_files(instance: Path, suffix: str) -> List[Path]:
+    files = []
+    for path in sorted(instance.rglob(f"*{suffix}")):
+        relative = path.relative_to(instance)
+        if relative.parts[0] in EXCLUDED_DIRS or not path.is_file():
+            continue
+        files.append(path)
+    return files
+
+
+def _copy_sqlite(source: Path, target: Path):
+    """
+    Copie cohérente d'une base ouverte par d'autres connexions.
+    """
+    src = sqlite3.connect(source, timeout=5)
+    dst = sqlite3.connect(target)
+    try:
+        state = {"remaining": None, "restarts": 0}
+
+        def progress(status, remaining, total):
+            # remaining qui remonte = base modifiée, copie recommencée
+            if state["remaining"] is not None and remaining > state["remaining"]:
+                state["restarts"] += 1
+                if state["restarts"] > MAX_RESTARTS:
+                    raise _BackupRestarted()
+            state["remaining"] = remaining
+            time.sleep(STEP_SLEEP_SECONDS)
+
+        try:
+            src.backup(dst, pages=PAGES_PER_STEP, progress=progress)
+        except _BackupRestarted:
+            src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _read_json_file(path: Path) -> Optional[bytes]:
+    """
+    Contenu d'un fichier JSON, relu s'il est illisible (remplacement
+    en cours). None si toujours invalide.
+    """
+    for attempt in range(JSON_READ_ATTEMPTS):
+        try:
+            data = path.read_bytes()
+            json.loads(data.decode("utf-8"))
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            time.sleep(0.05 * (attempt + 1))
+    return None
+
+
+def _flush_live_sessions():
+    """
+    Écrit sur disque les sessions en mémoire (write-behind) de CE process
+    seulement : l’état mémoire des autres workers n’est pas vu. Le
+    write-behind (intervalles > 0) suppose de toute façon un seul worker.
+    """
+    from app.modules.indices.sessions import flush_all_indices_sessions
+    from app.modules.tracker.base import flush_all_sessions
+
+    flush_all_sessions()
+    flush_all_indices_sessions()
+
+
+# ======================================================================
+# Sauvegarde
+# ======================================================================
+
+def create_backup(rotate: bool = True) -> Path:
+    """
+    Sauvegarde complète de instance/ dans une nouvelle archive.
+    rotate=False : aucune archive supprimée (sauvegarde avant restauration).
+    Lève BackupInProgress si une autre sauvegarde tourne.
+    Retourne le chemin de l'archive.
+    """
+    with _backups_lock(backups_dir()):
+        return _create_backup(rotate)
+
+
+def _create_backup(rotate: bool) -> Path:
+    """
+    create_backup, sous _backups_lock.
+    """
+    instance = Path(current_app.instance_path)
+    folder = backups_dir()
+
+    _flush_live_sessions()
+
+    created_at = datetime.now(timezone.utc)
+    stamp = created_at.strftime("%Y%m%d-%H%M%S")
+    archive = folder / f"{ARCHIVE_PREFIX}{stamp}{ARCHIVE_SUFFIX}"
+    counter = 1
+    while archive.exists():
+        archive = folder / f"{ARCHIVE_PREFIX}{stamp}-{counter}{ARCHIVE_SUFFIX}"
+        counter += 1
+    partial = archive.with_name(archive.name + ".partial")
+
+    manifest = {"version": MANIFEST_VERSION, "created_at": created_at.isoformat(), "files": {}}
+
+    def add_bytes(tar: tarfile.TarFile, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(created_at.timestamp())
+        tar.addfile(info, io.BytesIO(data))
+
+    with tempfile.TemporaryDirectory(dir=folder) as tmp:
+        with tarfile.open(partial, "w:gz") as tar:
+            for path in _instance_files(instance, ".db"):
+                name = path.relative_to(instance).as_posix()
+                copy = Path(tmp) / "copy.db"
+                _copy_sqlite(path, copy)
+                tar.add(copy, arcname=name)
+                manifest["files"][name] = {
+                    "kind": "sqlite", "size": copy.stat().st_size, "sha256": _sha256_file(copy),
+                }
+                copy.unlink()
+
+            for path in _instance_files(instance, ".json"):
+                name = path.relative_to(instance).as_posix()
+                data = _read_json_file(path)
+                if data is None:
+                    current_app.logger.warning("Backup : JSON illisible ignoré (%s)", path)
+                    continue
+                add_bytes(tar, name, data)
+                manifest["files"][name] = {"kind": "json", "size": len(data), "sha256": _sha256(data)}
+
+            add_bytes(tar, MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    os.replace(partial, archive)
+    if rotate:
+        rotate_backups(int(current_app.config.get("BACKUP_KEEP", 7)))
+    return archive
+
+
+def rotate_backups(keep: int) -> List[Path]:
+    """
+    Supprime les archives au-delà des `keep` plus récentes.
+    """
+    if keep <= 0:
+        return []
+
+    removed = list_backups()[:-keep]
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+# ======================================================================
+# Vérification / restauration
+# ======================================================================
+
+def _read_archive(archive: Path):
+    """
+    (manifest, {nom: contenu}) d'une archive.
+    """
+    contents = {}
+    with tarfile.open(archive, "r:gz") as tar:
+        for member in tar.getmembers():
+            if member.isfile():
+                contents[member.name] = tar.extractfile(member).read()
+
+    if MANIFEST_NAME not in contents:
+        raise ValueError(f"{archive.name} : {MANIFEST_NAME} manquant")
+    return json.loads(contents.pop(MANIFEST_NAME)), contents
+
+
+def _sqlite_integrity(data: bytes) -> str:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "check.db"
+        path.write_bytes(data)
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def verify_backup(archive: Path) -> List[str]:
+    """
+    Problèmes trouvés dans l'archive (liste vide = archive valide).
+    """
+    try:
+        manifest, contents = _read_archive(archive)
+    except (OSError, tarfile.TarError, ValueError) as e:
+        return [str(e)]
+
+    problems = []
+    files = manifest.get("files", {})
+
+    for name, entry in files.items():
+        data = contents.get(name)
+        if data is None:
+            problems.append(f"{name} : absent de l'archive")
+            continue
+        if _sha256(data) != entry.get("sha256"):
+            problems.append(f"{name} : sha256 différent du manifest")
+            continue
+
+        if entry.get("kind") == "sqlite":
+            result = _sqlite_integrity(data)
+            if result != "ok":
+                problems.append(f"{name} : integrity_check = {result}")
+        elif entry.get("kind") == "json":
+            try:
+                json.loads(data.decode("utf-8"))
+            except ValueError as e:
+                problems.append(f"{name} : JSON invalide ({e})")
+
+    for name in contents:
+        if name not in files:
+            problems.append(f"{name} : absent du manifest")
+
+    return problems
+
+
+def restore_backup(archive: Path) -> int:
+    """
+    Remet les fichiers de l'archive dans instance/ (site arrêté).
+    Les fichiers absents de l'archive ne sont pas supprimés.
+    Retourne le nombre de fichiers restaurés.
+    """
+    problems = verify_backup(archive)
+    if problems:
+        raise ValueError("Archive invalide :\n" + "\n".join(problems))
+
+    instance = Path(current_app.instance_path).resolve()
+    manifest, contents = _read_archive(archive)
+
+    restored = 0
+    for name, data in contents.items():
+        target = (instance / name).resolve()
+        if instance not in target.parents:
+            raise ValueError(f"{name} : chemin hors de instance/")
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + ".restore.tmp")
+        tmp_path.write_bytes(data)
+
+        if manifest["files"][name]["kind"] == "sqlite":
+            # Un -wal restant serait rejoué sur la base restaurée
+            for suffix in ("-wal", "-shm"):
+                Path(f"{target}{suffix}").unlink(missing_ok=True)
+
+        os.replace(tmp_path, target)
+        restored += 1
+
+    return restored
+
+
+# ======================================================================
+# Job périodique + CLI
+# ======================================================================
+
+def _backup_due(interval: float) -> bool:
+    # Sous _backups_lock : la sauvegarde faite à la main (flask backup) compte aussi
+    backups = list_backups()
+    if not backups:
+        return True
+    return time.time() - backups[-1].stat().st_mtime >= interval * 0.9
+
+
+def start_backup_job(app) -> None:
+    """
+    Sauvegarde périodique, un seul process par instance/ (voir app/jobs.py).
+    Désactivé si BACKUP_INTERVAL_HOURS vaut 0.
+    """
+    interval = float(app.config.get("BACKUP_INTERVAL_HOURS", 0) or 0) * 3600
+
+    def tick():
+        try:
+            with _backups_lock(backups_dir()):
+                if not _backup_due(interval):
+                    return
+                archive = _create_backup(rotate=True)
+        except BackupInProgress:
+            app.logger.info("Sauvegarde déjà en cours, tour sauté")
+            return
+        app.logger.info("Sauvegarde créée : %s", archive.name)
+
+    start_periodic_job(app, "backup", interval, tick)
+
+
+def register_backup_commands(app):
+    """
+    flask backup [--list]           : sauvegarde immédiate (ou liste)
+    flask backup-verify [ARCHIVE]   : vérifie une archive (défaut : la dernière)
+    flask backup-restore ARCHIVE    : restaure (site arrêté)
+    """
+    import click
+
+    def resolve(archive: Optional[str]) -> Path:
+        if archive:
+            path = Path(archive)
+            return path if path.exists() else backups_dir() / archive
+        backups = list_backups()
+        if not backups:
+            raise click.ClickException("Aucune sauvegarde")
+        return backups[-1]
+
+    @app.cli.command("backup")
+    @click.option("--list", "list_only", is_flag=True, help="Liste les sauvegardes existantes.")
+    def backup_command(list_only):
+        if list_only:
+            for path in list_backups():
+                click.echo(f"{path.name}  {path.stat().st_size / 1024:.0f} Ko")
+            return
+
+        try:
+            archive = create_backup()
+        except BackupInProgress:
+            raise click.ClickException("Une sauvegarde est déjà en cours")
+        click.echo(f"Sauvegarde : {archive} ({archive.stat().st_size / 1024:.0f} Ko)")
+
+    @app.cli.command("backup-verify")
+    @click.argument("archive", required=False)
+    def backup_verify_command(archive):
+        path = resolve(archive)
+        problems = verify_backup(path)
+        if problems:
+            raise click.ClickException(f"{path.name} invalide :\n" + "\n".join(problems))
+        click.echo(f"{path.name} : OK")
+
+    @app.cli.command("backup-restore")
+    @click.argument("archive")
+    @click.option("--yes", is_flag=True, help="Pas de confirmation.")
+    def backup_restore_command(archive, yes):
+        path = resolve(archive)
+        if not yes:
+            click.confirm(
+                f"Restaurer {path.name} dans instance/ ? Le site doit être arrêté.",
+                abort=True,
+            )
+
+        # État courant sauvegardé avant d'être écrasé
+        try:
+            current = create_backup(rotate=False)
+        except BackupInProgress:
+            raise click.ClickException("Une sauvegarde est déjà en cours")
+        click.echo(f"État actuel sauvegardé : {current.name}")
+
+        try:
+            count = restore_backup(path)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"{count} fichier(s) restauré(s) depuis {path.name}")
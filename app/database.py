@@ -1,17 +1,175 @@
+import queue
 import sqlite3
+import threading
+from functools import wraps
 from flask import current_app, g
 
-def get_db():
-    if "db" not in g:
-        g.db = sqlite3.connect(
-            current_app.config["DATABASE"],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
-    return g.db
+
+# ======================================================================
+# Réglages des connexions
+# ======================================================================
+
+# Appliqués à chaque nouvelle connexion (journal_mode WAL est persistant
+# dans le fichier : posé une fois par process suffit)
+PRAGMAS = (
+    ("synchronous", "NORMAL"),      # sûr en WAL, pas de fsync à chaque commit
+    ("cache_size", -16000),         # 16 Mo de cache de pages par connexion
+    ("mmap_size", 134217728),       # 128 Mo lus via mmap
+    ("busy_timeout", 5000),         # attend un writer au lieu de "database is locked"
+    ("temp_store", "MEMORY"),
+)
+
+# Requêtes préparées gardées par connexion (défaut sqlite3 : 128)
+STATEMENT_CACHE_SIZE = 256
+
+DEFAULT_POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """
+    Connexions configurées, réutilisées d’une requête à l’autre.
+
+    Une connexion n’est utilisée que par une requête à la fois (sortie
+    du pool dans get_db, rendue dans close_db) : check_same_thread peut
+    être désactivé sans risque, y compris sous gevent.
+
+    readonly=True : connexions mode=ro + query_only, qui ne prennent
+    jamais de verrou d’écriture (pages publiques, overlays).
+    """
+
+    def __init__(self, path: str, size: int, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._wal_ready = False
+        self._lock = threading.Lock()
+
+    def _enable_wal(self):
+        # Une connexion mode=ro ne peut pas changer le journal_mode :
+        # connexion d’écriture jetable, une fois par process
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._wal_ready:
+                self._enable_wal()
+                self._wal_ready = True
+
+        if self.readonly:
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro",
+                uri=True,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn = sqlite3.connect(
+                self.path,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """
+        Rend la connexion au pool. Une transaction non commitée est
+        annulée, comme le faisait la fermeture de la connexion.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+
+# (chemin de la base, lecture seule) -> pool (un par process)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(readonly: bool = False) -> ConnectionPool:
+    if readonly:
+        # Peut pointer vers une copie (snapshot) de la base
+        path = current_app.config.get("DATABASE_READONLY") or current_app.config["DATABASE"]
+        size = int(current_app.config.get("DB_READ_POOL_SIZE", DEFAULT_POOL_SIZE))
+    else:
+        path = current_app.config["DATABASE"]
+        size = int(current_app.config.get("DB_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+    key = (path, readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(path, size, readonly=readonly)
+
+    return pool
+
+
+# ======================================================================
+# Connexion de la requête
+# ======================================================================
+
+def get_db(readonly: bool = None):
+    """
+    Connexion de la requête. readonly=None : lecture seule si la vue
+    est décorée par @read_only_db (helpers appelés par la vue compris).
+    """
+    if readonly is None:
+        readonly = g.get("db_readonly", False)
+
+    key = "db_ro" if readonly else "db"
+    if key not in g:
+        pool = _get_pool(readonly)
+        conn = pool.acquire()
+
+        # Opt-in : compteurs / temps / requêtes lentes (voir sql_profiling.py)
+        if current_app.config.get("SQL_PROFILING"):
+            from app.sql_profiling import instrument
+            conn = instrument(conn)
+
+        setattr(g, key, conn)
+        setattr(g, f"{key}_pool", pool)
+    return g.get(key)
 
 def close_db(e=None):
-    db = g.pop("db", None)
+    for key in ("db", "db_ro"):
+        db = g.pop(key, None)
+        pool = g.pop(f"{key}_pool", None)
+
+        if db is not None:
+            pool.release(getattr(db, "raw", db))
+
 
-    if db is not None:
-        db.close()
+def read_only_db(view):
+    """
+    Vue qui ne fait que lire : get_db() y rend une connexion du pool
+    lecture seule (une écriture lève sqlite3.OperationalError).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_readonly = True
+        return view(*args, **kwargs)
+    return wrapper
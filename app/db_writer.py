@@ -0,0 +1,223 @@
+"""
+File d'écriture SQLite (opt-in : DB_WRITE_QUEUE=1).
+
+Responsabilités :
+- exécuter les écritures dans UN thread écrivain par process, avec sa
+  propre connexion : plus de transactions concurrentes dans le process
+- regrouper les écritures en attente dans une seule transaction
+  (BEGIN IMMEDIATE ... COMMIT), un SAVEPOINT par écriture : une écriture
+  en erreur est annulée seule, les autres sont commitées
+- "database is locked" (autre worker gunicorn en train d'écrire) :
+  retry avec backoff ici, au lieu d'une erreur 500 dans la requête
+
+Une écriture = une fonction sans argument Flask (request, flash, ...)
+qui écrit via get_db() : dans le thread écrivain, get_db() rend la
+connexion du batch et commit() n'y fait rien (commit du batch).
+Elle peut être rejouée (retry) : pas d'effet de bord hors base.
+
+Désactivé : run_write exécute la fonction dans la requête puis commit,
+comme avant.
+
+NE FAIT PAS :
+- sérialiser les écritures entre process (verrou SQLite + retry)
+- toucher aux lectures (pools de get_db)
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, List, Optional
+from flask import current_app, g
+
+from app.database import ConnectionPool, get_db
+
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_RETRIES = 5
+
+# Premier délai de retry (doublé à chaque tentative)
+BACKOFF_SECONDS = 0.05
+
+# busy_timeout de la connexion écrivain (le pool attend 5 s)
+WRITER_BUSY_TIMEOUT_MS = 1000
+
+
+class _WriteJob:
+    __slots__ = ("fn", "args", "kwargs", "done", "result", "error")
+
+    def __init__(self, fn: Callable, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _BatchConnection:
+    """
+    Connexion vue par une écriture du batch : commit() / rollback()
+    appartiennent au thread écrivain.
+    """
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        raise RuntimeError("rollback() interdit dans une écriture de la file : lever une exception")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class DBWriter:
+    """
+    Thread écrivain (greenlet sous gevent) + file des écritures.
+    """
+
+    def __init__(self, app, path: str, batch_size: int, max_retries: int):
+        self.app = app
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+        self._queue = queue.Queue()
+
+        # Mêmes réglages que les connexions du pool ; transactions explicites
+        self._conn = ConnectionPool(path, 1).acquire()
+        self._conn.isolation_level = None
+        # Attente courte par tentative : les retries (backoff) font le reste
+        self._conn.execute(f"PRAGMA busy_timeout = {WRITER_BUSY_TIMEOUT_MS}")
+
+        threading.Thread(target=self._run, name="db-writer", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Côté requête
+    # ------------------------------------------------------------------
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Met l'écriture en file et attend son commit. Relève l'exception
+        de la fonction (ou l'erreur SQLite après les retries).
+        """
+        job = _WriteJob(fn, args, kwargs)
+        self._queue.put(job)
+        job.done.wait()
+
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    # ------------------------------------------------------------------
+    # Thread écrivain
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._execute_batch(batch)
+            except Exception as e:
+                self.app.logger.exception("DB writer batch failed")
+                for job in batch:
+                    if not job.done.is_set():
+                        job.error = e
+                        job.done.set()
+
+    def _execute_batch(self, batch: List[_WriteJob]):
+        conn = self._conn
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.app.app_context():
+                    g.db = _BatchConnection(conn)
+                    try:
+                        conn.execute("BEGIN IMMEDIATE")
+                        for index, job in enumerate(batch):
+                            self._execute_job(conn, index, job)
+                        conn.execute("COMMIT")
+                    finally:
+                        g.pop("db", None)
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(BACKOFF_SECONDS * (2 ** attempt))
+                continue
+
+            for job in batch:
+                job.done.set()
+            return
+
+    def _execute_job(self, conn: sqlite3.Connection, index: int, job: _WriteJob):
+        savepoint = f"write_{index}"
+        conn.execute(f"SAVEPOINT {savepoint}")
+
+        job.result = job.error = None
+        try:
+            job.result = job.fn(*job.args, **job.kwargs)
+        except sqlite3.OperationalError as e:
+            if _is_busy(e):
+                # Tout le batch est rejoué
+                raise
+            job.error = e
+        except Exception as e:
+            job.error = e
+
+        if job.error is not None:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+        conn.execute(f"RELEASE {savepoint}")
+
+
+# ======================================================================
+# API
+# ======================================================================
+
+# un écrivain par process (créé par init_db_writer)
+_writer: Optional[DBWriter] = None
+
+
+def init_db_writer(app):
+    """
+    Démarre le thread écrivain si DB_WRITE_QUEUE est activé.
+    """
+    global _writer
+
+    if not app.config.get("DB_WRITE_QUEUE") or _writer is not None:
+        return
+
+    _writer = DBWriter(
+        app,
+        app.config["DATABASE"],
+        batch_size=int(app.config.get("DB_WRITE_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        max_retries=int(app.config.get("DB_WRITE_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+    )
+
+
+def run_write(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Exécute une écriture (fonction qui écrit via get_db()) et la commite.
+    Retourne la valeur de la fonction.
+    """
+    if _writer is None or _writer.app is not current_app._get_current_object():
+        result = fn(*args, **kwargs)
+        get_db().commit()
+        return result
+
+    return _writer.submit(fn, *args, **kwargs)
@@ -0,0 +1,89 @@
+"""
+Jobs périodiques en arrière-plan (archivage des sessions, sauvegardes).
+
+Responsabilités :
+- UN thread par job et par dossier instance/ : le premier process qui
+  prend le verrou du job (flock tenu tant qu’il vit) le lance, les autres
+  workers gunicorn ne le lancent pas
+- démarrage à la première requête servie : les commandes flask (CLI)
+  créent l’application sans lancer de job
+
+Un worker qui meurt libère son verrou ; le worker qui le remplace le
+reprend à sa première requête.
+
+NE FAIT PAS :
+- le travail lui-même (tick fourni par le module du job)
+- sérialiser un job avec la commande CLI équivalente (verrou du module)
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev local) : pas de verrou inter-process
+    fcntl = None
+
+
+# Nom du job -> fichier de verrou ouvert (gardé ouvert = verrou tenu)
+_held_locks: Dict[str, object] = {}
+_start_lock = threading.Lock()
+
+
+def _acquire_job_lock(app, name: str) -> bool:
+    """
+    True si ce process est celui qui lance le job.
+    """
+    if fcntl is None:
+        return True
+
+    lock_path = Path(app.instance_path) / f".job-{name}.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return False
+
+    _held_locks[name] = lock_file
+    return True
+
+
+def start_periodic_job(app, name: str, interval: float, tick: Callable[[], None]) -> None:
+    """
+    Thread (greenlet sous gevent) qui appelle tick() toutes les
+    `interval` secondes, dans un contexte d’application.
+    Rien si interval <= 0.
+    """
+    if interval <= 0:
+        return
+
+    started = []
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    tick()
+            except Exception:
+                app.logger.exception("Job %s failed", name)
+
+    @app.before_request
+    def start_job():
+        if started:
+            return
+
+        with _start_lock:
+            if started:
+                return
+            started.append(True)
+
+            if name in _held_locks or not _acquire_job_lock(app, name):
+                return
+
+        threading.Thread(target=run, name=name, daemon=True).start()
@@ -1,12 +1,17 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app, make_response
 from flask_babel import gettext as _
 from flask_login import current_user
-from app.database import get_db
+from app.database import get_db, read_only_db
 from app.auth.utils import login_required
 from werkzeug.security import check_password_hash, generate_password_hash
 import json
 import math
 from app.modules.tournaments import ensure_public_tournament
+from app.modules.tournament_rows import (
+    TournamentRow, PhaseRow, SeriesResultRow, TiebreakRow, StandingRow,
+    BracketSeriesRow, GroupView, BracketTeam, BracketSeries, PhaseView,
+)
+from app.rows import fetch_row, fetch_rows
 from collections import defaultdict
 from flask_babel import get_locale as babel_get_locale
 from app.modules.i18n import get_translation
@@ -133,6 +138,7 @@ def change_password():
 
 
 @main_bp.route("/user/<int:user_id>")
+@read_only_db
 def public_profile(user_id):
     db = get_db()
     user = db.execute(
@@ -155,6 +161,7 @@ def public_profile(user_id):
 
 
 @main_bp.route("/u/<username>")
+@read_only_db
 def public_profile_by_name(username):
     db = get_db()
     user = db.execute(
@@ -172,13 +179,15 @@ def public_profile_by_name(username):
 
 
 @main_bp.route("/tournament/<slug>")
+@read_only_db
 def tournament(slug):
     db = get_db()
 
     # -------------------------------------------------
     # Tournoi interne (BDD)
     # -------------------------------------------------
-    tournament = db.execute(
+    tournament = fetch_row(
+        TournamentRow,
         """
         SELECT
             t.id,
@@ -186,15 +195,15 @@ def tournament(slug):
             t.slug,
             t.status,
             t.metadata,
-            t.created_at,
-            g.name AS game_name
+            g.name AS game_name,
+            t.created_at
         FROM tournaments t
         LEFT JOIN games g ON g.id = t.game_id
         WHERE t.slug = ?
           AND t.source = 'internal'
         """,
         (slug,)
-    ).fetchone()
+    )
 
     if tournament:
         # -----------------------------
@@ -202,20 +211,17 @@ def tournament(slug):
         # -----------------------------
         lang = str(babel_get_locale() or "fr").strip().lower()
 
-        # Important: sqlite Row -> dict si tu veux modifier proprement
-        tournament = dict(tournament)
-
         name_tr = get_translation("tournament", slug, "name", lang)
-        tournament["display_name"] = name_tr if name_tr else tournament["name"]
+        tournament.display_name = name_tr if name_tr else tournament.name
 
         metadata_tr = get_translation("tournament", slug, "metadata", lang)
-        metadata_json_raw = metadata_tr if metadata_tr else tournament["metadata"]
+        metadata_json_raw = metadata_tr if metadata_tr else tournament.metadata
 
         ensure_public_tournament(tournament)
         # -----------------------------
         # Statut PUBLIC (mapping v1)
         # -----------------------------
-        public_status = tournament["status"]
+        public_status = tournament.status
 
         if public_status == "draft":
             public_status = "upcoming"
@@ -250,7 +256,7 @@ def tournament(slug):
             WHERE m.tournament_id = ?
             ORDER BY tm.name ASC
             """,
-            (tournament["id"],)
+            (tournament.id,)
         ).fetchall()
 
         return render_template(
@@ -283,13 +289,15 @@ def tournament(slug):
 
 
 @main_bp.route("/tournament/<slug>/results")
+@read_only_db
 def tournament_results(slug):
     db = get_db()
 
     # -------------------------------------------------
     # Tournoi
     # -------------------------------------------------
-    tournament = db.execute(
+    tournament = fetch_row(
+        TournamentRow,
         """
         SELECT
             t.id,
@@ -304,7 +312,7 @@ def tournament_results(slug):
           AND t.source = 'internal'
         """,
         (slug,)
-    ).fetchone()
+    )
 
     if not tournament:
         abort(404)
@@ -316,14 +324,11 @@ def tournament_results(slug):
     # -------------------------------------------------
     lang = str(babel_get_locale() or "fr").strip().lower()
 
-    # sqlite Row -> dict pour pouvoir enrichir
-    tournament = dict(tournament)
-
     name_tr = get_translation("tournament", slug, "name", lang)
-    tournament["display_name"] = name_tr if name_tr else tournament["name"]
+    tournament.display_name = name_tr if name_tr else tournament.name
 
     metadata_tr = get_translation("tournament", slug, "metadata", lang)
-    metadata_json_raw = metadata_tr if metadata_tr else tournament["metadata"]
+    metadata_json_raw = metadata_tr if metadata_tr else tournament.metadata
 
 
     # -------------------------------------------------
@@ -342,27 +347,27 @@ def tournament_results(slug):
     # -------------------------------------------------
     # Phases
     # -------------------------------------------------
-    phases = db.execute(
+    phases = fetch_rows(
+        PhaseRow,
         """
         SELECT id, name, position
         FROM tournament_phases
         WHERE tournament_id = ?
         ORDER BY position ASC
         """,
-        (tournament["id"],)
-    ).fetchall()
+        (tournament.id,)
+    )
     
     # -------------------------------------------------
     # Traductions phases
     # -------------------------------------------------
-    phases = [dict(p) for p in phases]
     for p in phases:
-        phase_key = str(p["id"])
+        phase_key = str(p.id)
         phase_tr = get_translation("tournament_phase", phase_key, "name", lang)
-        p["display_name"] = phase_tr if phase_tr else p["name"]
+        p.display_name = phase_tr if phase_tr else p.name
 
 
-    phase_ids = [p["id"] for p in phases]
+    phase_ids = [p.id for p in phases]
 
     # -------------------------------------------------
     # Séries
@@ -370,7 +375,8 @@ def tournament_results(slug):
     series_rows = []
     if phase_ids:
         placeholders = ",".join("?" for _ in phase_ids)
-        series_rows = db.execute(
+        series_rows = fetch_rows(
+            SeriesResultRow,
             f"""
             SELECT
                 s.id,
@@ -378,6 +384,8 @@ def tournament_results(slug):
                 s.stage,
                 s.team1_id,
                 s.team2_id,
+                s.team1_wins,
+                s.team2_wins,
                 tw.name AS winner_name
             FROM series s
             LEFT JOIN teams tw ON tw.id = s.winner_team_id
@@ -385,9 +393,9 @@ def tournament_results(slug):
             ORDER BY s.id ASC
             """,
             phase_ids
-        ).fetchall()
+        )
 
-    series_ids = [s["id"] for s in series_rows]
+    series_ids = [s.id for s in series_rows]
 
     # -------------------------------------------------
     # Équipes par série
@@ -414,68 +422,19 @@ def tournament_results(slug):
             teams_by_series.setdefault(r["series_id"], []).append(r["team_name"])
 
     # -------------------------------------------------
-    # Score BO (LOGIQUE ADMIN — is_winner)
-    # -------------------------------------------------
-    scores_by_series = {}
-
-    if series_ids:
-        placeholders = ",".join("?" for _ in series_ids)
-        rows = db.execute(
-            f"""
-            SELECT
-                s.id AS series_id,
-
-                SUM(
-                    CASE
-                        WHEN mt.team_id = s.team1_id AND mt.is_winner = 1 THEN 1
-                        ELSE 0
-                    END
-                ) AS team1_wins,
-
-                SUM(
-                    CASE
-                        WHEN mt.team_id = s.team2_id AND mt.is_winner = 1 THEN 1
-                        ELSE 0
-                    END
-                ) AS team2_wins
-
-            FROM series s
-            LEFT JOIN matches m
-                ON m.series_id = s.id
-                AND m.is_completed = 1
-            LEFT JOIN match_teams mt
-                ON mt.match_id = m.id
-            WHERE s.id IN ({placeholders})
-            GROUP BY s.id
-            """,
-            series_ids
-        ).fetchall()
-
-        for r in rows:
-            if r["team1_wins"] or r["team2_wins"]:
-                scores_by_series[r["series_id"]] = (
-                    f"{r['team1_wins']}-{r['team2_wins']}"
-                )
-
-    # -------------------------------------------------
-    # Assemblage par phase
+    # Assemblage par phase (score BO : SeriesResultRow.score)
     # -------------------------------------------------
-    series_by_phase = {p["id"]: [] for p in phases}
+    series_by_phase = {p.id: [] for p in phases}
 
     for s in series_rows:
-        series_by_phase[s["phase_id"]].append({
-            "stage": s["stage"],
-            "teams": teams_by_series.get(s["id"], []),
-            "winner_name": s["winner_name"],
-            "score": scores_by_series.get(s["id"])
-        })
+        s.teams = teams_by_series.get(s.id, [])
+        series_by_phase[s.phase_id].append(s)
 
     # -------------------------------------------------
     # Tie-breaks (matchs sans série)
     # -------------------------------------------------
-    tiebreaks = []
-
-    tb_matches = db.execute(
+    tiebreaks = fetch_rows(
+        TiebreakRow,
         """
         SELECT id, is_completed
         FROM matches
@@ -483,10 +442,10 @@ def tournament_results(slug):
           AND series_id IS NULL
         ORDER BY id ASC
         """,
-        (tournament["id"],)
-    ).fetchall()
+        (tournament.id,)
+    )
 
-    tb_ids = [m["id"] for m in tb_matches]
+    tb_ids = [m.id for m in tiebreaks]
 
     teams_by_match = {}
     if tb_ids:
@@ -507,12 +466,8 @@ def tournament_results(slug):
         for r in rows:
             teams_by_match.setdefault(r["match_id"], []).append(r["team_name"])
 
-    for m in tb_matches:
-        tiebreaks.append({
-            "teams": teams_by_match.get(m["id"], []),
-            "positions": None,   # prévu plus tard
-            "is_completed": m["is_completed"]
-        })
+    for m in tiebreaks:
+        m.teams = teams_by_match.get(m.id, [])
 
     return render_template(
         "tournaments/results.html",
@@ -529,13 +484,15 @@ def tournament_results(slug):
 
 
 @main_bp.route("/tournament/<slug>/bracket")
+@read_only_db
 def tournament_bracket(slug):
     db = get_db()
 
     # -------------------------------------------------
     # Tournoi
     # -------------------------------------------------
-    tournament = db.execute(
+    tournament = fetch_row(
+        TournamentRow,
         """
         SELECT
             t.id,
@@ -550,7 +507,7 @@ def tournament_bracket(slug):
           AND t.source = 'internal'
         """,
         (slug,)
-    ).fetchone()
+    )
 
     if not tournament:
         abort(404)
@@ -562,13 +519,11 @@ def tournament_bracket(slug):
     # -------------------------------------------------
     lang = str(babel_get_locale() or "fr").strip().lower()
 
-    tournament = dict(tournament)
-
     name_tr = get_translation("tournament", slug, "name", lang)
-    tournament["display_name"] = name_tr if name_tr else tournament["name"]
+    tournament.display_name = name_tr if name_tr else tournament.name
 
     metadata_tr = get_translation("tournament", slug, "metadata", lang)
-    metadata_json_raw = metadata_tr if metadata_tr else tournament["metadata"]
+    metadata_json_raw = metadata_tr if metadata_tr else tournament.metadata
 
 
     # -------------------------------------------------
@@ -585,7 +540,8 @@ def tournament_bracket(slug):
     # -------------------------------------------------
     # Phases du tournoi (ordre officiel)
     # -------------------------------------------------
-    phases_rows = db.execute(
+    phases_rows = fetch_rows(
+        PhaseRow,
         """
         SELECT
             id,
@@ -597,21 +553,20 @@ def tournament_bracket(slug):
         WHERE tournament_id = ?
         ORDER BY position ASC
         """,
-        (tournament["id"],)
-    ).fetchall()
+        (tournament.id,)
+    )
 
     processed_phases = []
 
     # -------------------------------------------------
     # Boucle sur les phases
     # -------------------------------------------------
-    for phase_row in phases_rows:
-        phase = dict(phase_row)
+    for phase in phases_rows:
         # Traduction du nom de la phase
-        phase_tr = get_translation("tournament_phase", str(phase["id"]), "name", lang)
-        phase_display_name = phase_tr if phase_tr else phase["name"]
+        phase_tr = get_translation("tournament_phase", str(phase.id), "name", lang)
+        phase_display_name = phase_tr if phase_tr else phase.name
 
-        ptype = (phase["type"] or "").strip().lower()
+        ptype = (phase.type or "").strip().lower()
 
         if ptype == "groups":
             display_type = "groups"
@@ -625,137 +580,72 @@ def tournament_bracket(slug):
         # =============================
         if display_type == "groups":
 
-            teams_rows = db.execute(
+            # Classement précalculé et déjà trié (voir modules/standings.py)
+            standings_rows = fetch_rows(
+                StandingRow,
                 """
                 SELECT
-                    tt.team_id,
-                    tm.name AS team_name,
-                    tt.group_name,
+                    gs.team_id,
+                    tm.name AS team,
+                    gs.group_name,
+                    gs.wins,
+                    gs.played,
                     tt.seed,
                     tt.position
-                FROM tournament_teams tt
-                JOIN teams tm ON tm.id = tt.team_id
-                WHERE tt.tournament_id = ?
-                  AND tt.group_name IS NOT NULL
-                  AND TRIM(tt.group_name) != ''
-                ORDER BY tt.group_name COLLATE NOCASE, tm.name COLLATE NOCASE
-                """,
-                (tournament["id"],)
-            ).fetchall()
-
-            wins_rows = db.execute(
-                """
-                SELECT
-                    winner_team_id AS team_id,
-                    COUNT(*) AS wins
-                FROM series
-                WHERE phase_id = ?
-                  AND winner_team_id IS NOT NULL
-                GROUP BY winner_team_id
-                """,
-                (phase["id"],)
-            ).fetchall()
-
-            wins_by_team = {r["team_id"]: r["wins"] for r in wins_rows}
-
-            played_rows = db.execute(
-                """
-                SELECT
-                    x.team_id,
-                    COUNT(*) AS played
-                FROM (
-                    SELECT team1_id AS team_id
-                    FROM series
-                    WHERE phase_id = ?
-                      AND team1_id IS NOT NULL
-                      AND team2_id IS NOT NULL
-                    UNION ALL
-                    SELECT team2_id AS team_id
-                    FROM series
-                    WHERE phase_id = ?
-                      AND team1_id IS NOT NULL
-                      AND team2_id IS NOT NULL
-                ) x
-                GROUP BY x.team_id
+                FROM group_standings gs
+                JOIN teams tm ON tm.id = gs.team_id
+                JOIN tournament_teams tt
+                    ON tt.tournament_id = ? AND tt.team_id = gs.team_id
+                WHERE gs.phase_id = ?
+                ORDER BY gs.group_name, gs.rank
                 """,
-                (phase["id"], phase["id"])
-            ).fetchall()
-
-            played_by_team = {r["team_id"]: r["played"] for r in played_rows}
+                (tournament.id, phase.id)
+            )
 
             groups_map = {}
-            group_display_by_name = {}
-
-            for r in teams_rows:
-                gname = r["group_name"]
-                team_id = r["team_id"]
-                wins = int(wins_by_team.get(team_id, 0))
-                played = int(played_by_team.get(team_id, 0))
-
-                # Traduction du nom de groupe (tir groupé)
-                gkey = f"{slug}|{gname}"
-                g_tr = get_translation("tournament_group", gkey, "name", lang)
-                group_display_by_name[gname] = g_tr if g_tr else gname
-
-                groups_map.setdefault(gname, []).append({
-                    "team_id": team_id,
-                    "team": r["team_name"],
-                    "wins": wins,
-                    "played": played,
-                    "losses": max(0, played - wins),
-                    "seed": r["seed"],
-                    "position": r["position"],
-                })
+
+            for r in standings_rows:
+                groups_map.setdefault(r.group_name, []).append(r)
 
             groups = []
             for gname, rows in groups_map.items():
-                rows_sorted = sorted(
-                    rows,
-                    key=lambda x: (
-                        -x["wins"],
-                        x["position"] is None,
-                        x["position"] if x["position"] is not None else 10**9,
-                        x["seed"] if x["seed"] is not None else 10**9,
-                        x["team"].lower(),
-                    )
-                )
-                groups.append({
-                    "id": phase["id"],
-                    "name": group_display_by_name.get(gname, gname),
-                    "standings": rows_sorted,
-                })
-
-            groups.sort(key=lambda g: (g["name"] or "").lower())
+                # Traduction du nom de groupe
+                g_tr = get_translation("tournament_group", f"{slug}|{gname}", "name", lang)
+                groups.append(GroupView(
+                    id=phase.id,
+                    name=g_tr if g_tr else gname,
+                    standings=rows,
+                ))
 
-
-            groups.sort(key=lambda g: g["name"].lower())
+            groups.sort(key=lambda g: (g.name or "").lower())
 
             qualifiers_per_group = None
             try:
-                if phase.get("details"):
-                    details = json.loads(phase["details"])
+                if phase.details:
+                    details = json.loads(phase.details)
                     q = details.get("qualifiers_per_group")
                     if q is not None:
                         qualifiers_per_group = int(q)
             except Exception:
                 qualifiers_per_group = None
 
-            processed_phases.append({
-                "id": phase["id"],
-                "name": phase_display_name,
-                "display_type": "groups",
-                "data": {
+            processed_phases.append(PhaseView(
+                id=phase.id,
+                name=phase_display_name,
+                display_type="groups",
+                data={
                     "groups": groups,
                     "qualifiers_per_group": qualifiers_per_group,
                 },
-            })
+            ))
 
         # =============================
         # PHASE DE BRACKET (simple élimination)
         # =============================
         elif display_type == "bracket_simple_elim":
 
-            series_rows = db.execute(
+            series_rows = fetch_rows(
+                BracketSeriesRow,
                 """
                 SELECT
                     s.id,
@@ -770,35 +660,19 @@ def tournament_bracket(slug):
                     s.source_team1_type,
                     s.source_team2_series_id,
                     s.source_team2_type,
-                    SUM(
-                        CASE
-                            WHEN mt.team_id = s.team1_id AND mt.is_winner = 1 THEN 1
-                            ELSE 0
-                        END
-                    ) AS team1_wins,
-                    SUM(
-                        CASE
-                            WHEN mt.team_id = s.team2_id AND mt.is_winner = 1 THEN 1
-                            ELSE 0
-                        END
-                    ) AS team2_wins
+                    s.team1_wins,
+                    s.team2_wins
                 FROM series s
                 LEFT JOIN teams t1 ON t1.id = s.team1_id
                 LEFT JOIN teams t2 ON t2.id = s.team2_id
-                LEFT JOIN matches m
-                    ON m.series_id = s.id
-                    AND m.is_completed = 1
-                LEFT JOIN match_teams mt
-                    ON mt.match_id = m.id
                 WHERE s.phase_id = ?
-                GROUP BY s.id
                 ORDER BY s.round ASC, s.stage ASC
                 """,
-                (phase["id"],)
-            ).fetchall()
+                (phase.id,)
+            )
 
             source_label_by_id = {
-                str(r["id"]): (r["stage"] or f"Série #{r['id']}")
+                str(r.id): (r.stage or f"Série #{r.id}")
                 for r in series_rows
             }
 
@@ -814,67 +688,56 @@ def tournament_bracket(slug):
                 except Exception:
                     return None
 
+            def _side(team_id, name, wins, src, src_type):
+                return BracketTeam(
+                    id=team_id,
+                    name=name if name else None,
+                    is_tbd=(not name),   # True si pas de nom réel
+                    wins=wins or 0,
+                    source_series_id=str(src) if src is not None else None,
+                    source_type=src_type,
+                    source_label=source_label_by_id.get(str(src)) if src is not None else None,
+                )
+
             # 1) Construire tous les objets "série" (modifiables)
             for row in series_rows:
-                src1 = row["source_team1_series_id"]
-                src2 = row["source_team2_series_id"]
-                name1 = row["team1_name"]
-                name2 = row["team2_name"]
-
-                s_obj = {
-                    "id": str(row["id"]),
-                    "round": row["round"],
-                    "stage": row["stage"],   # on garde l’original
-                    "label": row["stage"],
-                    "team1": {
-                        "id": row["team1_id"],
-                        "name": name1 if name1 else None,
-                        "is_tbd": (not name1),   # True si pas de nom réel
-                        "wins": row["team1_wins"] or 0,
-                        "source_series_id": str(src1) if src1 is not None else None,
-                        "source_type": row["source_team1_type"],
-                        "source_label": source_label_by_id.get(str(src1)) if src1 is not None else None,
-                    },
-                    "team2": {
-                        "id": row["team2_id"],
-                        "name": name2 if name2 else None,
-                        "is_tbd": (not name2),
-                        "wins": row["team2_wins"] or 0,
-                        "source_series_id": str(src2) if src2 is not None else None,
-                        "source_type": row["source_team2_type"],
-                        "source_label": source_label_by_id.get(str(src2)) if src2 is not None else None,
-                    },
-                    "best_of": row["best_of"],
-                    # marqueurs utiles pour le template (ne casse rien si ignoré)
-                    "is_virtual": False,
-                    "is_bye": False,
-                }
-
-                series_by_id[s_obj["id"]] = s_obj
+                s_obj = BracketSeries(
+                    id=str(row.id),
+                    round=row.round,
+                    stage=row.stage,
+                    label=row.stage,
+                    team1=_side(row.team1_id, row.team1_name, row.team1_wins,
+                                row.source_team1_series_id, row.source_team1_type),
+                    team2=_side(row.team2_id, row.team2_name, row.team2_wins,
+                                row.source_team2_series_id, row.source_team2_type),
+                    best_of=row.best_of,
+                )
+
+                series_by_id[s_obj.id] = s_obj
 
 
             # 2) Injection des "séries virtuelles Bye" (uniquement affichage)
             # On fait ça avant de remplir rounds_map pour pouvoir insérer dans le round précédent.
-            min_round = min((s["round"] for s in series_by_id.values()), default=1)
+            min_round = min((s.round for s in series_by_id.values()), default=1)
 
             def make_bye_series(parent_series, side_key):
                 """
                 parent_series: la série du round r (r>min_round) où une équipe est seedée sans source
                 side_key: "team1" ou "team2" (côté où l’équipe arrive via bye)
                 """
-                parent_id = parent_series["id"]
-                r = parent_series["round"]
+                parent_id = parent_series.id
+                r = parent_series.round
                 if r <= min_round:
                     return None  # pas de bye à injecter au 1er round
 
-                team = parent_series[side_key]
-                if team["id"] is None:
+                team = getattr(parent_series, side_key)
+                if team.id is None:
                     return None  # pas d’équipe réelle => pas un bye, juste "à déterminer"
-                if team["source_series_id"] is not None:
+                if team.source_series_id is not None:
                     return None  # il y a déjà une source => pas un bye
 
                 # Déduire une "stage" cohérente dans le round précédent si stage est numérique
-                parent_stage_int = _safe_int(parent_series["stage"])
+                parent_stage_int = _safe_int(parent_series.stage)
                 prev_round = r - 1
 
                 # convention bracket classique : feeders de stage S = (2S-1, 2S)
@@ -886,38 +749,24 @@ def tournament_bracket(slug):
 
                 virtual_id = f"vbye:{parent_id}:{side_key}"
 
-                v = {
-                    "id": virtual_id,
-                    "round": prev_round,
-                    "stage": prev_stage,
-                    "label": "Bye",
-                    "team1": {
-                        "id": team["id"],
-                        "name": team["name"],
-                        "wins": 1,
-                        "source_series_id": None,
-                        "source_type": None,
-                        "source_label": None,
-                    },
-                    "team2": {
-                        "id": None,
-                        "name": "Bye",
-                        "wins": 0,
-                        "source_series_id": None,
-                        "source_type": None,
-                        "source_label": None,
-                    },
-                    "best_of": 1,
-                    "is_virtual": True,
-                    "is_bye": True,
+                v = BracketSeries(
+                    id=virtual_id,
+                    round=prev_round,
+                    stage=prev_stage,
+                    label="Bye",
+                    team1=BracketTeam(id=team.id, name=team.name, wins=1),
+                    team2=BracketTeam(id=None, name="Bye", wins=0),
+                    best_of=1,
+                    is_virtual=True,
+                    is_bye=True,
                     # optionnel si un jour tu veux afficher un badge "qualifié"
-                    "winner_team_id": team["id"],
-                }
+                    winner_team_id=team.id,
+                )
 
                 # Important : mettre la "source" côté parent pour que l’affichage soit cohérent
-                team["source_series_id"] = virtual_id
-                team["source_type"] = "winner"
-                team["source_label"] = "Bye"
+                team.source_series_id = virtual_id
+                team.source_type = "winner"
+                team.source_label = "Bye"
 
                 # Et permettre au label mapping de retrouver cet id si ton template l’utilise
                 source_label_by_id[virtual_id] = "Bye"
@@ -936,25 +785,25 @@ def tournament_bracket(slug):
 
             # 3) Remplir rounds_map avec vraies + virtuelles séries
             for s in series_by_id.values():
-                rounds_map[s["round"]].append(s)
+                rounds_map[s.round].append(s)
 
             for v in virtual_series:
-                rounds_map[v["round"]].append(v)
+                rounds_map[v.round].append(v)
 
             # 4) Tri stable dans chaque round (stage ASC si possible)
             def stage_sort_key(s):
-                si = _safe_int(s.get("stage"))
-                return (0, si) if si is not None else (1, str(s.get("stage") or ""))
+                si = _safe_int(s.stage)
+                return (0, si) if si is not None else (1, str(s.stage or ""))
 
             for r in rounds_map:
                 rounds_map[r].sort(key=stage_sort_key)
 
 
-            processed_phases.append({
-                "id": phase["id"],
-                "name": phase_display_name,
-                "display_type": "bracket_simple_elim",
-                "data": {
+            processed_phases.append(PhaseView(
+                id=phase.id,
+                name=phase_display_name,
+                display_type="bracket_simple_elim",
+                data={
                     "bracket": {
                         "rounds": [
                             {
@@ -965,7 +814,7 @@ def tournament_bracket(slug):
                         ]
                     }
                 },
-            })
+            ))
 
     return render_template(
         "tournaments/bracket.html",
@@ -975,6 +824,7 @@ def tournament_bracket(slug):
     )
 
 @main_bp.get("/tournaments")
+@read_only_db
 def tournaments():
     db = get_db()
 
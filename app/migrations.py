@@ -0,0 +1,375 @@
+"""
+Migrations du schéma SQLite (instance/database.db).
+
+Responsabilités :
+- table schema_version : migrations déjà appliquées (numéro + nom + date)
+- appliquer dans l’ordre les migrations manquantes, chacune dans sa
+  propre transaction (BEGIN IMMEDIATE : deux workers qui démarrent en
+  même temps ne l’appliquent pas deux fois)
+- au démarrage (DB_MIGRATE_ON_STARTUP) et via flask migrate-db
+
+Règles pour écrire une migration :
+- numéro strictement croissant, jamais renuméroter une migration livrée
+- idempotente : les bases existantes ont pu recevoir le changement à la
+  main avant que le moteur n’existe (ALTER TABLE, CREATE ... IF NOT EXISTS)
+
+NE FAIT PAS :
+- créer une base vide (instance/database.sql reste la base de départ)
+"""
+
+import sqlite3
+from typing import Callable, List, NamedTuple
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+_SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version     INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    applied_at  TEXT NOT NULL DEFAULT (datetime('now'))
+)
+"""
+
+
+# ======================================================================
+# Helpers
+# ======================================================================
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn: sqlite3.Connection, table: str, definition: str):
+    if definition.split()[0] not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+
+
+def _has_unique_index_on(conn: sqlite3.Connection, table: str, columns: List[str]) -> bool:
+    # PRIMARY KEY composite = index "sqlite_autoindex_*" unique
+    for index in conn.execute(f"PRAGMA index_list({table})"):
+        if not index[2]:  # unique
+            continue
+        indexed = [row[2] for row in conn.execute(f"PRAGMA index_info({index[1]})")]
+        if indexed == columns:
+            return True
+    return False
+
+
+# ======================================================================
+# Migrations
+# ======================================================================
+
+def _m001_schema_drift(conn: sqlite3.Connection):
+    """
+    Colonnes / tables ajoutées à la main en production mais absentes
+    de instance/database.sql.
+    """
+    _add_column(conn, "restreams", "tracker_type TEXT NOT NULL DEFAULT 'none'")
+    _add_column(conn, "restreams", "restreamer_name TEXT")
+    _add_column(conn, "restreams", "commentator_name TEXT")
+    _add_column(conn, "restreams", "tracker_name TEXT")
+    _add_column(conn, "matches", "racetime_room TEXT")
+    _add_column(conn, "players", "racetime_user TEXT")
+    _add_column(conn, "series", "round INTEGER")
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS translations (
+            entity_type TEXT NOT NULL,
+            entity_key  TEXT NOT NULL,
+            field       TEXT NOT NULL,
+            lang        TEXT NOT NULL,
+            value       TEXT,
+            updated_at  TEXT,
+            PRIMARY KEY (entity_type, entity_key, field, lang)
+        )
+        """
+    )
+
+
+def _m002_hot_query_indexes(conn: sqlite3.Connection):
+    """
+    Index des filtres / jointures des routes les plus appelées
+    (planning, résultats, bracket, overlays, admin matches).
+    """
+    # Pas d’executescript : il committerait la transaction de la migration
+    for name, table, columns in (
+        ("idx_matches_scheduled_at", "matches", "scheduled_at"),
+        ("idx_matches_series_id", "matches", "series_id"),
+        ("idx_matches_tournament_id", "matches", "tournament_id"),
+        ("idx_match_teams_team_id", "match_teams", "team_id"),
+        ("idx_series_phase_id", "series", "phase_id"),
+        ("idx_series_source_team1", "series", "source_team1_series_id"),
+        ("idx_series_source_team2", "series", "source_team2_series_id"),
+        ("idx_restreams_is_active", "restreams", "is_active"),
+        ("idx_tournament_teams_group", "tournament_teams", "tournament_id, group_name"),
+    ):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+
+    # Clé de lookup de get_translation (déjà couverte si c’est la PRIMARY KEY)
+    lookup = ["entity_type", "entity_key", "field", "lang"]
+    if not _has_unique_index_on(conn, "translations", lookup):
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_translations_lookup "
+            "ON translations(entity_type, entity_key, field, lang)"
+        )
+
+
+def _m003_series_counters(conn: sqlite3.Connection):
+    """
+    Compteurs BO matérialisés sur series (tenus à jour par
+    app/modules/results.py), recalculés une fois depuis les matchs.
+    """
+    _add_column(conn, "series", "team1_wins INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "series", "team2_wins INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "series", "matches_played INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "series", "match_count INTEGER NOT NULL DEFAULT 0")
+
+    # Même calcul que refresh_series_counters (figé ici : une migration
+    # ne dépend pas du code applicatif qui évoluera)
+    conn.execute(
+        """
+        UPDATE series
+        SET
+            match_count = (
+                SELECT COUNT(*) FROM matches m WHERE m.series_id = series.id
+            ),
+            matches_played = (
+                SELECT COUNT(*) FROM matches m
+                WHERE m.series_id = series.id AND m.is_completed = 1
+            ),
+            team1_wins = (
+                SELECT COUNT(DISTINCT m.id)
+                FROM matches m
+                JOIN match_teams mt ON mt.match_id = m.id
+                WHERE m.series_id = series.id AND m.is_completed = 1
+                  AND mt.is_winner = 1 AND mt.team_id = series.team1_id
+            ),
+            team2_wins = (
+                SELECT COUNT(DISTINCT m.id)
+                FROM matches m
+                JOIN match_teams mt ON mt.match_id = m.id
+                WHERE m.series_id = series.id AND m.is_completed = 1
+                  AND mt.is_winner = 1 AND mt.team_id = series.team2_id
+            )
+        """
+    )
+
+
+def _m004_group_standings(conn: sqlite3.Connection):
+    """
+    Classements des phases de groupes (tenus à jour par
+    app/modules/standings.py), calculés une fois pour l'existant.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS group_standings (
+            phase_id    INTEGER NOT NULL REFERENCES tournament_phases(id),
+            group_name  TEXT NOT NULL,
+            team_id     INTEGER NOT NULL REFERENCES teams(id),
+            wins        INTEGER NOT NULL DEFAULT 0,
+            played      INTEGER NOT NULL DEFAULT 0,
+            rank        INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (phase_id, group_name, team_id)
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_group_standings_rank "
+        "ON group_standings(phase_id, group_name, rank)"
+    )
+
+    # Même classement que refresh_group_standings (figé ici : une migration
+    # ne dépend pas du code applicatif qui évoluera)
+    conn.execute("DELETE FROM group_standings")
+    conn.execute(
+        """
+        INSERT INTO group_standings (phase_id, group_name, team_id, wins, played, rank)
+        SELECT
+            x.phase_id, x.group_name, x.team_id, x.wins, x.played,
+            ROW_NUMBER() OVER (
+                PARTITION BY x.phase_id, x.group_name
+                ORDER BY
+                    x.wins DESC,
+                    x.position IS NULL,
+                    COALESCE(x.position, 1000000000),
+                    COALESCE(x.seed, 1000000000),
+                    LOWER(x.team_name)
+            )
+        FROM (
+            SELECT
+                p.id AS phase_id,
+                tt.group_name,
+                tt.team_id,
+                tt.position,
+                tt.seed,
+                tm.name AS team_name,
+                (
+                    SELECT COUNT(*) FROM series s
+                    WHERE s.phase_id = p.id AND s.winner_team_id = tt.team_id
+                ) AS wins,
+                (
+                    SELECT COUNT(*) FROM series s
+                    WHERE s.phase_id = p.id
+                      AND s.team1_id IS NOT NULL
+                      AND s.team2_id IS NOT NULL
+                      AND (s.team1_id = tt.team_id OR s.team2_id = tt.team_id)
+                ) AS played
+            FROM tournament_phases p
+            JOIN tournament_teams tt ON tt.tournament_id = p.tournament_id
+            JOIN teams tm ON tm.id = tt.team_id
+            WHERE LOWER(TRIM(COALESCE(p.type, ''))) = 'groups'
+              AND tt.group_name IS NOT NULL
+              AND TRIM(tt.group_name) != ''
+        ) x
+        """
+    )
+
+
+def _m005_tournament_phases_index(conn: sqlite3.Connection):
+    """
+    Phases d'un tournoi dans l'ordre (résultats, bracket) : plus de
+    SCAN de tournament_phases ni de tri temporaire.
+    """
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tournament_phases_tournament "
+        "ON tournament_phases(tournament_id, position)"
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "schema drift (colonnes racetime, restreams, translations)", _m001_schema_drift),
+    Migration(2, "index des requêtes fréquentes", _m002_hot_query_indexes),
+    Migration(3, "compteurs de score des séries", _m003_series_counters),
+    Migration(4, "classements des phases de groupes", _m004_group_standings),
+    Migration(5, "index des phases par tournoi", _m005_tournament_phases_index),
+]
+
+
+# ======================================================================
+# Runner
+# ======================================================================
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # Autocommit : les transactions sont ouvertes explicitement
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    conn.execute(_SCHEMA_VERSION_TABLE)
+    return conn
+
+
+def applied_versions(db_path: str) -> List[int]:
+    conn = _connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    finally:
+        conn.close()
+
+
+def pending_migrations(db_path: str) -> List[Migration]:
+    done = set(applied_versions(db_path))
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def run_migrations(db_path: str) -> List[Migration]:
+    """
+    Applique les migrations manquantes. Retourne celles appliquées ici.
+    """
+    applied = []
+    conn = _connect(db_path)
+
+    try:
+        for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Relu sous verrou : un autre process a pu l’appliquer entre-temps
+                done = conn.execute(
+                    "SELECT 1 FROM schema_version WHERE version = ?",
+                    (migration.version,),
+                ).fetchone()
+
+                if done:
+                    conn.execute("ROLLBACK")
+                    continue
+
+                migration.apply(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                    (migration.version, migration.name),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            applied.append(migration)
+    finally:
+        conn.close()
+
+    return applied
+
+
+def _is_initialized(db_path: str) -> bool:
+    # Base créée depuis instance/database.sql (sinon rien à migrer)
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return False
+    try:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'matches'"
+        ).fetchone() is not None
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+# ======================================================================
+# Intégration Flask
+# ======================================================================
+
+def migrate_on_startup(app):
+    """
+    Applique les migrations au démarrage (DB_MIGRATE_ON_STARTUP).
+    """
+    if not app.config.get("DB_MIGRATE_ON_STARTUP", True):
+        return
+
+    db_path = app.config["DATABASE"]
+    if not _is_initialized(db_path):
+        app.logger.warning("Base non initialisée (%s) : migrations ignorées", db_path)
+        return
+
+    for migration in run_migrations(db_path):
+        app.logger.info("Migration %03d appliquée : %s", migration.version, migration.name)
+
+
+def register_migration_commands(app):
+    """
+    flask migrate-db [--status] : applique (ou liste) les migrations.
+    """
+    import click
+
+    @app.cli.command("migrate-db")
+    @click.option("--status", is_flag=True, help="Afficher l’état sans rien appliquer.")
+    def migrate_db_command(status):
+        db_path = app.config["DATABASE"]
+
+        if status:
+            done = set(applied_versions(db_path))
+            for migration in MIGRATIONS:
+                mark = "x" if migration.version in done else " "
+                click.echo(f"[{mark}] {migration.version:03d} {migration.name}")
+            return
+
+        applied = run_migrations(db_path)
+        for migration in applied:
+            click.echo(f"{migration.version:03d} {migration.name} : appliquée")
+        if not applied:
+            click.echo("Schéma à jour.")
@@ -1,4 +1,5 @@
 from app.database import get_db
+from app.db_writer import run_write
 
 def get_translation(entity_type, entity_key, field, lang):
     """
@@ -20,9 +21,8 @@ def get_translation(entity_type, entity_key, field, lang):
 
     return row["value"] if row else None
 
-def delete_translation(entity_type, entity_key, field, lang):
-    db = get_db()
-    db.execute(
+def _delete_translation(entity_type, entity_key, field, lang):
+    get_db().execute(
         """
         DELETE FROM translations
         WHERE entity_type = ?
@@ -32,18 +32,12 @@ def delete_translation(entity_type, entity_key, field, lang):
         """,
         (entity_type, entity_key, field, lang)
     )
-    db.commit()
-
-def upsert_translation(entity_type, entity_key, field, lang, value):
-    lang = (lang or "").strip().lower()
 
-    # Règle: valeur vide => on supprime la trad (retour fallback DB)
-    if value is None or (isinstance(value, str) and value.strip() == ""):
-        delete_translation(entity_type, entity_key, field, lang)
-        return
+def delete_translation(entity_type, entity_key, field, lang):
+    run_write(_delete_translation, entity_type, entity_key, field, lang)
 
-    db = get_db()
-    db.execute(
+def _upsert_translation(entity_type, entity_key, field, lang, value):
+    get_db().execute(
         """
         INSERT INTO translations (entity_type, entity_key, field, lang, value, updated_at)
         VALUES (?, ?, ?, ?, ?, datetime('now'))
@@ -54,7 +48,16 @@ def upsert_translation(entity_type, entity_key, field, lang, value):
         """,
         (entity_type, entity_key, field, lang, value)
     )
-    db.commit()
+
+def upsert_translation(entity_type, entity_key, field, lang, value):
+    lang = (lang or "").strip().lower()
+
+    # Règle: valeur vide => on supprime la trad (retour fallback DB)
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        delete_translation(entity_type, entity_key, field, lang)
+        return
+
+    run_write(_upsert_translation, entity_type, entity_key, field, lang, value)
 
 def resolve_translation(
     *,
@@ -0,0 +1,299 @@
+"""
+Historique des indices (instance/indices/history.db).
+
+Responsabilités :
+- journal append-only des changements de catégorie, horodatés
+  (edit / undo / reset), un flux par restream (slug)
+- annulation du dernier changement (les items précédents sont gardés
+  dans l’entrée elle-même)
+- export de la chronologie après la course (annotations VOD)
+- compaction des vieilles entrées : rafales de corrections fusionnées
+  (à l’heure de la première), items précédents oubliés (plus d’undo
+  possible sur ces entrées)
+
+NE FAIT PAS :
+- modifier les sessions (voir sessions.py)
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from flask import current_app
+
+
+KIND_EDIT = "edit"
+KIND_UNDO = "undo"
+KIND_RESET = "reset"
+
+# Compaction déclenchée toutes les N entrées écrites (toutes sessions)
+COMPACT_EVERY = 200
+
+# Entrées plus vieilles que ça : compactables
+COMPACT_AFTER = timedelta(hours=24)
+
+# Deux edits consécutifs de la même catégorie à moins de N secondes = une correction
+BURST_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indices_history (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    slug            TEXT NOT NULL,
+    category        TEXT,
+    kind            TEXT NOT NULL,
+    version         INTEGER NOT NULL DEFAULT 0,
+    items           TEXT,
+    previous_items  TEXT,
+    reverts         INTEGER,
+    author          TEXT,
+    created_at      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_indices_history_slug ON indices_history(slug, id);
+"""
+
+_schema_ready = set()
+
+
+# ------------------------------------------------------------------
+# Helpers internes
+# ------------------------------------------------------------------
+
+def _history_db_path() -> Path:
+    return Path(current_app.instance_path) / "indices" / "history.db"
+
+
+def _connect() -> sqlite3.Connection:
+    path = _history_db_path()
+
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+    if path not in _schema_ready:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(_SCHEMA)
+        _schema_ready.add(path)
+
+    return conn
+
+
+def _now() -> str:
+    # ISO UTC à la milliseconde : ordre chronologique = ordre lexical
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "at": row["created_at"],
+        "kind": row["kind"],
+        "category": row["category"],
+        "version": row["version"],
+        "items": json.loads(row["items"]) if row["items"] else [],
+        "author": row["author"],
+        "reverts": row["reverts"],
+    }
+
+
+# ------------------------------------------------------------------
+# API publique
+# ------------------------------------------------------------------
+
+def record_change(
+    slug: str,
+    kind: str,
+    *,
+    category: Optional[str] = None,
+    version: int = 0,
+    items: Optional[List[List[str]]] = None,
+    previous_items: Optional[List[List[str]]] = None,
+    reverts: Optional[int] = None,
+    author: Optional[str] = None,
+) -> int:
+    """
+    Ajoute une entrée au journal. Retourne son id.
+    """
+    conn = _connect()
+    try:
+        entry_id = conn.execute(
+            """
+            INSERT INTO indices_history
+                (slug, category, kind, version, items, previous_items, reverts, author, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (slug, category, kind, int(version), _dumps(items), _dumps(previous_items), reverts, author, _now()),
+        ).lastrowid
+
+        if entry_id % COMPACT_EVERY == 0:
+            _compact(conn)
+    finally:
+        conn.close()
+
+    return entry_id
+
+
+def last_undoable_change(slug: str) -> Optional[Dict[str, Any]]:
+    """
+    Dernier edit non annulé depuis le dernier reset (None si rien à annuler).
+    Contient "previous_items" (l’état à remettre) et "current_version"
+    (version attendue de la catégorie, sinon quelqu’un a écrit entre-temps).
+    Des undo successifs remontent la pile des edits.
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            """
+            SELECT h.*
+            FROM indices_history h
+            WHERE h.slug = ?
+              AND h.kind = ?
+              AND h.previous_items IS NOT NULL
+              AND h.id > COALESCE(
+                    (SELECT MAX(id) FROM indices_history WHERE slug = ? AND kind = ?), 0)
+              AND NOT EXISTS (
+                    SELECT 1 FROM indices_history u WHERE u.slug = h.slug AND u.reverts = h.id)
+            ORDER BY h.id DESC
+            LIMIT 1
+            """,
+            (slug, KIND_EDIT, slug, KIND_RESET),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        # Version courante de la catégorie (un undo précédent l’a fait avancer)
+        current_version = conn.execute(
+            """
+            SELECT version FROM indices_history
+            WHERE slug = ? AND category = ?
+            ORDER BY id DESC LIMIT 1
+            """,
+            (slug, row["category"]),
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    entry = _row_to_entry(row)
+    entry["previous_items"] = json.loads(row["previous_items"])
+    entry["current_version"] = current_version
+    return entry
+
+
+def export_history(slug: str) -> List[Dict[str, Any]]:
+    """
+    Chronologie complète d’un restream, de la plus ancienne à la plus
+    récente. "offset" = secondes depuis la première entrée (repère VOD).
+    """
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM indices_history WHERE slug = ? ORDER BY id",
+            (slug,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    entries = [_row_to_entry(row) for row in rows]
+
+    if entries:
+        start = datetime.fromisoformat(entries[0]["at"])
+        for entry in entries:
+            entry["offset"] = round((datetime.fromisoformat(entry["at"]) - start).total_seconds(), 3)
+
+    return entries
+
+
+def _bursts(rows: List[sqlite3.Row], reverted: set) -> List[List[sqlite3.Row]]:
+    """
+    Rafales compactables dans le journal d’un ou plusieurs restreams
+    (rows triées par slug, id) : edits consécutifs d’une même catégorie,
+    à moins de BURST_SECONDS l’un de l’autre, sans autre entrée entre
+    eux (undo, reset, autre catégorie). Un edit annulé par un undo
+    (reverts) n’entre dans aucune rafale : son id doit rester.
+    """
+    bursts = []
+    burst = []
+
+    for row in rows:
+        collapsible = row["kind"] == KIND_EDIT and row["id"] not in reverted
+
+        if burst and collapsible:
+            last = burst[-1]
+            gap = datetime.fromisoformat(row["created_at"]) - datetime.fromisoformat(last["created_at"])
+            if (last["slug"], last["category"]) == (row["slug"], row["category"]) and gap.total_seconds() < BURST_SECONDS:
+                burst.append(row)
+                continue
+
+        if len(burst) > 1:
+            bursts.append(burst)
+        burst = [row] if collapsible else []
+
+    if len(burst) > 1:
+        bursts.append(burst)
+
+    return bursts
+
+
+def _compact(conn: sqlite3.Connection) -> int:
+    """
+    Compacte les entrées plus vieilles que COMPACT_AFTER :
+    - rafale d’edits d’une même catégorie (voir _bursts) : seul le dernier
+      est gardé (items finaux), à l’heure du premier (moment où l’indice
+      est apparu, repère VOD de l’export)
+    - items précédents supprimés (l’undo ne porte que sur le récent)
+    Retourne le nombre d’entrées supprimées.
+    """
+    cutoff = (datetime.now(timezone.utc) - COMPACT_AFTER).isoformat(timespec="milliseconds")
+
+    rows = conn.execute(
+        """
+        SELECT id, slug, category, kind, created_at
+        FROM indices_history
+        WHERE created_at < ?
+        ORDER BY slug, id
+        """,
+        (cutoff,),
+    ).fetchall()
+
+    # Edits visés par un undo (y compris récent) : jamais supprimés
+    reverted = {
+        row[0]
+        for row in conn.execute("SELECT reverts FROM indices_history WHERE reverts IS NOT NULL")
+    }
+
+    to_delete = []
+    retimed = []
+    for burst in _bursts(rows, reverted):
+        to_delete.extend((row["id"],) for row in burst[:-1])
+        retimed.append((burst[0]["created_at"], burst[-1]["id"]))
+
+    conn.execute("BEGIN")
+    try:
+        conn.executemany("DELETE FROM indices_history WHERE id = ?", to_delete)
+        conn.executemany("UPDATE indices_history SET created_at = ? WHERE id = ?", retimed)
+        conn.execute(
+            "UPDATE indices_history SET previous_items = NULL WHERE created_at < ? AND previous_items IS NOT NULL",
+            (cutoff,),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return len(to_delete)
+
+
+def compact_history() -> int:
+    conn = _connect()
+    try:
+        return _compact(conn)
+    finally:
+        conn.close()
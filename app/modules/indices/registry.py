@@ -1,8 +1,55 @@
+"""
+Registry des templates d’indices (instance/indices/templates/<key>.json).
+
+Responsabilités :
+- lister les templates disponibles (clé + label) pour les <select>
+- valider une clé de template en O(1)
+- garder en mémoire les templates parsés (+ hash du contenu), invalidés
+  sur mtime : un template modifié / ajouté / supprimé est relu au
+  prochain accès, sans redémarrage
+- regrouper les variantes de langue d’un même template
+  (ssr-s4 = locale par défaut, ssr-s4_en = "en") et localiser une
+  session pour un viewer : libellés de catégories + textes pré-remplis
+  par le template, alignés position par position entre variantes
+  (les indices saisis à la main restent tels quels)
+
+NE FAIT PAS :
+- gérer les sessions d’indices (voir sessions.py)
+"""
+
+import copy
+import hashlib
 import json
+import threading
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 from flask import current_app
 
 
+# ------------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------------
+
+class _TemplateEntry:
+    __slots__ = ("key", "base_key", "locale", "path", "mtime_ns", "size", "hash", "label", "data")
+
+    def __init__(self, path: Path, stat, raw: bytes, data: Dict[str, Any]):
+        self.key = path.stem
+        self.base_key, self.locale = _split_key(path.stem)
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.hash = hashlib.sha1(raw).hexdigest()
+        self.label = data.get("label", path.stem)
+        self.data = data
+
+
+# templates_dir -> {"dir_mtime_ns": int, "entries": {key: _TemplateEntry}}
+_CACHE: Dict[Path, Dict[str, Any]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
 # ------------------------------------------------------------------
 # Helpers internes
 # ------------------------------------------------------------------
@@ -15,26 +62,89 @@ def _get_templates_dir() -> Path:
     )
 
 
-def _iter_template_files():
-    templates_dir = _get_templates_dir()
+def _split_key(template_key: str) -> Tuple[str, str]:
+    """
+    "ssr-s4_en" → ("ssr-s4", "en") ; "ssr-s4" → ("ssr-s4", <locale par défaut>).
+    """
+    base_key, _, suffix = template_key.rpartition("_")
+    if base_key and suffix in current_app.config.get("BABEL_SUPPORTED_LOCALES", []):
+        return base_key, suffix
+    return template_key, current_app.config.get("BABEL_DEFAULT_LOCALE", "fr")
+
+
+def _load_entry(path: Path) -> Optional[_TemplateEntry]:
+    try:
+        stat = path.stat()
+        raw = path.read_bytes()
+        data = json.loads(raw.decode("utf-8"))
+    except Exception:
+        return None
 
-    if not templates_dir.exists():
-        return []
+    if not isinstance(data, dict):
+        return None
 
-    return sorted(templates_dir.glob("*.json"))
+    return _TemplateEntry(path, stat, raw, data)
 
 
-def _load_template_metadata(path: Path) -> dict:
+def _is_fresh(entry: _TemplateEntry) -> bool:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
+        stat = entry.path.stat()
+    except OSError:
+        return False
+    return stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size
+
+
+def _entries() -> Dict[str, _TemplateEntry]:
+    """
+    Templates valides, indexés par clé.
+
+    Le dossier n’est re-scanné que si son mtime change (ajout /
+    suppression / renommage) ; un fichier n’est relu que si son mtime ou
+    sa taille change.
+    """
+    templates_dir = _get_templates_dir()
+
+    try:
+        dir_mtime_ns = templates_dir.stat().st_mtime_ns
+    except OSError:
         return {}
 
-    return {
-        "key": path.stem,
-        "label": data.get("label", path.stem),
-    }
+    with _CACHE_LOCK:
+        cached = _CACHE.get(templates_dir)
+
+        if cached is None or cached["dir_mtime_ns"] != dir_mtime_ns:
+            previous = cached["entries"] if cached else {}
+            entries = {}
+
+            for path in sorted(templates_dir.glob("*.json")):
+                entry = previous.get(path.stem)
+                if entry is None or not _is_fresh(entry):
+                    entry = _load_entry(path)
+                if entry is not None:
+                    entries[entry.key] = entry
+
+            cached = _CACHE[templates_dir] = {"dir_mtime_ns": dir_mtime_ns, "entries": entries}
+
+        return cached["entries"]
+
+
+def _get_entry(template_key: str) -> Optional[_TemplateEntry]:
+    """
+    Lookup O(1) (un stat pour vérifier que le fichier n’a pas bougé).
+    """
+    entries = _entries()
+    entry = entries.get(template_key)
+
+    if entry is not None and not _is_fresh(entry):
+        with _CACHE_LOCK:
+            reloaded = _load_entry(entry.path)
+            if reloaded is None:
+                entries.pop(template_key, None)
+            else:
+                entries[template_key] = reloaded
+            entry = reloaded
+
+    return entry
 
 
 # ------------------------------------------------------------------
@@ -48,16 +158,23 @@ def get_available_indices_templates():
 
     Format:
     [
-        { "key": "ssr-s4", "label": "SSR — Saison 4" },
+        { "key": "ssr-s4", "label": "SSR — Saison 4", "hash": "…",
+          "base_key": "ssr-s4", "locale": "fr" },
         ...
     ]
     """
     templates = []
 
-    for path in _iter_template_files():
-        meta = _load_template_metadata(path)
-        if meta:
-            templates.append(meta)
+    for key in list(_entries()):
+        entry = _get_entry(key)  # relu si modifié sur place
+        if entry is not None:
+            templates.append({
+                "key": entry.key,
+                "label": entry.label,
+                "hash": entry.hash,
+                "base_key": entry.base_key,
+                "locale": entry.locale,
+            })
 
     return templates
 
@@ -70,11 +187,135 @@ def is_valid_indices_template(template_key: str) -> bool:
     if template_key == "none":
         return True
 
-    for tpl in get_available_indices_templates():
-        if tpl["key"] == template_key:
-            return True
+    return _get_entry(template_key) is not None
+
 
-    return False
+def get_indices_template_hash(template_key: str) -> Optional[str]:
+    """
+    Hash (sha1) du contenu du template, None s’il n’existe pas.
+    """
+    entry = _get_entry(template_key)
+    return entry.hash if entry else None
+
+
+def load_indices_template(template_key: str) -> Dict[str, Any]:
+    """
+    Copie du template parsé (depuis la mémoire), modifiable par l’appelant.
+    Lève FileNotFoundError si le template n’existe pas.
+    """
+    if template_key == "none":
+        raise ValueError("No template for 'none'")
+
+    entry = _get_entry(template_key)
+    if entry is None:
+        raise FileNotFoundError(f"Indices template not found: {template_key}")
+
+    return copy.deepcopy(entry.data)
+
+
+def preload_indices_templates() -> int:
+    """
+    Charge tous les templates (toutes variantes) en mémoire (démarrage).
+    Retourne le nombre de templates chargés.
+    """
+    return len(_entries())
+
+
+def get_indices_template_variants(template_key: str) -> Dict[str, str]:
+    """
+    Variantes de langue du template : {locale: template_key}.
+    """
+    entries = _entries()
+    entry = entries.get(template_key)
+    if entry is None:
+        return {}
+
+    return {
+        other.locale: other.key
+        for other in entries.values()
+        if other.base_key == entry.base_key
+    }
+
+
+@lru_cache(maxsize=64)
+def _translation_table(target_key: str, variants: Tuple[Tuple[str, str], ...]):
+    """
+    Table de traduction vers une variante, calculée une fois par
+    (variante cible, contenu des variantes) : variants = ((key, hash), ...)
+    sert de clé d’invalidation.
+
+    Retourne (labels {catégorie: libellé}, cells {catégorie: {texte: texte}}).
+    """
+    entries = _entries()
+    target = entries[target_key].data.get("categories", {})
+
+    labels = {key: category.get("label", key) for key, category in target.items()}
+    cells: Dict[str, Dict[str, str]] = {key: {} for key in target}
+
+    for key, _hash in variants:
+        if key == target_key or key not in entries:
+            continue
+
+        for cat_key, category in entries[key].data.get("categories", {}).items():
+            if cat_key not in target:
+                continue
+
+            target_items = target[cat_key].get("items", [])
+            for row, target_row in zip(category.get("items", []), target_items):
+                for cell, target_cell in zip(row, target_row):
+                    if cell and cell != target_cell:
+                        cells[cat_key][cell] = target_cell
+
+    return labels, cells
+
+
+def localize_indices(indices: Dict[str, Any], template_key: str, locale: str) -> Dict[str, Any]:
+    """
+    Session d’indices vue dans une langue : libellés et textes du template
+    remplacés par ceux de la variante `locale` (si elle existe).
+
+    Retourne la session telle quelle si rien à traduire, sinon une copie
+    (la session du store n’est jamais modifiée).
+    """
+    variants = get_indices_template_variants(template_key)
+    target_key = variants.get(locale)
+    if target_key is None or len(variants) < 2:
+        return indices
+
+    entries = _entries()
+    signature = tuple(sorted((key, entries[key].hash) for key in variants.values()))
+    labels, cells = _translation_table(target_key, signature)
+
+    localized = dict(indices)
+    localized["categories"] = {
+        key: _localize_category(category, key, labels, cells)
+        for key, category in indices.get("categories", {}).items()
+    }
+    return localized
+
+
+def _localize_category(category: Dict[str, Any], key: str, labels, cells) -> Dict[str, Any]:
+    mapping = cells.get(key, {})
+
+    localized = dict(category)
+    localized["label"] = labels.get(key, category.get("label", key))
+    localized["items"] = [
+        [mapping.get(cell, cell) for cell in row]
+        for row in category.get("items", [])
+    ]
+    return localized
+
+
+def localize_category_items(items, category_key: str, template_key: str, locale: str):
+    """
+    Items d’une seule catégorie dans une langue (deltas SSE, conflits).
+    """
+    localized = localize_indices(
+        {"categories": {category_key: {"items": items}}},
+        template_key,
+        locale,
+    )
+    return localized["categories"][category_key]["items"]
 
 
 def get_indices_template_path(template_key: str) -> Path:
@@ -85,9 +326,9 @@ def get_indices_template_path(template_key: str) -> Path:
     if template_key == "none":
         raise ValueError("No template path for 'none'")
 
-    path = _get_templates_dir() / f"{template_key}.json"
+    entry = _get_entry(template_key)
 
-    if not path.exists():
+    if entry is None:
         raise FileNotFoundError(f"Indices template not found: {template_key}")
 
-    return path
+    return entry.path
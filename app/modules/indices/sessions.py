@@ -0,0 +1,562 @@
+"""
+Sessions d’indices (instance/indices/sessions/<slug>.json).
+
+Responsabilités :
+- lecture / écriture atomique des sessions d’indices
+- versions par catégorie pour la concurrence optimiste :
+  deux éditeurs sur des catégories différentes ne se gênent jamais,
+  deux éditeurs sur la même catégorie → le second est refusé
+  et reçoit l’état courant
+- store en mémoire (opt-in : INDICES_PERSIST_INTERVAL > 0, défaut 0) :
+  sessions gardées en mémoire, écriture d’une catégorie = remplacement de cette catégorie
+  seulement (copy-on-write), fichier réécrit en arrière-plan au plus
+  une fois par intervalle
+
+Comme pour le tracker, le store mémoire suppose UN process worker : le
+contrôle de version ne voit que la copie du process. Avec plusieurs
+workers, laisser l’intervalle à 0 (lecture / écriture directe du
+fichier, sous verrou).
+
+Les sessions retournées sont partagées avec le store : ne pas les
+modifier en place.
+
+NE FAIT PAS :
+- choisir le template (voir registry.py)
+- stocker l’historique (voir history.py, alimenté d’ici)
+- diffuser les changements (SSE côté routes)
+"""
+
+import atexit
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from flask import current_app
+
+from app.modules.indices.history import record_change, last_undoable_change, KIND_EDIT, KIND_UNDO, KIND_RESET
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev local) : pas de verrou inter-process
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------
+# Helpers internes
+# ------------------------------------------------------------------
+
+def indices_sessions_dir() -> Path:
+    return Path(current_app.instance_path) / "indices" / "sessions"
+
+
+def indices_session_path(slug: str) -> Path:
+    return indices_sessions_dir() / f"{slug}.json"
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+@contextmanager
+def _session_lock(path: Path):
+    """
+    Verrou exclusif court sur UNE session (fichier .lock à côté du JSON),
+    tenu le temps de relire / vérifier la version / remplacer.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_name(path.name + ".lock")
+
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _lines_to_items(columns: int, lines: List[str]) -> List[List[str]]:
+    """
+    "Lieu | Indice" → ["Lieu", "Indice"] (2 colonnes)
+    "Lieu"          → ["Lieu"]           (1 colonne)
+    """
+    items = []
+
+    for line in lines:
+        parts = [cell.strip() for cell in line.split("|")]
+
+        if columns == 2:
+            row = parts[:2] + [""] * (2 - len(parts))
+        else:
+            row = parts[:1]
+
+        items.append(row)
+
+    return items
+
+
+# ------------------------------------------------------------------
+# Conflits
+# ------------------------------------------------------------------
+
+class IndicesConflict(Exception):
+    """
+    La catégorie a été modifiée par quelqu’un d’autre depuis la version
+    affichée chez le client. .category contient l’état courant.
+    """
+
+    def __init__(self, category_key: str, category: Dict[str, Any]):
+        super().__init__(f"Indices conflict on category: {category_key}")
+        self.category_key = category_key
+        self.category = category
+
+
+# ------------------------------------------------------------------
+# Store mémoire
+# ------------------------------------------------------------------
+
+class _LiveIndices:
+    """
+    Session en mémoire + état de persistance du fichier.
+    """
+
+    __slots__ = ("indices", "path", "dirty", "persisted_at", "timer")
+
+    def __init__(self, indices: Dict[str, Any], path: Path):
+        self.indices = indices
+        self.path = path
+        self.dirty = False
+        self.persisted_at = time.monotonic()
+        self.timer = None
+
+
+# slug -> _LiveIndices (vide si le store mémoire est désactivé)
+_live: Dict[str, _LiveIndices] = {}
+
+# Protège _live ; notify_all() réveille les flux SSE à chaque écriture
+_live_cond = threading.Condition()
+
+
+def _persist_interval() -> float:
+    return float(current_app.config.get("INDICES_PERSIST_INTERVAL", 0) or 0)
+
+
+def _live_entry(slug: str) -> _LiveIndices:
+    """
+    Entrée mémoire d’une session (lue sur disque au premier accès).
+    À appeler sous _live_cond. Lève FileNotFoundError si absente.
+    """
+    entry = _live.get(slug)
+    if entry is None:
+        path = indices_session_path(slug)
+        if not path.exists():
+            raise FileNotFoundError(f"Indices session not found: {slug}")
+        entry = _live[slug] = _LiveIndices(_read_json(path), path)
+    return entry
+
+
+def _persist_live(slug: str) -> None:
+    """
+    Réécrit le fichier d’une session modifiée en mémoire.
+    Sans contexte d’application (appelé par le timer et à l’arrêt).
+    """
+    with _live_cond:
+        entry = _live.get(slug)
+        if entry is None or not entry.dirty:
+            return
+
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+
+        # Copy-on-write : ce dict n’est plus modifié, sérialisable hors verrou
+        indices = entry.indices
+        path = entry.path
+        entry.dirty = False
+        entry.persisted_at = time.monotonic()
+
+    try:
+        with _session_lock(path):
+            _write_json_atomic(path, indices)
+    except OSError:
+        logger.exception("Indices session flush failed (slug=%s)", slug)
+        with _live_cond:
+            if _live.get(slug) is entry:
+                entry.dirty = True  # retenté au prochain flush
+
+
+def _mark_dirty(slug: str, entry: _LiveIndices, interval: float) -> bool:
+    """
+    À appeler sous _live_cond après une écriture en mémoire.
+    Retourne True si le fichier doit être écrit tout de suite.
+    """
+    entry.dirty = True
+    _live_cond.notify_all()
+
+    if time.monotonic() - entry.persisted_at >= interval:
+        return True
+
+    if entry.timer is None:
+        delay = max(0.0, interval - (time.monotonic() - entry.persisted_at))
+        entry.timer = threading.Timer(delay, _persist_live, args=(slug,))
+        entry.timer.daemon = True
+        entry.timer.start()
+
+    return False
+
+
+def _replace_live(slug: str, indices: Dict[str, Any]) -> None:
+    """
+    Le fichier vient d’être écrit directement : l’état mémoire suit.
+    """
+    with _live_cond:
+        entry = _live.get(slug)
+        if entry is not None:
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+            entry.indices = indices
+            entry.dirty = False
+            entry.persisted_at = time.monotonic()
+            _live_cond.notify_all()
+
+
+# Caches par slug dérivés des sessions (ex. frames SSE des routes) :
+# vidés quand la session est supprimée ou remplacée
+_slug_caches: List[Dict[str, Any]] = []
+
+
+def register_slug_cache(cache: Dict[str, Any]) -> Dict[str, Any]:
+    _slug_caches.append(cache)
+    return cache
+
+
+def _forget_slug(slug: str) -> None:
+    for cache in _slug_caches:
+        cache.pop(slug, None)
+
+
+def _new_generation() -> str:
+    """
+    Identifiant d’une session remplacée (reset, restauration) : les
+    versions peuvent repartir de valeurs déjà vues, la génération non.
+    """
+    return secrets.token_hex(8)
+
+
+def flush_indices_session(slug: str) -> None:
+    """
+    Force l’écriture du fichier (no-op si déjà à jour).
+    """
+    _persist_live(slug)
+
+
+@atexit.register
+def flush_all_indices_sessions() -> None:
+    with _live_cond:
+        slugs = list(_live)
+
+    for slug in slugs:
+        _persist_live(slug)
+
+
+# Mode direct : chemin -> ((inode, mtime_ns, taille), version globale)
+# Le fichier n’est relu que s’il a été remplacé depuis
+_file_versions: Dict[Path, Tuple[Tuple[int, int, int], int]] = {}
+
+
+def indices_session_version(slug: str) -> Optional[int]:
+    """
+    Version globale d’une session (None si absente).
+    Hors store mémoire : un stat() par appel, relecture du JSON seulement
+    si le fichier a changé.
+    """
+    with _live_cond:
+        entry = _live.get(slug)
+        if entry is not None:
+            return int(entry.indices.get("version", 0))
+
+    path = indices_session_path(slug)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        _file_versions.pop(path, None)
+        return None
+
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _file_versions.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        version = int(_read_json(path).get("version", 0))
+    except FileNotFoundError:
+        return None
+
+    _file_versions[path] = (stamp, version)
+    return version
+
+
+def wait_indices_change(slug: str, last_version: Optional[int], timeout: float) -> Optional[int]:
+    """
+    Attend (au plus timeout) une version différente de last_version.
+
+    Session en mémoire : réveil immédiat à l’écriture.
+    Sinon : simple attente puis relecture du fichier.
+    """
+    def live_version():
+        entry = _live.get(slug)
+        return int(entry.indices.get("version", 0)) if entry else None
+
+    with _live_cond:
+        _live_cond.wait_for(lambda: live_version() not in (None, last_version), timeout)
+        version = live_version()
+
+    if version is not None:
+        return version
+    return indices_session_version(slug)
+
+
+# ------------------------------------------------------------------
+# API publique
+# ------------------------------------------------------------------
+
+def load_indices_session(slug: str) -> Optional[Dict[str, Any]]:
+    """
+    Session courante (None si absente). Store mémoire actif : lue sur
+    disque une seule fois, puis servie depuis la mémoire.
+    """
+    if _persist_interval() > 0:
+        with _live_cond:
+            try:
+                return _live_entry(slug).indices
+            except FileNotFoundError:
+                return None
+
+    with _live_cond:
+        entry = _live.get(slug)
+        if entry is not None:
+            return entry.indices
+
+    path = indices_session_path(slug)
+    if not path.exists():
+        return None
+    return _read_json(path)
+
+
+def save_indices_session(slug: str, indices: Dict[str, Any]) -> None:
+    """
+    Écrit une session complète (ex: restauration depuis l’archive).
+    Toujours écrite sur disque immédiatement, avec une nouvelle génération.
+    """
+    indices = dict(indices, generation=_new_generation())
+
+    path = indices_session_path(slug)
+    with _session_lock(path):
+        _write_json_atomic(path, indices)
+        _replace_live(slug, indices)
+
+    _forget_slug(slug)
+
+
+def delete_indices_session(slug: str) -> None:
+    with _live_cond:
+        entry = _live.pop(slug, None)
+        if entry is not None and entry.timer is not None:
+            entry.timer.cancel()
+
+    # Le .lock reste : un autre writer peut tenir un flock dessus
+    path = indices_session_path(slug)
+    path.unlink(missing_ok=True)
+    _file_versions.pop(path, None)
+    _forget_slug(slug)
+
+
+def update_indices_category(
+    slug: str,
+    category_key: str,
+    lines: List[str],
+    base_version: Optional[int] = None,
+    *,
+    author: Optional[str] = None,
+    reverts: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Remplace les items d’une catégorie.
+
+    base_version = version de la catégorie sur laquelle le client s’est basé.
+    None → pas de contrôle (ancien client, dernier qui écrit gagne).
+
+    Le changement est ajouté à l’historique (history.py) ; reverts = id de
+    l’entrée annulée (undo).
+
+    Lève FileNotFoundError (session absente), KeyError (catégorie inconnue),
+    IndicesConflict (catégorie modifiée entre-temps).
+    Retourne la catégorie mise à jour.
+    """
+    updated, previous_items = _replace_category(slug, category_key, lines, base_version)
+
+    record_change(
+        slug,
+        KIND_UNDO if reverts is not None else KIND_EDIT,
+        category=category_key,
+        version=updated["version"],
+        items=updated["items"],
+        previous_items=previous_items,
+        reverts=reverts,
+        author=author,
+    )
+
+    return updated
+
+
+def _replace_category(
+    slug: str,
+    category_key: str,
+    lines: List[str],
+    base_version: Optional[int],
+) -> Tuple[Dict[str, Any], List[List[str]]]:
+    """
+    Écriture d’une catégorie (store mémoire ou fichier).
+    Retourne (catégorie mise à jour, items précédents).
+    """
+    interval = _persist_interval()
+    if interval > 0:
+        with _live_cond:
+            entry = _live_entry(slug)
+            indices = entry.indices
+            category = indices["categories"][category_key]
+
+            current_version = int(category.get("version", 0))
+            if base_version is not None and int(base_version) != current_version:
+                raise IndicesConflict(category_key, category)
+
+            # Seule la catégorie touchée est recréée, le reste est partagé
+            updated = dict(category)
+            updated["items"] = _lines_to_items(category["columns"], lines)
+            updated["version"] = current_version + 1
+
+            new_indices = dict(indices)
+            new_indices["categories"] = dict(indices["categories"])
+            new_indices["categories"][category_key] = updated
+            new_indices["version"] = int(indices.get("version", 0)) + 1
+
+            entry.indices = new_indices
+            persist_now = _mark_dirty(slug, entry, interval)
+
+        if persist_now:
+            _persist_live(slug)
+        return updated, category.get("items", [])
+
+    path = indices_session_path(slug)
+
+    with _session_lock(path):
+        if not path.exists():
+            raise FileNotFoundError(f"Indices session not found: {slug}")
+
+        indices = _read_json(path)
+        category = indices["categories"][category_key]
+
+        current_version = int(category.get("version", 0))
+        if base_version is not None and int(base_version) != current_version:
+            raise IndicesConflict(category_key, category)
+
+        previous_items = category.get("items", [])
+        category["items"] = _lines_to_items(category["columns"], lines)
+        category["version"] = current_version + 1
+        indices["version"] = int(indices.get("version", 0)) + 1
+
+        _write_json_atomic(path, indices)
+
+    return category, previous_items
+
+
+def undo_last_indices_change(slug: str, *, author: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Annule le dernier edit (remet les items précédents de sa catégorie).
+
+    Lève LookupError (rien à annuler), IndicesConflict (catégorie
+    modifiée depuis, l’undo écraserait ce changement).
+    Retourne (clé de catégorie, catégorie mise à jour).
+    """
+    entry = last_undoable_change(slug)
+    if entry is None:
+        raise LookupError(f"Nothing to undo: {slug}")
+
+    lines = [" | ".join(row) for row in entry["previous_items"]]
+    updated = update_indices_category(
+        slug,
+        entry["category"],
+        lines,
+        base_version=entry["current_version"],
+        author=author,
+        reverts=entry["id"],
+    )
+    return entry["category"], updated
+
+
+def reset_indices_session(
+    slug: str,
+    template: Dict[str, Any],
+    *,
+    author: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Recopie le template (copie parsée, voir registry.load_indices_template)
+    dans la session.
+
+    Les versions repartent AU-DESSUS des précédentes : un client resté
+    sur l’ancien état est bien en conflit au lieu d’écraser le reset.
+    Après une suppression elles repartent de 1 : la nouvelle "generation"
+    distingue alors la session de l’ancienne (caches par version).
+    """
+    path = indices_session_path(slug)
+
+    # Même ordre que les autres writers : flock d’abord, puis _live_cond
+    # (seulement pour lire les versions et remplacer l’état mémoire)
+    with _session_lock(path):
+        try:
+            on_disk = _read_json(path)
+        except (OSError, ValueError):
+            on_disk = {}
+
+        with _live_cond:
+            entry = _live.get(slug)
+            # Store mémoire : la copie mémoire peut être plus récente que le fichier
+            previous = entry.indices if entry is not None else on_disk
+            previous_categories = previous.get("categories", {})
+
+            for key, category in template.get("categories", {}).items():
+                old_version = int(previous_categories.get(key, {}).get("version", 0))
+                category["version"] = old_version + 1
+
+            template["version"] = int(previous.get("version", 0)) + 1
+            template["generation"] = _new_generation()
+            _replace_live(slug, template)
+
+        _write_json_atomic(path, template)
+
+    _forget_slug(slug)
+
+    record_change(slug, KIND_RESET, version=template["version"], author=author)
+    return template
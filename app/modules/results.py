@@ -2,6 +2,7 @@ import re
 from flask_babel import gettext as _
 from math import ceil
 from app.database import get_db
+from app.modules.standings import refresh_group_standings
 
 
 
@@ -75,11 +76,142 @@ def _resolve_from_series_source(series_row, source_type: str):
     return None
 
 
+def refresh_series_counters(series_id: int):
+    """
+    Recalcule les compteurs matérialisés d'une série :
+    match_count, matches_played, team1_wins, team2_wins
+    (1 victoire max par match, matchs complétés uniquement).
+
+    Ne commit pas : appelé dans la transaction de l'écriture
+    (création / suppression de match, update_series_result).
+    """
+    db = get_db()
+
+    db.execute(
+        """
+        UPDATE series
+        SET
+            match_count = (
+                SELECT COUNT(*) FROM matches m WHERE m.series_id = series.id
+            ),
+            matches_played = (
+                SELECT COUNT(*) FROM matches m
+                WHERE m.series_id = series.id AND m.is_completed = 1
+            ),
+            team1_wins = (
+                SELECT COUNT(DISTINCT m.id)
+                FROM matches m
+                JOIN match_teams mt ON mt.match_id = m.id
+                WHERE m.series_id = series.id AND m.is_completed = 1
+                  AND mt.is_winner = 1 AND mt.team_id = series.team1_id
+            ),
+            team2_wins = (
+                SELECT COUNT(DISTINCT m.id)
+                FROM matches m
+                JOIN match_teams mt ON mt.match_id = m.id
+                WHERE m.series_id = series.id AND m.is_completed = 1
+                  AND mt.is_winner = 1 AND mt.team_id = series.team2_id
+            )
+        WHERE id = ?
+        """,
+        (series_id,)
+    )
+
+
+def _refresh_series_standings(series, old_state):
+    # Groupes des équipes avant / après (les séries propagées ne
+    # reçoivent que ces mêmes équipes)
+    team_ids = {series["team1_id"], series["team2_id"]}
+    if old_state:
+        team_ids |= {old_state["team1_id"], old_state["team2_id"]}
+    refresh_group_standings(series["phase_id"], team_ids)
+
+
+def _refresh_dependent_series(touched):
+    # Slots (dé-)propagés : compteurs BO de ces séries et classement des
+    # groupes de leurs équipes (celles entrées / sorties et l'adversaire,
+    # dont la série devient jouable ou ne l'est plus)
+    db = get_db()
+
+    for dep_id, team_ids in touched.items():
+        refresh_series_counters(dep_id)
+
+        dep = db.execute(
+            "SELECT phase_id, team1_id, team2_id FROM series WHERE id = ?",
+            (dep_id,)
+        ).fetchone()
+        if dep and dep["phase_id"]:
+            refresh_group_standings(dep["phase_id"], team_ids | {dep["team1_id"], dep["team2_id"]})
+
+
+def save_match_results(match_id: int, series_id, ordered, is_tie_for_first: bool):
+    """
+    Enregistre le classement d'un match (ordered : résultats triés,
+    1er = vainqueur sauf égalité) puis met à jour sa série.
+    Écriture de la file (voir db_writer.run_write).
+    """
+    db = get_db()
+
+    for idx, r in enumerate(ordered, start=1):
+        is_winner = 1 if idx == 1 and not is_tie_for_first else 0
+
+        db.execute(
+            """
+            UPDATE match_teams
+            SET
+                final_time_raw = ?,
+                final_time = ?,
+                position = ?,
+                is_winner = ?
+            WHERE match_id = ?
+              AND team_id = ?
+            """,
+            (
+                r["final_time_raw"],
+                r["final_time"],
+                idx,
+                is_winner,
+                match_id,
+                r["team_id"]
+            )
+        )
+
+    db.execute(
+        "UPDATE matches SET is_completed = 1 WHERE id = ?",
+        (match_id,)
+    )
+
+    if series_id:
+        update_series_result(series_id)
+
+
+def delete_match(match_id: int, series_id, was_completed: bool):
+    """
+    Supprime un match, met à jour les compteurs de sa série et, s'il
+    était joué, son vainqueur. Écriture de la file (voir db_writer.run_write).
+    """
+    db = get_db()
+
+    db.execute("DELETE FROM matches WHERE id = ?", (match_id,))
+
+    if series_id:
+        refresh_series_counters(series_id)
+
+    # 🔁 Recalcul du vainqueur si nécessaire
+    if series_id and was_completed:
+        update_series_result(series_id)
+
+
 def update_series_result(series_id: int):
     """
     Recalcule et met à jour le vainqueur d'une série (BO),
     puis propage automatiquement winner/loser vers les séries dépendantes.
 
+    Met aussi à jour, dans la même transaction, les compteurs BO de la
+    série (refresh_series_counters) et le classement de ses groupes
+    (refresh_group_standings), ainsi que ceux des séries dépendantes dont
+    un slot a été propagé ou dé-propagé.
+
     Garanties :
     - Idempotent
     - La vérité métier repose uniquement sur les matchs complétés
@@ -98,6 +230,7 @@ def update_series_result(series_id: int):
         """
         SELECT
             id,
+            phase_id,
             team1_id,
             team2_id,
             best_of
@@ -110,6 +243,9 @@ def update_series_result(series_id: int):
     if not series:
         return
 
+    # --- Compteurs BO (lus tels quels par les pages résultats / bracket / admin) ---
+    refresh_series_counters(series_id)
+
     # --- Snapshot état ancien (pour gérer suppression/correction de résultats) ---
     old_state = db.execute(
         """
@@ -126,6 +262,9 @@ def update_series_result(series_id: int):
     team1_id = series["team1_id"]
     team2_id = series["team2_id"]
 
+    # Séries dépendantes dont un slot est (dé-)propagé ici -> équipes entrées / sorties
+    touched = {}
+
     # v1 : si la série n'a pas encore ses équipes (bracket précréé), on ne calcule rien
     if not team1_id or not team2_id:
         # si le winner était défini, on le vide (cohérence)
@@ -164,7 +303,7 @@ def update_series_result(series_id: int):
             for d in deps:
                 old_team = old_resolve(d["source_team1_type"])
                 if old_team:
-                    db.execute(
+                    cleared = db.execute(
                         """
                         UPDATE series
                         SET team1_id = NULL
@@ -172,7 +311,9 @@ def update_series_result(series_id: int):
                           AND team1_id = ?
                         """,
                         (d["id"], old_team)
-                    )
+                    ).rowcount
+                    if cleared:
+                        touched.setdefault(d["id"], set()).add(old_team)
 
             # clear team2 slots
             deps = db.execute(
@@ -187,7 +328,7 @@ def update_series_result(series_id: int):
             for d in deps:
                 old_team = old_resolve(d["source_team2_type"])
                 if old_team:
-                    db.execute(
+                    cleared = db.execute(
                         """
                         UPDATE series
                         SET team2_id = NULL
@@ -195,31 +336,25 @@ def update_series_result(series_id: int):
                           AND team2_id = ?
                         """,
                         (d["id"], old_team)
-                    )
+                    ).rowcount
+                    if cleared:
+                        touched.setdefault(d["id"], set()).add(old_team)
 
+        _refresh_series_standings(series, old_state)
+        _refresh_dependent_series(touched)
         db.commit()
         return
 
     # --- Nombre de victoires nécessaires ---
     wins_needed = ceil(series["best_of"] / 2)
 
-    # --- Comptage des victoires ---
-    rows = db.execute(
-        """
-        SELECT
-            mt.team_id,
-            COUNT(*) AS wins
-        FROM matches m
-        JOIN match_teams mt ON mt.match_id = m.id
-        WHERE m.series_id = ?
-          AND m.is_completed = 1
-          AND mt.is_winner = 1
-        GROUP BY mt.team_id
-        """,
+    # --- Victoires (compteurs recalculés plus haut) ---
+    counters = db.execute(
+        "SELECT team1_wins, team2_wins FROM series WHERE id = ?",
         (series_id,)
-    ).fetchall()
+    ).fetchone()
 
-    wins = {row["team_id"]: row["wins"] for row in rows}
+    wins = {team1_id: counters["team1_wins"], team2_id: counters["team2_wins"]}
 
     # --- Détermination du vainqueur ---
     new_winner = None
@@ -284,7 +419,7 @@ def update_series_result(series_id: int):
             for d in deps:
                 old_team = old_resolve(d["source_team1_type"])
                 if old_team:
-                    db.execute(
+                    cleared = db.execute(
                         """
                         UPDATE series
                         SET team1_id = NULL
@@ -292,7 +427,9 @@ def update_series_result(series_id: int):
                           AND team1_id = ?
                         """,
                         (d["id"], old_team)
-                    )
+                    ).rowcount
+                    if cleared:
+                        touched.setdefault(d["id"], set()).add(old_team)
 
             # clear team2 slots
             deps = db.execute(
@@ -307,7 +444,7 @@ def update_series_result(series_id: int):
             for d in deps:
                 old_team = old_resolve(d["source_team2_type"])
                 if old_team:
-                    db.execute(
+                    cleared = db.execute(
                         """
                         UPDATE series
                         SET team2_id = NULL
@@ -315,7 +452,9 @@ def update_series_result(series_id: int):
                           AND team2_id = ?
                         """,
                         (d["id"], old_team)
-                    )
+                    ).rowcount
+                    if cleared:
+                        touched.setdefault(d["id"], set()).add(old_team)
 
     # --- Propagation winner/loser vers les séries suivantes (sans jamais écraser) ---
     if source_series:
@@ -337,6 +476,7 @@ def update_series_result(series_id: int):
                     "UPDATE series SET team1_id = ? WHERE id = ?",
                     (team_to_set, d["id"])
                 )
+                touched.setdefault(d["id"], set()).add(team_to_set)
 
         # team2 slots dépendants
         deps = db.execute(
@@ -356,5 +496,8 @@ def update_series_result(series_id: int):
                     "UPDATE series SET team2_id = ? WHERE id = ?",
                     (team_to_set, d["id"])
                 )
+                touched.setdefault(d["id"], set()).add(team_to_set)
 
+    _refresh_series_standings(series, old_state)
+    _refresh_dependent_series(touched)
     db.commit()
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Archivage des sessions de restreams inactifs.
+
+Responsabilités :
+- déplacer les sessions tracker (sessions.db) et indices (<slug>.json)
+  des restreams désactivés depuis plus de N jours dans une archive
+  compressée, UNE base SQLite par tournoi :
+      instance/archives/sessions/tournament_<id>.db
+- restaurer ces sessions à la réactivation du restream
+- job périodique en arrière-plan + commande flask archive-sessions
+
+Chaque session archivée = une ligne (restream_id, kind) avec le JSON
+compact compressé zlib. Les dossiers de sessions ne contiennent plus que
+les restreams vivants : scans et sauvegardes restent rapides, le nombre
+d’inodes reste borné.
+
+NE FAIT PAS :
+- modifier les sessions (voir tracker/base.py, indices/sessions.py)
+- activer / désactiver un restream (routes restream)
+"""
+
+import json
+import sqlite3
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional
+from flask import current_app
+
+from app.database import get_db
+from app.db_writer import run_write
+from app.jobs import start_periodic_job
+from app.modules.tracker.base import (
+    load_session_restream, save_session_restream, delete_session_restream,
+    session_updated_at_restream,
+)
+from app.modules.indices.sessions import (
+    indices_session_path, load_indices_session, save_indices_session, delete_indices_session,
+)
+
+
+KIND_TRACKER = "tracker"
+KIND_INDICES = "indices"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_sessions (
+    restream_id   INTEGER NOT NULL,
+    kind          TEXT NOT NULL,
+    slug          TEXT NOT NULL,
+    version       INTEGER NOT NULL DEFAULT 0,
+    data          BLOB NOT NULL,
+    archived_at   TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (restream_id, kind)
+)
+"""
+
+
+# ======================================================================
+# Stockage
+# ======================================================================
+
+def archives_dir() -> Path:
+    return Path(current_app.instance_path) / "archives" / "sessions"
+
+
+def archive_path(tournament_id: int) -> Path:
+    return archives_dir() / f"tournament_{tournament_id}.db"
+
+
+def _connect(tournament_id: int) -> sqlite3.Connection:
+    path = archive_path(tournament_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _pack(data: Dict[str, Any]) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), 9)
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+# ======================================================================
+# Activité
+# ======================================================================
+
+def _last_activity(restream_id: int, slug: str) -> Optional[datetime]:
+    """
+    Dernière écriture connue (tracker ou indices), en UTC.
+    None = aucune session à archiver.
+    """
+    dates = []
+
+    updated_at = session_updated_at_restream(restream_id)
+    if updated_at:
+        dates.append(datetime.fromisoformat(updated_at))
+
+    path = indices_session_path(slug)
+    if path.exists():
+        dates.append(datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).replace(tzinfo=None))
+
+    return max(dates) if dates else None
+
+
+def _delete_if_still_inactive(restream_id: int, slug: str, tracker: bool, indices: bool) -> bool:
+    """
+    Écriture de la file (db_writer) : l’UPDATE conditionnel prend le
+    verrou d’écriture de la base jusqu’au commit. enable_restream (UPDATE
+    de is_active) attend donc la fin de la suppression, puis restaure
+    l’archive. Retourne False si le restream a été réactivé entre-temps.
+    """
+    still_inactive = get_db().execute(
+        "UPDATE restreams SET is_active = 0 WHERE id = ? AND is_active = 0",
+        (restream_id,),
+    ).rowcount
+
+    if not still_inactive:
+        return False
+
+    # Rejouable (retry de la file) : suppressions idempotentes
+    if tracker:
+        delete_session_restream(restream_id)
+    if indices:
+        delete_indices_session(slug)
+    return True
+
+
+# ======================================================================
+# API PUBLIQUE
+# ======================================================================
+
+def archive_restream_sessions(restream_id: int, slug: str, tournament_id: int) -> int:
+    """
+    Archive les sessions d’un restream puis les supprime du stockage
+    courant. Retourne le nombre de sessions archivées.
+
+    Ordre : écriture dans l’archive (commit) AVANT suppression, une
+    interruption laisse au pire un doublon, jamais une perte.
+    Restream réactivé entre-temps : sessions vivantes gardées, copie
+    archivée retirée.
+    """
+    rows = []
+
+    tracker = load_session_restream(restream_id)
+    if tracker is not None:
+        rows.append((restream_id, KIND_TRACKER, slug, int(tracker.get("version", 0)), _pack(tracker)))
+
+    indices = load_indices_session(slug)
+    if indices is not None:
+        rows.append((restream_id, KIND_INDICES, slug, int(indices.get("version", 0)), _pack(indices)))
+
+    if not rows:
+        return 0
+
+    conn = _connect(tournament_id)
+    try:
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO archived_sessions (restream_id, kind, slug, version, data)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+    finally:
+        conn.close()
+
+    if not run_write(_delete_if_still_inactive, restream_id, slug, tracker is not None, indices is not None):
+        conn = _connect(tournament_id)
+        try:
+            with conn:
+                conn.execute("DELETE FROM archived_sessions WHERE restream_id = ?", (restream_id,))
+        finally:
+            conn.close()
+        return 0
+
+    return len(rows)
+
+
+def restore_restream_sessions(restream_id: int, slug: str, tournament_id: int) -> Dict[str, bool]:
+    """
+    Remet en place les sessions archivées d’un restream (réactivation).
+    Retourne {"tracker": bool, "indices": bool} : sessions restaurées.
+    """
+    restored = {KIND_TRACKER: False, KIND_INDICES: False}
+
+    path = archive_path(tournament_id)
+    if not path.exists():
+        return restored
+
+    conn = _connect(tournament_id)
+    try:
+        rows = conn.execute(
+            "SELECT kind, data FROM archived_sessions WHERE restream_id = ?",
+            (restream_id,),
+        ).fetchall()
+
+        for kind, blob in rows:
+            data = _unpack(blob)
+            if kind == KIND_TRACKER:
+                save_session_restream(restream_id, data)
+            elif kind == KIND_INDICES:
+                save_indices_session(slug, data)
+            restored[kind] = True
+
+        with conn:
+            conn.execute("DELETE FROM archived_sessions WHERE restream_id = ?", (restream_id,))
+    finally:
+        conn.close()
+
+    return restored
+
+
+def archive_inactive_sessions(days: int) -> int:
+    """
+    Archive les sessions des restreams désactivés dont la dernière
+    activité date de plus de `days` jours. Retourne le nombre de
+    sessions archivées.
+    """
+    db = get_db()
+    restreams = db.execute(
+        """
+        SELECT r.id, r.slug, m.tournament_id
+        FROM restreams r
+        JOIN matches m ON m.id = r.match_id
+        WHERE r.is_active = 0
+        """
+    ).fetchall()
+
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    archived = 0
+
+    for restream in restreams:
+        last = _last_activity(int(restream["id"]), restream["slug"])
+        if last is None or last > cutoff:
+            continue
+
+        archived += archive_restream_sessions(
+            int(restream["id"]), restream["slug"], int(restream["tournament_id"])
+        )
+
+    return archived
+
+
+# ======================================================================
+# Job périodique + CLI
+# ======================================================================
+
+def start_archive_job(app) -> None:
+    """
+    Archivage périodique, un seul process par instance/ (voir app/jobs.py).
+    Désactivé si SESSION_ARCHIVE_INTERVAL_HOURS vaut 0.
+    """
+    interval = float(app.config.get("SESSION_ARCHIVE_INTERVAL_HOURS", 0) or 0) * 3600
+
+    def tick():
+        count = archive_inactive_sessions(app.config["SESSION_ARCHIVE_AFTER_DAYS"])
+        if count:
+            app.logger.info("Sessions archivées : %s", count)
+
+    start_periodic_job(app, "session-archive", interval, tick)
+
+
+def register_archive_commands(app):
+    """
+    flask archive-sessions [--days N] : archivage immédiat (cron, fin de saison).
+    """
+    import click
+
+    @app.cli.command("archive-sessions")
+    @click.option("--days", type=int, default=None, help="Inactivité minimale (jours).")
+    def archive_sessions_command(days):
+        if days is None:
+            days = app.config["SESSION_ARCHIVE_AFTER_DAYS"]
+        count = archive_inactive_sessions(days)
+        click.echo(f"{count} session(s) archivée(s) (inactives depuis plus de {days} jours)")
@@ -0,0 +1,154 @@
+"""
+Classements des phases de groupes (table group_standings).
+
+Une ligne par (phase, groupe, équipe) : victoires, séries jouées et
+rang dans le groupe, tie-break compris (victoires, position manuelle,
+seed, nom). La page publique lit le classement déjà trié.
+
+Mise à jour incrémentale : seuls les groupes des équipes concernées
+sont recalculés. Les fonctions ne commitent pas, elles s'exécutent
+dans la transaction de l'écriture qui les appelle.
+
+Appelé par :
+- update_series_result (résultat / vainqueur d'une série)
+- création / édition / suppression de confrontation
+- inscription, retrait, groupes / positions des équipes d'un tournoi
+- édition / suppression de phase, renommage d'équipe
+"""
+
+from typing import Iterable, Optional
+from app.database import get_db
+
+
+# Classement recalculé d'une phase de groupes (filtre ajouté via {where})
+_STANDINGS_INSERT = """
+INSERT INTO group_standings (phase_id, group_name, team_id, wins, played, rank)
+SELECT
+    x.phase_id,
+    x.group_name,
+    x.team_id,
+    x.wins,
+    x.played,
+    ROW_NUMBER() OVER (
+        PARTITION BY x.phase_id, x.group_name
+        ORDER BY
+            x.wins DESC,
+            x.position IS NULL,
+            COALESCE(x.position, 1000000000),
+            COALESCE(x.seed, 1000000000),
+            LOWER(x.team_name)
+    )
+FROM (
+    SELECT
+        p.id AS phase_id,
+        tt.group_name,
+        tt.team_id,
+        tt.position,
+        tt.seed,
+        tm.name AS team_name,
+        (
+            SELECT COUNT(*) FROM series s
+            WHERE s.phase_id = p.id AND s.winner_team_id = tt.team_id
+        ) AS wins,
+        (
+            SELECT COUNT(*) FROM series s
+            WHERE s.phase_id = p.id
+              AND s.team1_id IS NOT NULL
+              AND s.team2_id IS NOT NULL
+              AND (s.team1_id = tt.team_id OR s.team2_id = tt.team_id)
+        ) AS played
+    FROM tournament_phases p
+    JOIN tournament_teams tt ON tt.tournament_id = p.tournament_id
+    JOIN teams tm ON tm.id = tt.team_id
+    WHERE LOWER(TRIM(COALESCE(p.type, ''))) = 'groups'
+      AND tt.group_name IS NOT NULL
+      AND TRIM(tt.group_name) != ''
+      AND {where}
+) x
+"""
+
+
+def refresh_group_standings(phase_id: int, team_ids: Optional[Iterable[int]] = None):
+    """
+    Recalcule le classement d'une phase.
+    team_ids : seulement les groupes contenant ces équipes (None = toute la phase).
+    Une phase qui n'est pas (ou plus) de type groupes n'a aucune ligne.
+    """
+    db = get_db()
+
+    if team_ids is None:
+        db.execute("DELETE FROM group_standings WHERE phase_id = ?", (phase_id,))
+        db.execute(_STANDINGS_INSERT.format(where="p.id = ?"), (phase_id,))
+        return
+
+    team_ids = [int(t) for t in team_ids if t]
+    if not team_ids:
+        return
+
+    placeholders = ",".join("?" for _ in team_ids)
+    groups = [
+        row["group_name"]
+        for row in db.execute(
+            f"""
+            SELECT DISTINCT tt.group_name
+            FROM tournament_teams tt
+            JOIN tournament_phases p ON p.tournament_id = tt.tournament_id
+            WHERE p.id = ?
+              AND tt.team_id IN ({placeholders})
+              AND tt.group_name IS NOT NULL
+              AND TRIM(tt.group_name) != ''
+            """,
+            (phase_id, *team_ids)
+        ).fetchall()
+    ]
+
+    if not groups:
+        return
+
+    group_placeholders = ",".join("?" for _ in groups)
+    db.execute(
+        f"DELETE FROM group_standings WHERE phase_id = ? AND group_name IN ({group_placeholders})",
+        (phase_id, *groups)
+    )
+    db.execute(
+        _STANDINGS_INSERT.format(where=f"p.id = ? AND tt.group_name IN ({group_placeholders})"),
+        (phase_id, *groups)
+    )
+
+
+def refresh_tournament_standings(tournament_id: int):
+    """
+    Recalcule toutes les phases d'un tournoi (groupes / positions des
+    équipes modifiés : une équipe peut avoir changé de groupe).
+    """
+    db = get_db()
+
+    phase_ids = [
+        row["id"]
+        for row in db.execute(
+            "SELECT id FROM tournament_phases WHERE tournament_id = ?",
+            (tournament_id,)
+        ).fetchall()
+    ]
+
+    for phase_id in phase_ids:
+        refresh_group_standings(phase_id)
+
+
+def refresh_team_standings(team_id: int):
+    """
+    Recalcule les groupes contenant l'équipe, dans tous ses tournois
+    (renommage : le nom départage les égalités).
+    """
+    db = get_db()
+
+    phase_ids = [
+        row["phase_id"]
+        for row in db.execute(
+            "SELECT DISTINCT phase_id FROM group_standings WHERE team_id = ?",
+            (team_id,)
+        ).fetchall()
+    ]
+
+    for phase_id in phase_ids:
+        refresh_group_standings(phase_id, [team_id])
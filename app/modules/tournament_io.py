@@ -0,0 +1,995 @@
+"""
+Import / export de la mise en place d'un tournoi (JSON, CSV).
+
+Responsabilités :
+- exporter joueurs, équipes, inscriptions, phases, séries (sources
+  bracket comprises) et matchs planifiés d'un tournoi :
+  JSON complet, ou CSV "roster" (une ligne par joueur inscrit)
+- importer ce format dans un tournoi existant : tout le fichier est
+  validé avant la première écriture (liste complète des erreurs,
+  validate_import), puis écrit par executemany dans UNE transaction
+  (apply_import, via run_write ; run_import convertit un conflit avec
+  une écriture concurrente en TournamentImportError)
+- recalculer compteurs de séries et classements de groupes importés
+
+Références par nom (joueurs, équipes, phases) et par clé locale au
+fichier (séries) : un export se réimporte dans un autre tournoi.
+Une équipe solo se référence par son nom "Solo - <joueur>" (créée par
+le trigger d'insertion des joueurs).
+
+NE FAIT PAS :
+- exporter / importer les résultats (temps, vainqueurs)
+- modifier ou supprimer l'existant : joueurs et équipes déjà en base
+  sont réutilisés (racetime_user complété s'il est vide)
+- commiter (appelant : run_write)
+"""
+
+import csv
+import io
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+from flask_babel import gettext as _
+
+from app.database import get_db
+from app.modules.results import refresh_series_counters
+from app.modules.standings import refresh_tournament_standings
+from app.modules.text import normalize_group_name
+
+
+FORMAT_NAME = "tournament-setup"
+FORMAT_VERSION = 1
+
+SECTIONS = ("players", "teams", "registrations", "phases", "series", "matches")
+
+PHASE_TYPES = ("groups", "bracket_simple_elim", "bracket_double_elim", "custom")
+BRACKET_TYPES = ("bracket_simple_elim", "bracket_double_elim")
+SOURCE_TYPES = ("winner", "loser")
+
+# Colonnes du CSV roster (équipe vide = équipe solo du joueur)
+ROSTER_COLUMNS = ("team", "player", "racetime_user", "seed", "group", "position")
+
+SOLO_PREFIX = "Solo - "
+
+
+class TournamentImportError(ValueError):
+    """Fichier d'import invalide : toutes les erreurs trouvées."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _to_int(value, label: str, errors: List[str], minimum: Optional[int] = None) -> Optional[int]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError()
+        number = int(value)
+    except (TypeError, ValueError):
+        errors.append(_("%(where)s : nombre entier attendu.", where=label))
+        return None
+
+    if minimum is not None and number < minimum:
+        errors.append(_("%(where)s : valeur inférieure à %(min)s.", where=label, min=minimum))
+        return None
+    return number
+
+
+# ======================================================================
+# Lecture des fichiers
+# ======================================================================
+
+def parse_import_file(content, filename: str) -> Dict[str, Any]:
+    """
+    Fichier envoyé (bytes ou texte) -> données d'import.
+    Format choisi par l'extension : .csv = roster, sinon JSON.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise TournamentImportError([_("Le fichier doit être encodé en UTF-8.")])
+
+    if (filename or "").lower().endswith(".csv"):
+        return _parse_roster_csv(content)
+
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise TournamentImportError([_("JSON invalide : %(error)s", error=str(e))])
+
+    if not isinstance(data, dict):
+        raise TournamentImportError([_("JSON invalide : un objet est attendu.")])
+
+    if data.get("format", FORMAT_NAME) != FORMAT_NAME:
+        raise TournamentImportError([_("Format de fichier inconnu : %(name)s", name=data.get("format"))])
+
+    version = data.get("version", FORMAT_VERSION)
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise TournamentImportError([_("Version de format non supportée : %(version)s", version=version)])
+
+    return data
+
+
+def _parse_roster_csv(text: str) -> Dict[str, Any]:
+    """
+    CSV roster -> sections players / teams / registrations.
+    Les lignes d'une même équipe sont regroupées (seed / groupe /
+    position de la première ligne).
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    columns = [(c or "").strip().lower() for c in (reader.fieldnames or [])]
+    if "player" not in columns:
+        raise TournamentImportError([_("CSV : colonne « player » manquante.")])
+    reader.fieldnames = columns
+
+    players: Dict[str, dict] = {}
+    teams: Dict[str, dict] = {}
+    registrations: Dict[str, dict] = {}
+    errors = []
+
+    for line, row in enumerate(reader, start=2):
+        player = _clean(row.get("player"))
+        if not player:
+            errors.append(_("CSV ligne %(line)s : joueur manquant.", line=line))
+            continue
+
+        players.setdefault(player, {"name": player, "racetime_user": _clean(row.get("racetime_user"))})
+
+        team = _clean(row.get("team"))
+        if team:
+            teams.setdefault(team, {"name": team, "players": []})["players"].append(player)
+        else:
+            team = SOLO_PREFIX + player
+
+        registrations.setdefault(team, {
+            "team": team,
+            "seed": _clean(row.get("seed")),
+            "group": _clean(row.get("group")),
+            "position": _clean(row.get("position")),
+        })
+
+    if errors:
+        raise TournamentImportError(errors)
+
+    return {
+        "players": list(players.values()),
+        "teams": list(teams.values()),
+        "registrations": list(registrations.values()),
+    }
+
+
+# ======================================================================
+# Validation (aucune écriture)
+# ======================================================================
+
+def validate_import(tournament_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vérifie tout le fichier contre la base et retourne le plan
+    d'écriture (données simples, sans dépendance à la requête).
+    Lève TournamentImportError avec toutes les erreurs (traduites :
+    à appeler dans la requête).
+    """
+    db = get_db()
+
+    tournament = db.execute(
+        "SELECT id, status FROM tournaments WHERE id = ?",
+        (tournament_id,)
+    ).fetchone()
+    if not tournament:
+        raise TournamentImportError([_("Tournoi introuvable.")])
+
+    errors: List[str] = []
+    sections = {}
+    for name in SECTIONS:
+        value = data.get(name) or []
+        if not isinstance(value, list):
+            errors.append(_("Section « %(name)s » : liste attendue.", name=name))
+            value = []
+        sections[name] = value
+
+    # ------------------------------------------------------------------
+    # Joueurs : réutilisés par nom, sinon créés
+    # ------------------------------------------------------------------
+    db_players: Dict[str, list] = {}
+    for row in db.execute("SELECT id, name, racetime_user FROM players").fetchall():
+        db_players.setdefault(row["name"], []).append(row)
+
+    player_ids: Dict[str, int] = {}
+    new_players = []
+    racetime_updates = []
+    seen = set()
+
+    for index, item in enumerate(sections["players"], start=1):
+        label = _("Joueur #%(n)s", n=index)
+        name = _clean(item.get("name")) if isinstance(item, dict) else None
+        if not name:
+            errors.append(_("%(where)s : nom manquant.", where=label))
+            continue
+
+        label = _("Joueur « %(name)s »", name=name)
+        if name in seen:
+            errors.append(_("%(where)s : présent plusieurs fois.", where=label))
+            continue
+        seen.add(name)
+
+        racetime_user = _clean(item.get("racetime_user"))
+        existing = db_players.get(name, [])
+
+        if len(existing) > 1:
+            errors.append(_("%(where)s : plusieurs joueurs portent ce nom en base.", where=label))
+        elif existing:
+            player = existing[0]
+            player_ids[name] = player["id"]
+            if racetime_user and player["racetime_user"] and player["racetime_user"] != racetime_user:
+                errors.append(_("%(where)s : racetime_user différent de celui en base.", where=label))
+            elif racetime_user and not player["racetime_user"]:
+                racetime_updates.append((racetime_user, player["id"]))
+        else:
+            new_players.append((name, racetime_user))
+
+    new_player_names = {name for name, _rt in new_players}
+
+    def player_known(name: str) -> bool:
+        if name in player_ids or name in new_player_names:
+            return True
+        existing = db_players.get(name, [])
+        if len(existing) == 1:
+            player_ids[name] = existing[0]["id"]
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Équipes (2 joueurs ou plus ; les équipes solo existent déjà)
+    # ------------------------------------------------------------------
+    db_teams: Dict[str, list] = {}
+    for row in db.execute("SELECT id, name FROM teams").fetchall():
+        db_teams.setdefault(row["name"], []).append(row["id"])
+
+    team_ids: Dict[str, int] = {}
+    new_teams = []
+    seen = set()
+
+    for index, item in enumerate(sections["teams"], start=1):
+        label = _("Équipe #%(n)s", n=index)
+        name = _clean(item.get("name")) if isinstance(item, dict) else None
+        if not name:
+            errors.append(_("%(where)s : nom manquant.", where=label))
+            continue
+
+        label = _("Équipe « %(name)s »", name=name)
+        if name in seen:
+            errors.append(_("%(where)s : présente plusieurs fois.", where=label))
+            continue
+        seen.add(name)
+        if name.startswith(SOLO_PREFIX):
+            errors.append(_("%(where)s : les équipes solo sont créées avec le joueur.", where=label))
+            continue
+
+        roster = [_clean(p) for p in (item.get("players") or [])] if isinstance(item.get("players"), list) else []
+        if len(roster) < 2 or None in roster or len(set(roster)) != len(roster):
+            errors.append(_("%(where)s : au moins 2 joueurs distincts attendus.", where=label))
+            continue
+
+        unknown = [p for p in roster if not player_known(p)]
+        if unknown:
+            errors.append(_("%(where)s : joueur(s) inconnu(s) : %(names)s", where=label, names=", ".join(unknown)))
+            continue
+
+        existing = db_teams.get(name, [])
+        if len(existing) > 1:
+            errors.append(_("%(where)s : plusieurs équipes portent ce nom en base.", where=label))
+        elif existing:
+            current = {
+                row["name"]
+                for row in db.execute(
+                    """
+                    SELECT p.name
+                    FROM team_players tp
+                    JOIN players p ON p.id = tp.player_id
+                    WHERE tp.team_id = ?
+                    """,
+                    (existing[0],)
+                ).fetchall()
+            }
+            if current != set(roster):
+                errors.append(_("%(where)s : existe déjà en base avec d'autres joueurs.", where=label))
+            else:
+                team_ids[name] = existing[0]
+        else:
+            new_teams.append((name, roster))
+
+    new_team_names = {name for name, _r in new_teams}
+
+    def resolve_team(value, label: str) -> Optional[str]:
+        """
+        Référence d'équipe -> nom (clé de team_ids après écriture).
+        None si absente ou invalide (erreur ajoutée).
+        """
+        name = _clean(value)
+        if not name:
+            return None
+        if name in team_ids or name in new_team_names:
+            return name
+        if name.startswith(SOLO_PREFIX) and name[len(SOLO_PREFIX):] in new_player_names:
+            return name
+
+        existing = db_teams.get(name, [])
+        if len(existing) == 1:
+            team_ids[name] = existing[0]
+            return name
+
+        if existing:
+            errors.append(_("%(where)s : plusieurs équipes « %(name)s » en base.", where=label, name=name))
+        else:
+            errors.append(_("%(where)s : équipe inconnue « %(name)s ».", where=label, name=name))
+        return None
+
+    # ------------------------------------------------------------------
+    # Inscriptions (tournoi en brouillon, comme dans le panel)
+    # ------------------------------------------------------------------
+    registered_ids = {
+        row["team_id"]
+        for row in db.execute(
+            "SELECT team_id FROM tournament_teams WHERE tournament_id = ?",
+            (tournament_id,)
+        ).fetchall()
+    }
+    groups = [
+        row["group_name"]
+        for row in db.execute(
+            """
+            SELECT DISTINCT group_name
+            FROM tournament_teams
+            WHERE tournament_id = ?
+              AND group_name IS NOT NULL
+              AND TRIM(group_name) != ''
+            """,
+            (tournament_id,)
+        ).fetchall()
+    ]
+
+    if sections["registrations"] and tournament["status"] != "draft":
+        errors.append(_("Inscriptions : le tournoi doit être en brouillon."))
+
+    registrations = []
+    registered_names = set()
+
+    for index, item in enumerate(sections["registrations"], start=1):
+        label = _("Inscription #%(n)s", n=index)
+        if not isinstance(item, dict):
+            errors.append(_("%(where)s : objet attendu.", where=label))
+            continue
+
+        team = resolve_team(item.get("team"), label)
+        if not team:
+            if not _clean(item.get("team")):
+                errors.append(_("%(where)s : équipe manquante.", where=label))
+            continue
+
+        if team in registered_names or team_ids.get(team) in registered_ids:
+            errors.append(_("%(where)s : « %(name)s » déjà inscrite.", where=label, name=team))
+            continue
+        registered_names.add(team)
+
+        group_name = normalize_group_name(_clean(item.get("group")) or "", groups)
+        if group_name and group_name not in groups:
+            groups.append(group_name)
+
+        registrations.append((
+            team,
+            _to_int(item.get("seed"), label, errors),
+            group_name,
+            _to_int(item.get("position"), label, errors),
+        ))
+
+    def is_registered(team: str) -> bool:
+        return team in registered_names or team_ids.get(team) in registered_ids
+
+    # ------------------------------------------------------------------
+    # Phases : nouvelles phases du fichier + phases existantes (par nom)
+    # ------------------------------------------------------------------
+    db_phases = {
+        row["name"]: row
+        for row in db.execute(
+            "SELECT id, name, type, position FROM tournament_phases WHERE tournament_id = ?",
+            (tournament_id,)
+        ).fetchall()
+    }
+    phase_types = {name: row["type"] for name, row in db_phases.items()}
+    next_position = max([row["position"] or 0 for row in db_phases.values()], default=0) + 1
+
+    phases = []
+    for index, item in enumerate(sections["phases"], start=1):
+        label = _("Phase #%(n)s", n=index)
+        name = _clean(item.get("name")) if isinstance(item, dict) else None
+        if not name:
+            errors.append(_("%(where)s : nom manquant.", where=label))
+            continue
+
+        label = _("Phase « %(name)s »", name=name)
+        if name in phase_types:
+            errors.append(_("%(where)s : existe déjà dans ce tournoi.", where=label))
+            continue
+
+        phase_type = _clean(item.get("type")) or "custom"
+        if phase_type not in PHASE_TYPES:
+            errors.append(_("%(where)s : type inconnu « %(type)s ».", where=label, type=phase_type))
+            continue
+
+        position = _to_int(item.get("position"), label, errors, minimum=1)
+        if position is None:
+            position = next_position
+        next_position = max(next_position, position + 1)
+
+        details = item.get("details")
+        if details is not None and not isinstance(details, dict):
+            errors.append(_("%(where)s : details doit être un objet.", where=label))
+            continue
+
+        phase_types[name] = phase_type
+        phases.append((name, phase_type, position, json.dumps(details, ensure_ascii=False) if details else None))
+
+    # ------------------------------------------------------------------
+    # Séries (clé locale au fichier, sources vers d'autres séries du fichier)
+    # ------------------------------------------------------------------
+    series = []
+    series_phase: Dict[str, str] = {}
+    series_teams: Dict[str, tuple] = {}
+
+    for index, item in enumerate(sections["series"], start=1):
+        label = _("Série #%(n)s", n=index)
+        if not isinstance(item, dict):
+            errors.append(_("%(where)s : objet attendu.", where=label))
+            continue
+
+        key = _clean(item.get("key")) or f"#{index}"
+        if key in series_phase:
+            errors.append(_("%(where)s : clé « %(key)s » présente plusieurs fois.", where=label, key=key))
+            continue
+
+        phase = _clean(item.get("phase"))
+        if phase not in phase_types:
+            errors.append(_("%(where)s : phase inconnue « %(name)s ».", where=label, name=phase or ""))
+            continue
+        is_bracket = phase_types[phase] in BRACKET_TYPES
+
+        team1 = resolve_team(item.get("team1"), label)
+        team2 = resolve_team(item.get("team2"), label)
+        for team in (team1, team2):
+            if team and not is_registered(team):
+                errors.append(_("%(where)s : « %(name)s » n'est pas inscrite au tournoi.", where=label, name=team))
+        if team1 and team1 == team2:
+            errors.append(_("%(where)s : les deux équipes doivent être différentes.", where=label))
+
+        # Équipe ET source possibles : bracket déjà avancé (export)
+        sources = []
+        for slot in ("source_team1", "source_team2"):
+            source = item.get(slot)
+            if not source:
+                sources.append((None, None))
+                continue
+            if not is_bracket:
+                errors.append(_("%(where)s : sources réservées aux phases bracket.", where=label))
+            elif not isinstance(source, dict) or not _clean(source.get("series")):
+                errors.append(_("%(where)s : %(slot)s doit indiquer une série.", where=label, slot=slot))
+            elif source.get("type") not in SOURCE_TYPES:
+                errors.append(_("%(where)s : le type de source doit être winner ou loser.", where=label))
+            else:
+                sources.append((_clean(source["series"]), source["type"]))
+                continue
+            sources.append((None, None))
+
+        if not is_bracket and not (team1 and team2):
+            errors.append(_("%(where)s : les deux équipes sont obligatoires hors bracket.", where=label))
+
+        series_phase[key] = phase
+        series_teams[key] = (team1, team2)
+        series.append({
+            "key": key,
+            "label": label,
+            "phase": phase,
+            "team1": team1,
+            "team2": team2,
+            "stage": _clean(item.get("stage")) or "",
+            "best_of": _to_int(item.get("best_of"), label, errors, minimum=1) or 1,
+            "round": _to_int(item.get("round"), label, errors) if is_bracket else None,
+            "bracket_position": _clean(item.get("bracket_position")),
+            "sources": sources,
+        })
+
+    for s in series:
+        for source_key, _type in s["sources"]:
+            if source_key is None:
+                continue
+            if source_key not in series_phase:
+                errors.append(_("%(where)s : série source inconnue « %(key)s ».", where=s["label"], key=source_key))
+            elif series_phase[source_key] != s["phase"]:
+                errors.append(_("%(where)s : la série source doit être dans la même phase.", where=s["label"]))
+
+    # ------------------------------------------------------------------
+    # Matchs planifiés (d'une série du fichier, ou tie-break multi-équipes)
+    # ------------------------------------------------------------------
+    if sections["matches"] and tournament["status"] == "finished":
+        errors.append(_("Matchs : tournoi terminé, création impossible."))
+
+    matches = []
+    for index, item in enumerate(sections["matches"], start=1):
+        label = _("Match #%(n)s", n=index)
+        if not isinstance(item, dict):
+            errors.append(_("%(where)s : objet attendu.", where=label))
+            continue
+
+        series_key = _clean(item.get("series"))
+        if series_key:
+            if series_key not in series_teams:
+                errors.append(_("%(where)s : série inconnue « %(key)s ».", where=label, key=series_key))
+                continue
+            teams = [t for t in series_teams[series_key] if t]
+        else:
+            raw_teams = item.get("teams") if isinstance(item.get("teams"), list) else []
+            teams = [resolve_team(t, label) for t in raw_teams]
+            if len(raw_teams) < 2 or None in teams or len(set(teams)) != len(teams):
+                errors.append(_("%(where)s : une série ou au moins 2 équipes distinctes attendues.", where=label))
+                continue
+            for team in teams:
+                if not is_registered(team):
+                    errors.append(_("%(where)s : « %(name)s » n'est pas inscrite au tournoi.", where=label, name=team))
+
+        matches.append({
+            "series": series_key,
+            "teams": teams,
+            "match_index": _to_int(item.get("match_index"), label, errors, minimum=1),
+            "scheduled_at": _clean(item.get("scheduled_at")),
+            "racetime_room": _clean(item.get("racetime_room")),
+        })
+
+    if errors:
+        raise TournamentImportError(errors)
+
+    return {
+        "counts": {
+            "players": len(new_players),
+            "teams": len(new_teams),
+            "registrations": len(registrations),
+            "phases": len(phases),
+            "series": len(series),
+            "matches": len(matches),
+        },
+        "player_ids": player_ids,
+        "new_players": new_players,
+        "racetime_updates": racetime_updates,
+        "team_ids": team_ids,
+        "new_teams": new_teams,
+        "registrations": registrations,
+        "phase_ids": {name: row["id"] for name, row in db_phases.items()},
+        "phases": phases,
+        "series": series,
+        "matches": matches,
+    }
+
+
+# ======================================================================
+# Écriture
+# ======================================================================
+
+def _insert_many(db, table: str, columns: tuple, rows: list) -> List[int]:
+    """
+    executemany + ids créés, dans l'ordre des lignes : la transaction
+    tient le verrou d'écriture, les derniers ids de la table sont
+    les nôtres (AUTOINCREMENT : ids croissants).
+    """
+    placeholders = ", ".join("?" for _c in columns)
+    db.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        rows
+    )
+    ids = db.execute(
+        f"SELECT id FROM {table} ORDER BY id DESC LIMIT ?",
+        (len(rows),)
+    ).fetchall()
+    return [row[0] for row in reversed(ids)]
+
+
+def apply_import(tournament_id: int, plan: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Écrit le plan de validate_import (sans commit : écriture de
+    run_write). Retourne le nombre d'objets créés.
+    """
+    db = get_db()
+
+    player_ids = dict(plan["player_ids"])
+    team_ids = dict(plan["team_ids"])
+    phase_ids = dict(plan["phase_ids"])
+
+    # Joueurs (+ équipe solo de chacun, via trigger)
+    if plan["new_players"]:
+        ids = _insert_many(db, "players", ("name", "racetime_user"), plan["new_players"])
+        names = {}
+        for (name, _rt), player_id in zip(plan["new_players"], ids):
+            player_ids[name] = player_id
+            names[player_id] = name
+
+        for row in db.execute(
+            "SELECT player_id, team_id FROM team_players WHERE player_id BETWEEN ? AND ?",
+            (ids[0], ids[-1])
+        ).fetchall():
+            team_ids[SOLO_PREFIX + names[row["player_id"]]] = row["team_id"]
+
+    if plan["racetime_updates"]:
+        db.executemany(
+            "UPDATE players SET racetime_user = ? WHERE id = ?",
+            plan["racetime_updates"]
+        )
+
+    if plan["new_teams"]:
+        ids = _insert_many(db, "teams", ("name",), [(name,) for name, _r in plan["new_teams"]])
+        members = []
+        for (name, roster), team_id in zip(plan["new_teams"], ids):
+            team_ids[name] = team_id
+            members.extend(
+                (team_id, player_ids[player], position)
+                for position, player in enumerate(roster, start=1)
+            )
+        db.executemany(
+            "INSERT INTO team_players (team_id, player_id, position) VALUES (?, ?, ?)",
+            members
+        )
+
+    if plan["registrations"]:
+        db.executemany(
+            """
+            INSERT INTO tournament_teams (tournament_id, team_id, seed, group_name, position)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (tournament_id, team_ids[team], seed, group_name, position)
+                for team, seed, group_name, position in plan["registrations"]
+            ]
+        )
+
+    if plan["phases"]:
+        ids = _insert_many(
+            db, "tournament_phases",
+            ("tournament_id", "name", "type", "position", "details"),
+            [(tournament_id, *phase) for phase in plan["phases"]]
+        )
+        for phase, phase_id in zip(plan["phases"], ids):
+            phase_ids[phase[0]] = phase_id
+
+    # Séries, puis sources (ids connus seulement après insertion)
+    series_ids = {}
+    if plan["series"]:
+        ids = _insert_many(
+            db, "series",
+            ("tournament_id", "phase_id", "team1_id", "team2_id", "stage", "best_of", "round", "bracket_position"),
+            [
+                (
+                    tournament_id,
+                    phase_ids[s["phase"]],
+                    team_ids.get(s["team1"]),
+                    team_ids.get(s["team2"]),
+                    s["stage"],
+                    s["best_of"],
+                    s["round"],
+                    s["bracket_position"],
+                )
+                for s in plan["series"]
+            ]
+        )
+        series_ids = {s["key"]: series_id for s, series_id in zip(plan["series"], ids)}
+
+        sources = [
+            (
+                series_ids.get(s["sources"][0][0]), s["sources"][0][1],
+                series_ids.get(s["sources"][1][0]), s["sources"][1][1],
+                series_ids[s["key"]],
+            )
+            for s in plan["series"]
+            if s["sources"][0][0] or s["sources"][1][0]
+        ]
+        if sources:
+            db.executemany(
+                """
+                UPDATE series
+                SET source_team1_series_id = ?, source_team1_type = ?,
+                    source_team2_series_id = ?, source_team2_type = ?
+                WHERE id = ?
+                """,
+                sources
+            )
+
+    if plan["matches"]:
+        ids = _insert_many(
+            db, "matches",
+            ("tournament_id", "series_id", "match_index", "scheduled_at", "racetime_room"),
+            [
+                (tournament_id, series_ids.get(m["series"]), m["match_index"], m["scheduled_at"], m["racetime_room"])
+                for m in plan["matches"]
+            ]
+        )
+        db.executemany(
+            "INSERT INTO match_teams (match_id, team_id) VALUES (?, ?)",
+            [
+                (match_id, team_ids[team])
+                for m, match_id in zip(plan["matches"], ids)
+                for team in m["teams"]
+            ]
+        )
+
+        for series_id in {series_ids[m["series"]] for m in plan["matches"] if m["series"]}:
+            refresh_series_counters(series_id)
+
+    if plan["registrations"] or plan["phases"] or plan["series"]:
+        refresh_tournament_standings(tournament_id)
+
+    return plan["counts"]
+
+
+def run_import(tournament_id: int, plan: Dict[str, Any]) -> Dict[str, int]:
+    """
+    apply_import dans une transaction (run_write), dans la requête.
+
+    Le plan est validé avant la transaction : un joueur, une équipe ou
+    une inscription créés entre-temps violent une contrainte. Rien
+    n'est écrit et l'erreur est relevée en TournamentImportError.
+    """
+    from app.db_writer import run_write
+
+    try:
+        return run_write(apply_import, tournament_id, plan)
+    except sqlite3.IntegrityError as e:
+        # Mode direct : annule les insertions déjà faites
+        get_db().rollback()
+        raise TournamentImportError([
+            _("Le tournoi a été modifié pendant l'import (%(error)s) : rien n'a été écrit, réessayez.", error=str(e))
+        ])
+
+
+# ======================================================================
+# Export
+# ======================================================================
+
+def export_tournament(tournament_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Mise en place du tournoi au format d'import (None si introuvable).
+    Clé d'une série = son id.
+    """
+    db = get_db()
+
+    tournament = db.execute(
+        "SELECT id, name, slug, status FROM tournaments WHERE id = ?",
+        (tournament_id,)
+    ).fetchone()
+    if not tournament:
+        return None
+
+    registrations = db.execute(
+        """
+        SELECT tt.team_id, t.name, tt.seed, tt.group_name, tt.position
+        FROM tournament_teams tt
+        JOIN teams t ON t.id = tt.team_id
+        WHERE tt.tournament_id = ?
+        ORDER BY tt.seed IS NULL, tt.seed, t.name
+        """,
+        (tournament_id,)
+    ).fetchall()
+
+    rosters: Dict[int, list] = {}
+    players: Dict[str, dict] = {}
+    for row in db.execute(
+        """
+        SELECT tp.team_id, p.name, p.racetime_user
+        FROM tournament_teams tt
+        JOIN team_players tp ON tp.team_id = tt.team_id
+        JOIN players p ON p.id = tp.player_id
+        WHERE tt.tournament_id = ?
+        ORDER BY tp.team_id, tp.position IS NULL, tp.position, p.id
+        """,
+        (tournament_id,)
+    ).fetchall():
+        rosters.setdefault(row["team_id"], []).append(row["name"])
+        players.setdefault(row["name"], {"name": row["name"], "racetime_user": row["racetime_user"]})
+
+    # Équipes solo : recréées par l'import des joueurs
+    teams = []
+    for row in registrations:
+        roster = rosters.get(row["team_id"], [])
+        if len(roster) == 1 and row["name"] == SOLO_PREFIX + roster[0]:
+            continue
+        teams.append({"name": row["name"], "players": roster})
+
+    phases = []
+    for row in db.execute(
+        """
+        SELECT name, type, position, details
+        FROM tournament_phases
+        WHERE tournament_id = ?
+        ORDER BY position, id
+        """,
+        (tournament_id,)
+    ).fetchall():
+        try:
+            details = json.loads(row["details"]) if row["details"] else None
+        except ValueError:
+            details = None
+        phases.append({"name": row["name"], "type": row["type"], "position": row["position"], "details": details})
+
+    series_rows = db.execute(
+        """
+        SELECT s.*, p.name AS phase_name, t1.name AS team1_name, t2.name AS team2_name
+        FROM series s
+        LEFT JOIN tournament_phases p ON p.id = s.phase_id
+        LEFT JOIN teams t1 ON t1.id = s.team1_id
+        LEFT JOIN teams t2 ON t2.id = s.team2_id
+        WHERE s.tournament_id = ?
+        ORDER BY s.id
+        """,
+        (tournament_id,)
+    ).fetchall()
+    series_keys = {row["id"] for row in series_rows}
+
+    def source(series_id, source_type):
+        if series_id not in series_keys:
+            return None
+        return {"series": str(series_id), "type": source_type}
+
+    series = [
+        {
+            "key": str(row["id"]),
+            "phase": row["phase_name"],
+            "team1": row["team1_name"],
+            "team2": row["team2_name"],
+            "stage": row["stage"],
+            "best_of": row["best_of"],
+            "round": row["round"],
+            "bracket_position": row["bracket_position"],
+            "source_team1": source(row["source_team1_series_id"], row["source_team1_type"]),
+            "source_team2": source(row["source_team2_series_id"], row["source_team2_type"]),
+        }
+        for row in series_rows
+    ]
+
+    # Équipes des matchs hors série (tie-breaks)
+    match_teams: Dict[int, list] = {}
+    for row in db.execute(
+        """
+        SELECT mt.match_id, t.name
+        FROM matches m
+        JOIN match_teams mt ON mt.match_id = m.id
+        JOIN teams t ON t.id = mt.team_id
+        WHERE m.tournament_id = ? AND m.series_id IS NULL
+        ORDER BY mt.match_id, t.name
+        """,
+        (tournament_id,)
+    ).fetchall():
+        match_teams.setdefault(row["match_id"], []).append(row["name"])
+
+    matches = []
+    for row in db.execute(
+        """
+        SELECT id, series_id, match_index, scheduled_at, racetime_room
+        FROM matches
+        WHERE tournament_id = ?
+        ORDER BY id
+        """,
+        (tournament_id,)
+    ).fetchall():
+        match = {
+            "match_index": row["match_index"],
+            "scheduled_at": row["scheduled_at"],
+            "racetime_room": row["racetime_room"],
+        }
+        if row["series_id"] in series_keys:
+            match["series"] = str(row["series_id"])
+        else:
+            match["teams"] = match_teams.get(row["id"], [])
+        matches.append(match)
+
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "tournament": {"name": tournament["name"], "slug": tournament["slug"], "status": tournament["status"]},
+        "players": list(players.values()),
+        "teams": teams,
+        "registrations": [
+            {"team": row["name"], "seed": row["seed"], "group": row["group_name"], "position": row["position"]}
+            for row in registrations
+        ],
+        "phases": phases,
+        "series": series,
+        "matches": matches,
+    }
+
+
+def export_roster_csv(data: Dict[str, Any]) -> str:
+    """
+    Export (export_tournament) -> CSV roster : une ligne par joueur
+    inscrit, équipe vide pour une équipe solo.
+    """
+    racetime = {p["name"]: p["racetime_user"] for p in data["players"]}
+    rosters = {t["name"]: t["players"] for t in data["teams"]}
+
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(ROSTER_COLUMNS)
+
+    for reg in data["registrations"]:
+        team = reg["team"]
+        if team in rosters:
+            members = [(team, player) for player in rosters[team]]
+        elif team.startswith(SOLO_PREFIX):
+            members = [("", team[len(SOLO_PREFIX):])]
+        else:
+            continue
+
+        for team_name, player in members:
+            writer.writerow((
+                team_name,
+                player,
+                racetime.get(player) or "",
+                "" if reg["seed"] is None else reg["seed"],
+                reg["group"] or "",
+                "" if reg["position"] is None else reg["position"],
+            ))
+
+    return out.getvalue()
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+
+def register_tournament_io_commands(app):
+    """
+    flask export-tournament ID [--format json|csv] [--output FICHIER]
+    flask import-tournament ID FICHIER [--dry-run]
+    """
+    import click
+
+    @app.cli.command("export-tournament")
+    @click.argument("tournament_id", type=int)
+    @click.option("--format", "fmt", type=click.Choice(["json", "csv"]), default="json")
+    @click.option("--output", "-o", type=click.Path(dir_okay=False), default=None)
+    def export_tournament_command(tournament_id, fmt, output):
+        data = export_tournament(tournament_id)
+        if data is None:
+            raise click.ClickException(f"Tournoi {tournament_id} introuvable")
+
+        if fmt == "csv":
+            body = export_roster_csv(data)
+        else:
+            body = json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+
+        if output:
+            with open(output, "w", encoding="utf-8", newline="") as f:
+                f.write(body)
+            click.echo(f"Export écrit : {output}")
+        else:
+            click.echo(body, nl=False)
+
+    @app.cli.command("import-tournament")
+    @click.argument("tournament_id", type=int)
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--dry-run", is_flag=True, help="Validation seule, aucune écriture.")
+    def import_tournament_command(tournament_id, path, dry_run):
+        with open(path, "rb") as f:
+            content = f.read()
+
+        try:
+            plan = validate_import(tournament_id, parse_import_file(content, path))
+            counts = plan["counts"] if dry_run else run_import(tournament_id, plan)
+        except TournamentImportError as e:
+            raise click.ClickException("\n".join(e.errors))
+
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        click.echo(f"{'Fichier valide (rien écrit)' if dry_run else 'Import terminé'} : {summary}")
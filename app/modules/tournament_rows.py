@@ -0,0 +1,166 @@
+"""
+Types de ligne des pages publiques d'un tournoi (fiche, résultats,
+progression).
+
+Responsabilités :
+- un type par requête de app/main/routes.py (voir app/rows.py) :
+  les champs portent le nom des colonnes / alias SQL
+- les objets d'affichage construits à partir de ces lignes
+  (groupes, séries du bracket, équipes d'une série, phases)
+
+Les templates y accèdent par attribut, comme avant avec les dict.
+
+NE FAIT PAS :
+- exécuter de requête
+- traduire (display_name est rempli par la route)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.rows import Row
+
+
+# ======================================================================
+# Lignes SQL
+# ======================================================================
+
+@dataclass(slots=True)
+class TournamentRow(Row):
+    id: int
+    name: str
+    slug: str
+    status: str
+    metadata: Optional[str]
+    game_name: Optional[str]
+    created_at: Optional[str] = None
+    display_name: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PhaseRow(Row):
+    id: int
+    name: str
+    position: int
+    type: Optional[str] = None
+    details: Optional[str] = None
+    display_name: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SeriesResultRow(Row):
+    """
+    Série de la page résultats ; teams rempli par la route.
+    """
+    id: int
+    phase_id: int
+    stage: Optional[str]
+    team1_id: Optional[int]
+    team2_id: Optional[int]
+    team1_wins: int
+    team2_wins: int
+    winner_name: Optional[str]
+    teams: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> Optional[str]:
+        # Score BO (compteurs matérialisés sur series)
+        if self.team1_wins or self.team2_wins:
+            return f"{self.team1_wins}-{self.team2_wins}"
+        return None
+
+
+@dataclass(slots=True)
+class TiebreakRow(Row):
+    """
+    Match sans série (tie-break) ; teams rempli par la route.
+    """
+    id: int
+    is_completed: int
+    teams: List[str] = field(default_factory=list)
+    positions: Optional[List[Any]] = None   # prévu plus tard
+
+
+@dataclass(slots=True)
+class StandingRow(Row):
+    team_id: int
+    team: str
+    group_name: str
+    wins: int
+    played: int
+    seed: Optional[int]
+    position: Optional[int]
+
+    @property
+    def losses(self) -> int:
+        return max(0, self.played - self.wins)
+
+
+@dataclass(slots=True)
+class BracketSeriesRow(Row):
+    id: int
+    round: Optional[int]
+    stage: Optional[str]
+    best_of: Optional[int]
+    team1_id: Optional[int]
+    team2_id: Optional[int]
+    team1_name: Optional[str]
+    team2_name: Optional[str]
+    source_team1_series_id: Optional[int]
+    source_team1_type: Optional[str]
+    source_team2_series_id: Optional[int]
+    source_team2_type: Optional[str]
+    team1_wins: Optional[int]
+    team2_wins: Optional[int]
+
+
+# ======================================================================
+# Objets d'affichage
+# ======================================================================
+
+@dataclass(slots=True)
+class GroupView:
+    id: int
+    name: str
+    standings: List[StandingRow]
+
+
+@dataclass(slots=True)
+class BracketTeam:
+    """
+    Un côté d'une série du bracket (modifiable : injection des byes).
+    """
+    id: Optional[int]
+    name: Optional[str]
+    wins: int
+    source_series_id: Optional[str] = None
+    source_type: Optional[str] = None
+    source_label: Optional[str] = None
+    is_tbd: bool = False   # True si pas de nom réel
+
+
+@dataclass(slots=True)
+class BracketSeries:
+    id: str
+    round: Optional[int]
+    stage: Optional[str]   # on garde l’original
+    label: Optional[str]
+    team1: BracketTeam
+    team2: BracketTeam
+    best_of: Optional[int]
+    # marqueurs utiles pour le template (ne casse rien si ignoré)
+    is_virtual: bool = False
+    is_bye: bool = False
+    winner_team_id: Optional[int] = None
+
+
+@dataclass(slots=True)
+class PhaseView:
+    """
+    Phase de la page progression ; data dépend de display_type
+    (groups : groups / qualifiers_per_group, bracket : bracket).
+    """
+    id: int
+    name: str
+    display_type: str
+    data: Dict[str, Any]
@@ -0,0 +1,254 @@
+"""
+Sprite atlas des trackers.
+
+Responsabilités :
+- lister les sprites utilisés par un catalog (items, niveaux, composites)
+- les packer dans UNE image (Pillow) + manifest de coordonnées
+- régénérer l’atlas quand le catalog ou les PNG sources changent
+
+Sortie (dans le dossier static du tracker) :
+    <asset_dir>/_atlas/atlas.png
+    <asset_dir>/_atlas/atlas.json
+
+Le manifest est attaché au catalog (catalog["atlas"]) : le macro Jinja et
+le JS découpent l’atlas via le viewBox d’un <svg>. Sans atlas (Pillow
+absent, PNG manquant) on retombe sur les PNG individuels.
+
+NE FAIT PAS :
+- définir les catalogs (voir games/<jeu>/catalog.py)
+- servir les fichiers (static Flask)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from flask import current_app
+
+from app.modules.tracker.registry import get_available_trackers, get_tracker_definition
+
+try:
+    from PIL import Image
+except ImportError:  # atlas désactivé, PNG individuels
+    Image = None
+
+
+ATLAS_DIRNAME = "_atlas"
+ATLAS_IMAGE = "atlas.png"
+ATLAS_MANIFEST = "atlas.json"
+ATLAS_FORMAT_VERSION = 1
+
+# Espace transparent entre sprites (évite les bavures au redimensionnement)
+ATLAS_PADDING = 2
+ATLAS_MAX_WIDTH = 1024
+
+# asset_dir -> manifest (vérifié une fois par process)
+_ATLAS_CACHE: Dict[str, Dict[str, Any]] = {}
+
+
+# ======================================================================
+# Sprites d’un catalog
+# ======================================================================
+
+def catalog_sprites(catalog: Dict[str, Any]) -> List[str]:
+    """
+    Noms de fichiers PNG utilisés par le rendu d’un catalog.
+    """
+    sprites = set()
+
+    for item in catalog.get("items", []):
+        if item.get("kind") == "composite":
+            sprites.add(item["base_asset"])
+            sprites.update(item.get("overlays", {}).values())
+            continue
+
+        base = item.get("asset_base")
+        if not base:
+            continue
+
+        levels = item.get("level_values") or [0, 1]
+        if item.get("kind") == "counter":
+            levels = [0, 1]  # icône éteinte / allumée
+
+        sprites.update(f"{base}{level}.png" for level in levels)
+
+    return sorted(sprites)
+
+
+# ======================================================================
+# Build
+# ======================================================================
+
+def _atlas_dir(asset_dir: str) -> Path:
+    return Path(current_app.static_folder) / asset_dir / ATLAS_DIRNAME
+
+
+def _signature(source_dir: Path, sprites: List[str]) -> str:
+    """
+    Empreinte des sources : liste des sprites + taille/mtime de chaque PNG.
+    Change dès que le catalog référence d’autres fichiers ou qu’un PNG bouge.
+    """
+    parts = []
+    for name in sprites:
+        st = (source_dir / name).stat()
+        parts.append([name, st.st_size, st.st_mtime_ns])
+
+    payload = json.dumps([ATLAS_FORMAT_VERSION, ATLAS_PADDING, parts])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _pack(sizes: Dict[str, Tuple[int, int]]) -> Tuple[Dict[str, Tuple[int, int]], int, int]:
+    """
+    Packing en étagères : sprites triés par hauteur, rangés de gauche à
+    droite, nouvelle étagère quand la largeur max est atteinte.
+    """
+    pad = ATLAS_PADDING
+    max_width = max(ATLAS_MAX_WIDTH, max(w for w, _ in sizes.values()) + 2 * pad)
+
+    positions: Dict[str, Tuple[int, int]] = {}
+    x, y, shelf_h, width = pad, pad, 0, 0
+
+    for name, (w, h) in sorted(sizes.items(), key=lambda kv: (-kv[1][1], kv[0])):
+        if x + w + pad > max_width:
+            x, y = pad, y + shelf_h + pad
+            shelf_h = 0
+
+        positions[name] = (x, y)
+        x += w + pad
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+
+    return positions, width, y + shelf_h + pad
+
+
+def build_atlas(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    (Re)construit l’atlas d’un catalog et retourne son manifest.
+
+    Écritures atomiques (tmp + replace) : deux workers qui construisent en
+    même temps produisent le même résultat, sans fichier à moitié écrit.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required to build tracker atlases")
+
+    asset_dir = catalog["asset_dir"]
+    source_dir = Path(current_app.static_folder) / asset_dir
+    sprites = catalog_sprites(catalog)
+
+    images = {}
+    for name in sprites:
+        with Image.open(source_dir / name) as img:
+            images[name] = img.convert("RGBA")
+
+    positions, width, height = _pack({n: im.size for n, im in images.items()})
+
+    atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for name, img in images.items():
+        atlas.paste(img, positions[name])
+
+    out_dir = _atlas_dir(asset_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    image_path = out_dir / ATLAS_IMAGE
+    tmp_image = image_path.with_suffix(f".{os.getpid()}.tmp")
+    atlas.save(tmp_image, format="PNG", optimize=True)
+    content_hash = hashlib.sha1(tmp_image.read_bytes()).hexdigest()[:12]
+    tmp_image.replace(image_path)
+
+    manifest = {
+        "format": ATLAS_FORMAT_VERSION,
+        "tracker_type": catalog.get("tracker_type"),
+        "image": f"{asset_dir}/{ATLAS_DIRNAME}/{ATLAS_IMAGE}",
+        "hash": content_hash,
+        "signature": _signature(source_dir, sprites),
+        "width": width,
+        "height": height,
+        "sprites": {
+            name: {
+                "x": positions[name][0],
+                "y": positions[name][1],
+                "w": images[name].width,
+                "h": images[name].height,
+            }
+            for name in sprites
+        },
+    }
+
+    manifest_path = out_dir / ATLAS_MANIFEST
+    tmp_manifest = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp_manifest.replace(manifest_path)
+
+    return manifest
+
+
+def _read_manifest(asset_dir: str) -> Optional[Dict[str, Any]]:
+    path = _atlas_dir(asset_dir) / ATLAS_MANIFEST
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ======================================================================
+# API PUBLIQUE
+# ======================================================================
+
+def ensure_atlas(catalog: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Manifest de l’atlas à jour pour ce catalog (reconstruit si besoin).
+
+    Vérifié une fois par process : catalog et assets ne changent qu’au
+    déploiement. Retourne None si l’atlas ne peut pas être produit.
+    """
+    asset_dir = catalog.get("asset_dir")
+    if not asset_dir:
+        return None
+
+    if asset_dir in _ATLAS_CACHE:
+        return _ATLAS_CACHE[asset_dir]
+
+    manifest = None
+    try:
+        source_dir = Path(current_app.static_folder) / asset_dir
+        signature = _signature(source_dir, catalog_sprites(catalog))
+
+        manifest = _read_manifest(asset_dir)
+        if manifest is None or manifest.get("signature") != signature:
+            manifest = build_atlas(catalog)
+    except Exception:
+        current_app.logger.exception("Tracker atlas unavailable (asset_dir=%s)", asset_dir)
+        manifest = None
+
+    _ATLAS_CACHE[asset_dir] = manifest
+    return manifest
+
+
+def catalog_with_atlas(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Catalog + manifest d’atlas (catalog["atlas"], None si indisponible),
+    pour les templates et window.TRACKER_CATALOG.
+    """
+    catalog["atlas"] = ensure_atlas(catalog)
+    return catalog
+
+
+def register_atlas_commands(app):
+    """
+    flask build-tracker-atlas : reconstruit l’atlas de chaque tracker
+    (étape de build / déploiement ; sinon fait au premier usage).
+    """
+    import click
+
+    @app.cli.command("build-tracker-atlas")
+    def build_tracker_atlas_command():
+        for tracker in get_available_trackers():
+            catalog = get_tracker_definition(tracker["key"])["catalog"]()
+            manifest = build_atlas(catalog)
+            click.echo(
+                f"{tracker['key']}: {len(manifest['sprites'])} sprites -> "
+                f"{manifest['image']} ({manifest['width']}x{manifest['height']})"
+            )
@@ -2,9 +2,18 @@
 Base tracker utilities (GENERIC).
 
 Responsabilités :
-- lecture / écriture des sessions tracker
+- lecture / écriture des sessions tracker (SQLite WAL, une ligne par restream)
 - construction d’une session runtime à partir d’un preset
 - initialisation d’une session si elle n’existe pas encore
+- écritures concurrentes optimistes (version + compare-and-swap)
+- écriture différée (write-behind) : état en mémoire diffusé tout de
+  suite, persistance regroupée au plus une fois par intervalle
+
+Write-behind (opt-in : TRACKER_PERSIST_INTERVAL > 0, défaut 0) :
+- la session en mémoire du process fait foi, la base est rattrapée
+  par un timer ; flush forcé sur reset / preset / désactivation
+- suppose UN process worker (gunicorn + gevent) : avec plusieurs
+  workers, laisser l’intervalle à 0 (écriture directe + CAS)
 
 NE FAIT PAS :
 - définir des presets
@@ -12,41 +21,108 @@ NE FAIT PAS :
 - connaître le frontend
 """
 
+import atexit
+import copy
 import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List
 from flask import current_app
 
 
+# Nombre de tentatives read → merge → compare-and-swap avant abandon
+CAS_MAX_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+
 # ======================================================================
-# Paths & IO
+# Stockage (SQLite)
 # ======================================================================
 
-def _sessions_dir() -> Path:
-    return (
-        Path(current_app.instance_path)
-        / "trackers"
-        / "sessions"
-    )
+# Base dédiée : les écritures tracker (très fréquentes pendant un live)
+# ne prennent jamais le verrou d’écriture de la base principale.
+SESSIONS_DB_FILENAME = "sessions.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracker_sessions (
+    restream_id   INTEGER PRIMARY KEY,
+    tracker_type  TEXT NOT NULL,
+    version       INTEGER NOT NULL DEFAULT 0,
+    data          TEXT NOT NULL,
+    updated_at    TEXT NOT NULL DEFAULT (datetime('now'))
+)
+"""
+
+# Chemins dont le schéma a déjà été créé dans ce process
+_schema_ready = set()
+
+
+def _trackers_dir() -> Path:
+    return Path(current_app.instance_path) / "trackers"
+
+
+def _legacy_session_path_restream(restream_id: int) -> Path:
+    # Ancien stockage : un JSON par restream (importé au premier accès)
+    return _trackers_dir() / "sessions" / f"restream_{restream_id}.json"
 
 
-def _session_path_restream(restream_id: int) -> Path:
-    return _sessions_dir() / f"restream_{restream_id}.json"
+def _sessions_db_path() -> Path:
+    return _trackers_dir() / SESSIONS_DB_FILENAME
 
 
-def _read_json(path: Path) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def _connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    # path explicite : flush hors contexte d’application (timer, atexit)
+    path = path or _sessions_db_path()
 
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA synchronous = NORMAL")
 
-def _write_json_atomic(path: Path, data: Dict[str, Any]):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix(".tmp")
+    if path not in _schema_ready:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(_SCHEMA)
+        _schema_ready.add(path)
 
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    return conn
+
+
+def _dumps(session: Dict[str, Any]) -> str:
+    return json.dumps(session, ensure_ascii=False, separators=(",", ":"))
+
+
+def _import_legacy_session(conn: sqlite3.Connection, restream_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Migration douce : une session JSON existante est copiée en base puis
+    supprimée (sinon elle réapparaîtrait après un delete).
+    """
+    path = _legacy_session_path_restream(restream_id)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except Exception:
+        current_app.logger.warning(
+            "Tracker session JSON invalide (restream_id=%s) -> ignorée",
+            restream_id,
+        )
+        return None
 
-    tmp_path.replace(path)
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO tracker_sessions (restream_id, tracker_type, version, data)
+        VALUES (?, ?, ?, ?)
+        """,
+        (restream_id, session.get("tracker_type", ""), int(session.get("version", 0)), _dumps(session)),
+    )
+    path.unlink()
+    return session
 
 
 # ======================================================================
@@ -88,6 +164,9 @@ def build_session_from_preset(
 ) -> Dict[str, Any]:
     """
     Construit une session runtime complète à partir d’un preset.
+    "generation" identifie cette session : une session reconstruite
+    (absente, type changé) en a une nouvelle, les clients déjà ouverts
+    reprennent alors ses versions depuis le début.
     """
     participants = []
 
@@ -98,40 +177,500 @@ def build_session_from_preset(
         "tracker_type": tracker_type,
         "restream_id": restream_id,
         "restream_slug": restream_slug,
+        "generation": secrets.token_hex(8),
         "participants": participants,
     }
 
 
 # ======================================================================
-# Public API
+# Lecture en base
 # ======================================================================
 
-def load_session_restream(restream_id: int) -> Optional[Dict[str, Any]]:
-    """
-    Charge une session existante si elle existe.
-    """
-    path = _session_path_restream(restream_id)
+def _load_session_db(restream_id: int) -> Optional[Dict[str, Any]]:
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT data, version FROM tracker_sessions WHERE restream_id = ?",
+            (restream_id,),
+        ).fetchone()
 
-    if not path.exists():
-        return None
+        if row is None:
+            return _import_legacy_session(conn, restream_id)
+    finally:
+        conn.close()
 
     try:
-        return _read_json(path)
-    except Exception:
-        # Optionnel: log pour debug
+        session = json.loads(row[0])
+    except ValueError:
         current_app.logger.warning(
             "Tracker session JSON invalide (restream_id=%s) -> reset",
             restream_id,
         )
         return None
 
+    session["version"] = row[1]
+    return session
+
+
+# ======================================================================
+# Write-behind : sessions live en mémoire
+# ======================================================================
+
+class _LiveSession:
+    """
+    État courant d’une session dans ce process + état de persistance.
+    """
+
+    __slots__ = ("session", "db_path", "dirty", "persisted_at", "timer")
+
+    def __init__(self, session: Dict[str, Any], db_path: Path):
+        self.session = session
+        self.db_path = db_path
+        self.dirty = False
+        self.persisted_at = time.monotonic()
+        self.timer = None
+
+
+# restream_id -> _LiveSession (vide si le write-behind est désactivé)
+_live: Dict[int, _LiveSession] = {}
+
+# Protège _live ; notify_all() réveille les flux SSE à chaque écriture
+_live_cond = threading.Condition()
+
+
+def _persist_interval() -> float:
+    return float(current_app.config.get("TRACKER_PERSIST_INTERVAL", 0) or 0)
+
+
+def _live_version(restream_id: int) -> Optional[int]:
+    entry = _live.get(restream_id)
+    return int(entry.session.get("version", 0)) if entry else None
+
+
+def _live_entry(restream_id: int) -> _LiveSession:
+    """
+    Entrée mémoire d’une session (chargée depuis la base au premier accès).
+    À appeler sous _live_cond. Lève KeyError si la session n’existe pas.
+    """
+    entry = _live.get(restream_id)
+    if entry is None:
+        session = _load_session_db(restream_id)
+        if session is None:
+            raise KeyError(f"Unknown tracker session: restream_id={restream_id}")
+        entry = _live[restream_id] = _LiveSession(session, _sessions_db_path())
+    return entry
+
+
+def _persist_live(restream_id: int) -> None:
+    """
+    Écrit l’état mémoire d’une session s’il n’est pas encore en base.
+    Sans contexte d’application (appelé par le timer et à l’arrêt).
+    """
+    with _live_cond:
+        entry = _live.get(restream_id)
+        if entry is None or not entry.dirty:
+            return
+
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+
+        session = entry.session
+        params = (restream_id, session.get("tracker_type", ""), int(session.get("version", 0)), _dumps(session))
+        db_path = entry.db_path
+        entry.dirty = False
+        entry.persisted_at = time.monotonic()
+
+    try:
+        conn = _connect(db_path)
+        try:
+            # Deux flushs concurrents : jamais d’écrasement par un état plus ancien
+            conn.execute(
+                """
+                INSERT INTO tracker_sessions (restream_id, tracker_type, version, data)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(restream_id) DO UPDATE SET
+                    tracker_type = excluded.tracker_type,
+                    version = excluded.version,
+                    data = excluded.data,
+                    updated_at = datetime('now')
+                WHERE excluded.version >= tracker_sessions.version
+                """,
+                params,
+            )
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.exception("Tracker session flush failed (restream_id=%s)", restream_id)
+        with _live_cond:
+            if _live.get(restream_id) is entry:
+                entry.dirty = True  # retenté au prochain flush
+
+
+def _schedule_persist(restream_id: int, entry: _LiveSession, interval: float) -> None:
+    # À appeler sous _live_cond : un seul timer par session
+    if entry.timer is not None:
+        return
+
+    delay = max(0.0, interval - (time.monotonic() - entry.persisted_at))
+    entry.timer = threading.Timer(delay, _persist_live, args=(restream_id,))
+    entry.timer.daemon = True
+    entry.timer.start()
+
+
+def _update_live(
+    restream_id: int,
+    mutate: Callable[[Dict[str, Any], int], None],
+    interval: float,
+    flush: bool,
+) -> Dict[str, Any]:
+    with _live_cond:
+        entry = _live_entry(restream_id)
+
+        # mutate peut lever SessionConflict (ou une erreur métier) : l’état mémoire reste intact
+        session = copy.deepcopy(entry.session)
+        new_version = int(session.get("version", 0)) + 1
+
+        mutate(session, new_version)
+        session["version"] = new_version
+
+        entry.session = session
+        entry.dirty = True
+        _live_cond.notify_all()
+
+        persist_now = flush or time.monotonic() - entry.persisted_at >= interval
+        if not persist_now:
+            _schedule_persist(restream_id, entry, interval)
+
+        result = copy.deepcopy(session)
+
+    if persist_now:
+        _persist_live(restream_id)
+
+    return result
+
+
+def flush_session_restream(restream_id: int) -> None:
+    """
+    Force l’écriture en base de l’état mémoire d’une session (no-op si
+    déjà à jour ou write-behind désactivé).
+    """
+    _persist_live(restream_id)
+
+
+@atexit.register
+def flush_all_sessions() -> None:
+    """
+    Écrit toutes les sessions en attente (arrêt du process).
+    """
+    with _live_cond:
+        restream_ids = list(_live)
+
+    for restream_id in restream_ids:
+        _persist_live(restream_id)
+
+
+def wait_session_change(restream_id: int, last_version: Optional[int], timeout: float) -> Optional[int]:
+    """
+    Attend (au plus timeout) une version différente de last_version.
+
+    Session live en mémoire : réveil immédiat à l’écriture.
+    Sinon : simple attente puis lecture de la version en base.
+    """
+    with _live_cond:
+        _live_cond.wait_for(
+            lambda: _live_version(restream_id) not in (None, last_version),
+            timeout,
+        )
+        version = _live_version(restream_id)
+
+    if version is not None:
+        return version
+    return session_version_restream(restream_id)
+
+
+# ======================================================================
+# Public API
+# ======================================================================
+
+def load_session_restream(restream_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Charge une session existante si elle existe.
+    """
+    with _live_cond:
+        entry = _live.get(restream_id)
+        if entry is not None:
+            return copy.deepcopy(entry.session)
+
+    return _load_session_db(restream_id)
+
+
+def session_version_restream(restream_id: int) -> Optional[int]:
+    """
+    Version courante d’une session (None si absente).
+    Lecture d’un entier : sert de notification de changement pour le SSE.
+    """
+    with _live_cond:
+        version = _live_version(restream_id)
+    if version is not None:
+        return version
+
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT version FROM tracker_sessions WHERE restream_id = ?",
+            (restream_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+    return row[0] if row else None
+
+
+def session_updated_at_restream(restream_id: int) -> Optional[str]:
+    """
+    Date UTC ("YYYY-MM-DD HH:MM:SS") de la dernière écriture en base
+    (None si absente). Sert à repérer les sessions inactives.
+    """
+    flush_session_restream(restream_id)
+
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT updated_at FROM tracker_sessions WHERE restream_id = ?",
+            (restream_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+    return row[0] if row else None
+
 
 def save_session_restream(restream_id: int, session: Dict[str, Any]):
     """
-    Sauvegarde une session tracker.
+    Sauvegarde une session tracker (sans contrôle de version).
+    """
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            INSERT INTO tracker_sessions (restream_id, tracker_type, version, data)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(restream_id) DO UPDATE SET
+                tracker_type = excluded.tracker_type,
+                version = excluded.version,
+                data = excluded.data,
+                updated_at = datetime('now')
+            """,
+            (restream_id, session.get("tracker_type", ""), int(session.get("version", 0)), _dumps(session)),
+        )
+    finally:
+        conn.close()
+
+    # Écriture directe : l’état mémoire éventuel est remplacé (et à jour)
+    with _live_cond:
+        entry = _live.get(restream_id)
+        if entry is not None:
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+            entry.session = copy.deepcopy(session)
+            entry.dirty = False
+            entry.persisted_at = time.monotonic()
+            _live_cond.notify_all()
+
+
+def compare_and_swap_session_restream(
+    restream_id: int,
+    session: Dict[str, Any],
+    expected_version: int,
+) -> bool:
+    """
+    Sauvegarde la session uniquement si la version en base vaut
+    encore expected_version (personne n’a écrit entre-temps).
+
+    Retourne False si la session a changé : l’appelant relit et refusionne.
+    """
+    conn = _connect()
+    try:
+        updated = conn.execute(
+            """
+            UPDATE tracker_sessions
+            SET tracker_type = ?, version = ?, data = ?, updated_at = datetime('now')
+            WHERE restream_id = ? AND version = ?
+            """,
+            (
+                session.get("tracker_type", ""),
+                int(session.get("version", 0)),
+                _dumps(session),
+                restream_id,
+                int(expected_version),
+            ),
+        ).rowcount
+
+        if not updated and int(expected_version) == 0:
+            # Première écriture : la ligne n’existe peut-être pas encore
+            updated = conn.execute(
+                """
+                INSERT OR IGNORE INTO tracker_sessions (restream_id, tracker_type, version, data)
+                VALUES (?, ?, ?, ?)
+                """,
+                (restream_id, session.get("tracker_type", ""), int(session.get("version", 0)), _dumps(session)),
+            ).rowcount
+    finally:
+        conn.close()
+
+    return bool(updated)
+
+
+def delete_session_restream(restream_id: int):
+    """
+    Supprime la session d’un restream (ex: changement de type de tracker).
+    """
+    with _live_cond:
+        entry = _live.pop(restream_id, None)
+        if entry is not None and entry.timer is not None:
+            entry.timer.cancel()
+
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM tracker_sessions WHERE restream_id = ?", (restream_id,))
+    finally:
+        conn.close()
+
+    _legacy_session_path_restream(restream_id).unlink(missing_ok=True)
+
+
+# ======================================================================
+# Concurrence optimiste (GENERIC)
+# ======================================================================
+
+class SessionConflict(Exception):
+    """
+    Modification refusée : un champ a été modifié par quelqu’un d’autre
+    depuis la version sur laquelle le client s’est basé.
+    """
+
+    def __init__(self, session: Dict[str, Any], conflicts: List[str]):
+        super().__init__(f"Tracker session conflict: {', '.join(conflicts) or 'retry'}")
+        self.session = session
+        self.conflicts = conflicts
+
+
+def _get_path(obj: Dict[str, Any], path: str):
+    for key in path.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            return None
+        obj = obj[key]
+    return obj
+
+
+def _set_path(obj: Dict[str, Any], path: str, value: Any):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        if not isinstance(obj.get(key), dict):
+            obj[key] = {}
+        obj = obj[key]
+    obj[keys[-1]] = value
+
+
+def field_version(session: Dict[str, Any], slot: int, path: str) -> int:
+    """
+    Version de la dernière écriture d’un champ (ex: "items.bow") d’un slot.
+    Un remplacement complet (preset, reset) compte pour tous les champs.
+    """
+    versions = session.get("field_versions", {}).get(str(slot), {})
+    return max(
+        int(versions.get(path, 0)),
+        int(session.get("replaced_version", 0)),
+    )
+
+
+def apply_participant_changes(
+    session: Dict[str, Any],
+    slot: int,
+    changes: Dict[str, Any],
+    base_version: int,
+    new_version: int,
+) -> None:
+    """
+    Applique des changements champ par champ sur un participant.
+
+    changes : {"items.bow": 2, "dungeons.SV": 1, "tablets.ruby": True, ...}
+
+    Un champ est en conflit s’il a été écrit après base_version ET que
+    sa valeur actuelle diffère de celle demandée. Dans ce cas rien n’est
+    appliqué (SessionConflict). Les champs non touchés par d’autres
+    éditeurs fusionnent sans conflit.
+    """
+    participant = session["participants"][slot - 1]
+
+    conflicts = [
+        path
+        for path, value in changes.items()
+        if field_version(session, slot, path) > base_version
+        and _get_path(participant, path) != value
+    ]
+    if conflicts:
+        raise SessionConflict(session, conflicts)
+
+    versions = session.setdefault("field_versions", {}).setdefault(str(slot), {})
+    for path, value in changes.items():
+        _set_path(participant, path, value)
+        versions[path] = new_version
+
+
+def mark_session_replaced(session: Dict[str, Any], new_version: int) -> None:
+    """
+    Marque un remplacement complet des participants (preset, reset) :
+    tout client basé sur une version antérieure est en conflit.
+    """
+    session["replaced_version"] = new_version
+    session.pop("field_versions", None)
+
+
+def update_session_restream(
+    restream_id: int,
+    mutate: Callable[[Dict[str, Any], int], None],
+    *,
+    flush: bool = False,
+) -> Dict[str, Any]:
+    """
+    Read → mutate → compare-and-swap, avec relecture si la session a
+    changé entre la lecture et l’écriture. Pas de verrou pendant mutate.
+
+    mutate(session, new_version) modifie la session en place et peut lever
+    SessionConflict, ou une erreur métier propagée telle quelle (rien n’est
+    écrit). La version de session est incrémentée ici.
+
+    Write-behind actif : mutate s’applique sur l’état mémoire (sous verrou,
+    pas de CAS), la base est écrite au plus une fois par intervalle.
+    flush=True force l’écriture immédiate (reset, preset).
+
+    Lève KeyError si la session n’existe pas, SessionConflict si les
+    tentatives sont épuisées.
     """
-    path = _session_path_restream(restream_id)
-    _write_json_atomic(path, session)
+    interval = _persist_interval()
+    if interval > 0:
+        return _update_live(restream_id, mutate, interval, flush)
+
+    session = None
+
+    for _ in range(CAS_MAX_ATTEMPTS):
+        session = load_session_restream(restream_id)
+        if session is None:
+            raise KeyError(f"Unknown tracker session: restream_id={restream_id}")
+
+        expected_version = int(session.get("version", 0))
+        new_version = expected_version + 1
+
+        mutate(session, new_version)
+        session["version"] = new_version
+
+        if compare_and_swap_session_restream(restream_id, session, expected_version):
+            return session
+
+    raise SessionConflict(load_session_restream(restream_id) or session, [])
 
 
 def ensure_session_restream(
@@ -175,5 +714,11 @@ def ensure_session_restream(
         restream_slug=restream_slug,
     )
 
+    # Session remplacée : version AU-DESSUS de l’ancienne (comme
+    # reset_indices_session), un client basé dessus est en conflit
+    if existing is not None:
+        session["version"] = int(existing.get("version", 0)) + 1
+        mark_session_replaced(session, session["version"])
+
     save_session_restream(restream_id, session)
     return session
@@ -1,3 +1,28 @@
 """
-Game-specific tracker catalogs.
+Tracker SSR (Skyward Sword Randomizer).
+
+Métadonnées UNIQUEMENT : ce fichier est importé au démarrage par le
+registry. catalog.py / preset.py ne sont chargés qu’au premier usage.
 """
+
+TRACKERS = [
+    {
+        # --- identité ---
+        "tracker_type": "ssr_inventory",
+        "label": "SSR — Inventory",
+
+        # --- backend (import paresseux "module:attribut") ---
+        "catalog": "app.modules.tracker.games.ssr.catalog:get_catalog",
+        "default_preset": "app.modules.tracker.games.ssr.preset:build_default_preset",
+
+        # --- frontend ---
+        "frontend": {
+            # bloc/template principal
+            "template_block": "tracker/ssr_inventory/block.html",
+
+            # assets
+            "css": "css/tracker/tracker_ssr.css",
+            "js": "js/tracker/tracker_ssr.js",
+        },
+    },
+]
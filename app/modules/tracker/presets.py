@@ -1,8 +1,9 @@
 import json
 import os
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import re
 
 
@@ -12,6 +13,20 @@ import re
 
 INSTANCE_PRESETS_DIR = Path("instance/trackers/presets")
 
+# Manifest of each tracker_type, stored NEXT TO its preset directory
+# (<type>.index.json): writing it does not change the directory mtime,
+# which tells whether the manifest is still current.
+INDEX_SUFFIX = ".index.json"
+
+# Former manifest location (inside the preset directory), removed on rescan.
+# The leading underscore guarantees no collision with a preset slug
+# (_slugify never produces a slug starting with "_").
+LEGACY_INDEX_FILENAME = "_index.json"
+
+# A directory mtime more recent than this is not trusted: a change made
+# within the same timestamp tick would leave it unchanged.
+RACY_MTIME_NS = 2_000_000_000
+
 
 def _tracker_presets_dir(tracker_type: str) -> Path:
     """
@@ -49,18 +64,177 @@ def _ensure_unique_slug(tracker_type: str, base_slug: str) -> str:
     """
     Ensure the slug is unique in the tracker preset directory.
     Adds -2, -3, ... suffixes if needed.
+
+    The index only holds valid presets: the file itself is checked too,
+    so that an unparsable preset is never overwritten.
     """
-    presets_dir = _tracker_presets_dir(tracker_type)
+    taken = set(_refresh_index(tracker_type))
     slug = base_slug
     counter = 2
 
-    while _preset_path(tracker_type, slug).exists():
+    while slug in taken or _preset_path(tracker_type, slug).exists():
         slug = f"{base_slug}-{counter}"
         counter += 1
 
     return slug
 
 
+# ---------------------------------------------------------------------------
+# Preset index (manifest)
+# ---------------------------------------------------------------------------
+
+def _index_path(tracker_type: str) -> Path:
+    """
+    Return the path of the preset index for a tracker_type.
+    """
+    return INSTANCE_PRESETS_DIR / f"{tracker_type}{INDEX_SUFFIX}"
+
+
+def _read_manifest(tracker_type: str) -> Tuple[Dict[str, Dict[str, Any]], Optional[int]]:
+    """
+    Read the preset index and the directory mtime it was built against.
+    Returns ({slug: {label, notes, updated_at, mtime_ns}}, dir_mtime_ns),
+    ({}, None) if missing/invalid.
+    """
+    try:
+        with _index_path(tracker_type).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}, None
+
+    if not isinstance(data, dict) or not isinstance(data.get("presets"), dict):
+        return {}, None
+    return data["presets"], data.get("dir_mtime_ns")
+
+
+def _write_index(
+    tracker_type: str,
+    index: Dict[str, Dict[str, Any]],
+    dir_mtime_ns: Optional[int] = None
+) -> None:
+    """
+    Write the preset index atomically.
+    The tmp file is per-process so that two workers never share it.
+
+    dir_mtime_ns: directory mtime read BEFORE the scan that built the
+    index (None = to be revalidated on next read).
+    """
+    path = _index_path(tracker_type)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"presets": index, "dir_mtime_ns": dir_mtime_ns}, f, ensure_ascii=False)
+
+    os.replace(tmp_path, path)
+
+
+def _index_entry(data: Dict[str, Any], slug: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Build the index entry (display metadata only) of a preset.
+    """
+    return {
+        "label": data.get("label", slug),
+        "notes": data.get("notes", ""),
+        "updated_at": data.get("updated_at"),
+        "mtime_ns": mtime_ns,
+    }
+
+
+def _refresh_index(tracker_type: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the preset index, revalidated against the directory.
+
+    The manifest is trusted as long as the directory mtime is the one
+    it was built against (one stat, no per-file stat). Otherwise (file
+    added, removed or replaced, by this module or by hand) the directory
+    is scanned: only files whose mtime differs from the indexed one are
+    parsed again, deleted files are removed from the index.
+
+    A preset edited in place (same inode) does not change the directory
+    mtime: it is picked up at the next scan (next preset saved, or after
+    touching the directory).
+    """
+    presets_dir = _tracker_presets_dir(tracker_type)
+    try:
+        dir_mtime_ns = presets_dir.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    index, indexed_mtime_ns = _read_manifest(tracker_type)
+    if indexed_mtime_ns == dir_mtime_ns:
+        return index
+
+    fresh: Dict[str, Dict[str, Any]] = {}
+
+    with os.scandir(presets_dir) as entries:
+        for entry in entries:
+            if entry.name == LEGACY_INDEX_FILENAME:
+                _remove_legacy_index(entry.path)
+                continue
+            if not entry.name.endswith(".json"):
+                continue
+
+            slug = entry.name[:-len(".json")]
+            try:
+                mtime_ns = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+
+            known = index.get(slug)
+            if known and known.get("mtime_ns") == mtime_ns:
+                fresh[slug] = known
+                continue
+
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                # Invalid preset file: skip silently
+                continue
+
+            fresh[slug] = _index_entry(data, slug, mtime_ns)
+
+    # Directory mtime read before the scan: anything changed since then
+    # triggers another scan (always, while the mtime is racy)
+    racy = time.time_ns() - dir_mtime_ns < RACY_MTIME_NS
+    _write_index(tracker_type, fresh, None if racy else dir_mtime_ns)
+    return fresh
+
+
+def _remove_legacy_index(path: str) -> None:
+    """
+    Remove a manifest left inside the preset directory by older versions.
+    """
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _index_set(tracker_type: str, preset_slug: str, data: Dict[str, Any]) -> None:
+    """
+    Record a preset that was just written by this module.
+
+    The directory mtime stays the previous one: the next listing
+    rescans once, which also picks up a concurrent write of another
+    worker that this read-modify-write may have overwritten.
+    """
+    path = _preset_path(tracker_type, preset_slug)
+    index, dir_mtime_ns = _read_manifest(tracker_type)
+    index[preset_slug] = _index_entry(data, preset_slug, path.stat().st_mtime_ns)
+    _write_index(tracker_type, index, dir_mtime_ns)
+
+
+def _index_remove(tracker_type: str, preset_slug: str) -> None:
+    """
+    Forget a preset that was just removed by this module.
+    """
+    index, dir_mtime_ns = _read_manifest(tracker_type)
+    if index.pop(preset_slug, None) is not None:
+        _write_index(tracker_type, index, dir_mtime_ns)
+
+
 # ---------------------------------------------------------------------------
 # Core API
 # ---------------------------------------------------------------------------
@@ -68,27 +242,17 @@ def _ensure_unique_slug(tracker_type: str, base_slug: str) -> str:
 def list_presets(tracker_type: str) -> List[Dict[str, Any]]:
     """
     List presets for a tracker_type.
-    Returns minimal metadata for display.
+    Returns minimal metadata for display (read from the preset index).
     """
-    presets_dir = _tracker_presets_dir(tracker_type)
-    if not presets_dir.exists():
-        return []
-
-    presets: List[Dict[str, Any]] = []
-    for path in presets_dir.glob("*.json"):
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            presets.append({
-                "slug": path.stem,
-                "label": data.get("label", path.stem),
-                "notes": data.get("notes", ""),
-                "updated_at": data.get("updated_at"),
-            })
-        except Exception:
-            # Invalid preset file: skip silently
-            continue
+    presets: List[Dict[str, Any]] = [
+        {
+            "slug": slug,
+            "label": entry.get("label", slug),
+            "notes": entry.get("notes", ""),
+            "updated_at": entry.get("updated_at"),
+        }
+        for slug, entry in _refresh_index(tracker_type).items()
+    ]
 
     return sorted(presets, key=lambda p: (p.get("label") or "").lower())
 
@@ -145,6 +309,7 @@ def save_preset(tracker_type: str, preset_slug: str, data: Dict[str, Any]) -> No
         json.dump(data, f, ensure_ascii=False, indent=2)
 
     os.replace(tmp_path, path)
+    _index_set(tracker_type, preset_slug, data)
 
 
 def create_preset(
@@ -202,6 +367,8 @@ def rename_preset(tracker_type: str, old_slug: str, new_label: str) -> str:
     os.replace(tmp_path, new_path)
 
     old_path.unlink()
+    _index_remove(tracker_type, old_slug)
+    _index_set(tracker_type, new_slug, data)
     return new_slug
 
 
@@ -214,3 +381,4 @@ def delete_preset(tracker_type: str, preset_slug: str) -> None:
         raise FileNotFoundError(f"Preset not found: {preset_slug}")
 
     path.unlink()
+    _index_remove(tracker_type, preset_slug)
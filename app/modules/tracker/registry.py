@@ -2,9 +2,11 @@
 Tracker registry
 
 Rôle :
-- décrire les trackers disponibles
+- découvrir les trackers disponibles (games/<jeu>/__init__.py → TRACKERS)
 - fournir leur définition complète
 - centraliser catalog + preset par défaut + frontend assets
+- charger catalog / preset d’un jeu uniquement quand il sert
+- compiler les règles de validation des ops depuis le catalog
 
 Le registry NE :
 - crée PAS de session
@@ -12,56 +14,72 @@ Le registry NE :
 - ne connaît PAS les routes
 """
 
-from typing import Dict, Any
+import importlib
+import pkgutil
+from functools import lru_cache
+from typing import Dict, Any, Callable
+
+from app.modules.tracker.validation import TrackerValidator, compile_validator
 
 
 # ======================================================================
-# SSR TRACKER — DÉFINITION SPÉCIFIQUE AU JEU
+# DÉCOUVERTE DES JEUX (PLUGINS)
 # ======================================================================
 
-# 🔁 SPÉCIFIQUE SSR
-from app.modules.tracker.games.ssr.catalog import get_catalog as ssr_get_catalog
-from app.modules.tracker.games.ssr.preset import build_default_preset as ssr_default_preset
-
-
-def _ssr_tracker_definition() -> Dict[str, Any]:
+# ✅ GÉNÉRIQUE (ne dépend d’aucun jeu)
+# Chaque sous-package de games/ déclare ses trackers dans son __init__.py :
+#
+#   TRACKERS = [
+#       {
+#           "tracker_type": "ssr_inventory",
+#           "label": "SSR — Inventory",
+#           "catalog": "app.modules.tracker.games.ssr.catalog:get_catalog",
+#           "default_preset": "app.modules.tracker.games.ssr.preset:build_default_preset",
+#           "frontend": {...},
+#       },
+#   ]
+#
+# Seules ces métadonnées sont lues au démarrage : catalog / preset ne sont
+# importés qu’à la première utilisation du tracker (get_tracker_definition).
+GAMES_PACKAGE = "app.modules.tracker.games"
+
+
+@lru_cache(maxsize=None)
+def _discover_trackers() -> Dict[str, Dict[str, Any]]:
     """
-    Définition complète du tracker SSR.
-    TOUT ce qui est ici est spécifique au tracker SSR.
+    Scan de games/<jeu>/ : tracker_type -> métadonnées (sans import lourd).
     """
-    return {
-        # --- identité ---
-        "tracker_type": "ssr_inventory",
-        "label": "SSR — Inventory",
+    games = importlib.import_module(GAMES_PACKAGE)
+    registry: Dict[str, Dict[str, Any]] = {}
 
-        # --- backend ---
-        "catalog": ssr_get_catalog,
+    for module_info in pkgutil.iter_modules(games.__path__):
+        if not module_info.ispkg:
+            continue
 
-        # preset par défaut (factory, PAS l’état final)
-        "default_preset": ssr_default_preset,
+        package = importlib.import_module(f"{GAMES_PACKAGE}.{module_info.name}")
 
-        # --- frontend ---
-        "frontend": {
-            # bloc/template principal
-            "template_block": "tracker/ssr_inventory/block.html",
-
-            # assets
-            "css": "css/tracker/tracker_ssr.css",
-            "js": "js/tracker/tracker_ssr.js",
-        },
-    }
+        for meta in getattr(package, "TRACKERS", ()):
+            registry[meta["tracker_type"]] = meta
 
+    return registry
 
-# ======================================================================
-# REGISTRY CENTRAL
-# ======================================================================
 
-# ✅ GÉNÉRIQUE (ne dépend d’aucun jeu)
-_TRACKER_REGISTRY: Dict[str, callable] = {
-    "ssr_inventory": _ssr_tracker_definition,
-    # futurs trackers :
-    # "ootr_inventory": _ootr_tracker_definition,
-}
+@lru_cache(maxsize=None)
+def _resolve(ref: str) -> Callable:
+    """
+    "package.module:attribut" -> objet (import au premier appel, puis cache).
+    """
+    module_name, _, attr = ref.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+@lru_cache(maxsize=None)
+def _validator(tracker_type: str) -> TrackerValidator:
+    """
+    Validator des ops, compilé une fois depuis le catalog du tracker.
+    """
+    meta = _discover_trackers()[tracker_type]
+    return compile_validator(_resolve(meta["catalog"])())
 
 
 # ======================================================================
@@ -72,13 +90,34 @@ _TRACKER_REGISTRY: Dict[str, callable] = {
 def get_tracker_definition(tracker_type: str) -> Dict[str, Any]:
     """
     Retourne la définition complète d’un tracker.
+    Le premier appel pour un tracker importe son catalog et son preset.
 
     Lève KeyError si le tracker n’existe pas.
     """
-    if tracker_type not in _TRACKER_REGISTRY:
+    registry = _discover_trackers()
+
+    if tracker_type not in registry:
         raise KeyError(f"Unknown tracker type: {tracker_type}")
 
-    return _TRACKER_REGISTRY[tracker_type]()
+    meta = registry[tracker_type]
+
+    return {
+        # --- identité ---
+        "tracker_type": tracker_type,
+        "label": meta["label"],
+
+        # --- backend ---
+        "catalog": _resolve(meta["catalog"]),
+
+        # preset par défaut (factory, PAS l’état final)
+        "default_preset": _resolve(meta["default_preset"]),
+
+        # validation des ops (compilée au premier chargement du tracker)
+        "validator": _validator(tracker_type),
+
+        # --- frontend ---
+        "frontend": dict(meta["frontend"]),
+    }
 
 
 # ✅ GÉNÉRIQUE
@@ -87,21 +126,16 @@ def is_valid_tracker_type(tracker_type: str) -> bool:
     Validation backend.
     'none' est toujours valide.
     """
-    return tracker_type == "none" or tracker_type in _TRACKER_REGISTRY
+    return tracker_type == "none" or tracker_type in _discover_trackers()
 
 
 # ✅ GÉNÉRIQUE
 def get_available_trackers():
     """
     Liste des trackers disponibles pour les <select> create / edit.
+    Métadonnées uniquement : aucun catalog n’est chargé.
     """
-    trackers = []
-
-    for tracker_type, factory in _TRACKER_REGISTRY.items():
-        definition = factory()
-        trackers.append({
-            "key": tracker_type,
-            "label": definition["label"],
-        })
-
-    return trackers
+    return [
+        {"key": tracker_type, "label": meta["label"]}
+        for tracker_type, meta in _discover_trackers().items()
+    ]
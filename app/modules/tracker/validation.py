@@ -0,0 +1,159 @@
+"""
+Validation des opérations tracker (GENERIC).
+
+Responsabilités :
+- compiler, à partir d’un catalog, une table chemin -> règle
+  ("items.bow", "dungeons.SV", "tablets.ruby", "wallet_bonus", ...)
+- vérifier chaque op en O(1), AVANT toute lecture / écriture de session
+
+Règles issues du catalog :
+- items cycle / toggle / wallet : valeur dans level_values
+- items counter : entier dans [counter_min, counter_max], aligné sur counter_step
+- wallet_bonus : valeur dans wallet_bonus_values
+- composites : une clé booléenne par overlay
+- dungeons : 0 (off) / 1 (todo) / 2 (done)
+
+NE FAIT PAS :
+- connaître un jeu précis (tout vient du catalog)
+- appliquer les changements (voir base.py)
+"""
+
+from typing import Dict, Any, Callable
+
+
+DUNGEON_STATES = frozenset({0, 1, 2})
+
+# Champs d’identité d’un participant (payload legacy complet)
+IDENTITY_KEYS = ("slot", "team_id", "label")
+
+
+class TrackerOpError(ValueError):
+    """
+    Op refusée : chemin inconnu ou valeur hors catalog.
+    """
+
+    def __init__(self, path: str, reason: str):
+        super().__init__(f"{path}: {reason}")
+        self.path = path
+        self.reason = reason
+
+
+# ----------------------------------------------------------------------
+# Règles élémentaires
+# ----------------------------------------------------------------------
+
+def _is_int(value: Any) -> bool:
+    # bool est un int en Python : True ne doit pas passer pour 1
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _one_of(values) -> Callable[[Any], bool]:
+    allowed = frozenset(values)
+    return lambda v: _is_int(v) and v in allowed
+
+
+def _counter(min_v: int, max_v: int, step: int) -> Callable[[Any], bool]:
+    return lambda v: (
+        _is_int(v)
+        and min_v <= v <= max_v
+        and ((v - min_v) % step == 0 or v == max_v)
+    )
+
+
+def _is_bool(value: Any) -> bool:
+    return isinstance(value, bool)
+
+
+# ----------------------------------------------------------------------
+# Validator compilé
+# ----------------------------------------------------------------------
+
+class TrackerValidator:
+    """
+    Table de règles compilée une fois par type de tracker.
+    """
+
+    __slots__ = ("_rules", "_groups")
+
+    def __init__(self, rules: Dict[str, Callable[[Any], bool]]):
+        self._rules = rules
+        # préfixes de chemins composés ("items", "dungeons", "tablets", ...)
+        self._groups = frozenset(path.split(".", 1)[0] for path in rules if "." in path)
+
+    def check(self, path: str, value: Any) -> None:
+        rule = self._rules.get(path)
+        if rule is None:
+            raise TrackerOpError(path, "champ inconnu")
+        if not rule(value):
+            raise TrackerOpError(path, f"valeur invalide ({value!r})")
+
+    def check_changes(self, changes: Dict[str, Any]) -> None:
+        for path, value in changes.items():
+            self.check(path, value)
+
+    def participant_changes(self, participant: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Payload legacy : participant complet (ou partiel), vérifié puis mis
+        à plat en changements champ par champ ({"items.bow": 2, ...}),
+        appliqués comme ceux du format "changes". Les champs d’identité
+        (team_id, label) passent sans règle, le slot n’est pas un champ.
+        """
+        changes = {}
+
+        for key, value in participant.items():
+            if key in IDENTITY_KEYS:
+                if key != "slot":
+                    changes[key] = value
+                continue
+
+            if key in self._groups:
+                if not isinstance(value, dict):
+                    raise TrackerOpError(key, "objet attendu")
+                for sub_key, sub_value in value.items():
+                    self.check(f"{key}.{sub_key}", sub_value)
+                    changes[f"{key}.{sub_key}"] = sub_value
+                continue
+
+            self.check(key, value)
+            changes[key] = value
+
+        return changes
+
+
+def compile_validator(catalog: Dict[str, Any]) -> TrackerValidator:
+    """
+    Construit le validator d’un catalog (items, composites, donjons).
+    """
+    rules: Dict[str, Callable[[Any], bool]] = {
+        "gomode": _one_of((0, 1)),
+        "show_final_time": _is_bool,
+    }
+
+    for item in catalog.get("items", []):
+        kind = item.get("kind")
+
+        if kind == "composite":
+            for key in item.get("overlays", {}):
+                rules[f"{item['id']}.{key}"] = _is_bool
+            # le preset par défaut place aussi 0 dans items.<composite>
+            rules[f"items.{item['id']}"] = _one_of((0,))
+            continue
+
+        path = f"items.{item['id']}"
+
+        if kind == "counter":
+            rules[path] = _counter(
+                int(item.get("counter_min") or 0),
+                int(item.get("counter_max") if item.get("counter_max") is not None else 999999),
+                int(item.get("counter_step") or 1),
+            )
+        else:
+            rules[path] = _one_of(item.get("level_values") or (0, 1))
+
+        if item.get("wallet_bonus_values"):
+            rules["wallet_bonus"] = _one_of(item["wallet_bonus_values"])
+
+    for code in catalog.get("dungeons", []):
+        rules[f"dungeons.{code}"] = lambda v: _is_int(v) and v in DUNGEON_STATES
+
+    return TrackerValidator(rules)
@@ -1,22 +1,42 @@
+import csv
+import io
 import json
 from pathlib import Path
 from flask import (
     Blueprint, render_template, abort,
     request, redirect, url_for, Response, flash, current_app, jsonify, stream_with_context
 )
-import time
 from flask_login import current_user
-from app.database import get_db
-from shutil import copyfile
+from app.database import get_db, read_only_db
+from app.db_writer import run_write
 import re
+import threading
 from datetime import datetime
 
 from app.auth.utils import login_required
 from app.permissions.decorators import role_required
 from app.permissions.roles import has_required_role
 from app.modules.text import slugify
-from app.modules.tracker.base import ensure_session_restream, save_session_restream, load_session_restream
-from app.modules.indices.registry import get_available_indices_templates, is_valid_indices_template, get_indices_template_path
+from app.modules.tracker.base import (
+    ensure_session_restream, save_session_restream, load_session_restream,
+    update_session_restream, apply_participant_changes, mark_session_replaced, SessionConflict,
+    delete_session_restream, session_version_restream,
+    flush_session_restream, wait_session_change,
+)
+from app.modules.indices.sessions import (
+    update_indices_category, reset_indices_session, IndicesConflict,
+    load_indices_session, delete_indices_session, flush_indices_session,
+    undo_last_indices_change,
+    wait_indices_change, register_slug_cache,
+)
+from app.modules.session_archive import restore_restream_sessions
+from app.modules.indices.history import export_history
+from app.modules.indices.registry import (
+    get_available_indices_templates, is_valid_indices_template, load_indices_template,
+    localize_indices, localize_category_items,
+)
+from app.modules.tracker.atlas import catalog_with_atlas
+from app.modules.tracker.validation import TrackerOpError
 from app.modules.tracker.registry import get_available_trackers, get_tracker_definition, is_valid_tracker_type
 from app.modules.tracker.presets import list_presets, load_preset
 from app.restream.queries import get_active_restream_by_slug, get_match_teams, get_next_planned_match_for_overlay, simplify_restream_title, split_commentators
@@ -35,11 +55,18 @@ def indices_sessions_dir() -> Path:
 def indices_templates_dir() -> Path:
     return Path(current_app.instance_path) / "indices" / "templates"
     
-def tracker_session_path_restream(restream_id: int) -> Path:
-    return Path(current_app.instance_path) / "trackers" / "sessions" / f"restream_{restream_id}.json"
 
 SSE_POLL_INTERVAL = 0.25
 
+# Frames SSE indices déjà sérialisées, partagées entre viewers d’une même langue
+# slug -> {(génération, template, locale, catégorie ou None): (version, frame)}
+# Vidé par sessions.py à la suppression / au reset d’une session ; borné
+# (slugs les plus anciens, puis frames les plus anciennes du slug)
+_INDICES_FRAMES = register_slug_cache({})
+_INDICES_FRAMES_LOCK = threading.Lock()
+INDICES_FRAMES_MAX_SLUGS = 64
+INDICES_FRAMES_PER_SLUG = 256
+
 
 restream_bp = Blueprint("restream", __name__, url_prefix="/restream")
 
@@ -76,6 +103,7 @@ def view(slug):
     )
 
 @restream_bp.route("/planning")
+@read_only_db
 def planning():
     db = get_db()
 
@@ -463,12 +491,8 @@ def create():
         # Indices : création de la session uniquement si != "none"
         # --------------------------------------------------------------
         if indices_template != "none":
-            sessions_dir = Path(current_app.instance_path) / "indices" / "sessions"
-            sessions_dir.mkdir(parents=True, exist_ok=True)
-            session_path = sessions_dir / f"{slug}.json"
-
-            template_path = get_indices_template_path(indices_template)
-            copyfile(template_path, session_path)
+            delete_indices_session(slug)  # reste éventuel d’un ancien restream du même slug
+            reset_indices_session(slug, load_indices_template(indices_template))
 
         # --------------------------------------------------------------
         # Insert DB
@@ -563,40 +587,52 @@ def create():
     )
 
 
+def _set_restream_active(slug: str, active: int) -> int:
+    # Écriture de la file (db_writer) : nombre de lignes modifiées
+    return get_db().execute(
+        """
+        UPDATE restreams
+        SET is_active = ?
+        WHERE slug = ? AND is_active = ?
+        """,
+        (active, slug, 1 - active)
+    ).rowcount
+
+
 @restream_bp.route("/<slug>/enable", methods=["POST"])
 @login_required
 @role_required("restreamer")
 def enable_restream(slug):
     db = get_db()
 
-    updated = db.execute(
-        """
-        UPDATE restreams
-        SET is_active = 1
-        WHERE slug = ? AND is_active = 0
-        """,
-        (slug,)
-    ).rowcount
+    updated = run_write(_set_restream_active, slug, 1)
 
     if not updated:
         abort(404)
-        
-    db.commit()
     
-    # Recréation du fichier d’indices à partir du template
     restream = db.execute(
-        "SELECT indices_template FROM restreams WHERE slug = ?",
+        """
+        SELECT r.id, r.indices_template, m.tournament_id
+        FROM restreams r
+        JOIN matches m ON m.id = r.match_id
+        WHERE r.slug = ?
+        """,
         (slug,)
     ).fetchone()
 
     if not restream:
         abort(404)
 
-    if restream["indices_template"] != "none":
-        template_path = get_indices_template_path(restream["indices_template"])        
-        session_path = indices_sessions_dir() / f"{slug}.json"
-        session_path.parent.mkdir(parents=True, exist_ok=True)
-        copyfile(template_path, session_path)
+    # Sessions archivées (restream inactif depuis longtemps) → remises en place
+    restored = restore_restream_sessions(int(restream["id"]), slug, int(restream["tournament_id"]))
+
+    # Sinon recréation de la session d’indices à partir du template
+    if (
+        restream["indices_template"] != "none"
+        and not restored["indices"]
+        and load_indices_session(slug) is None
+    ):
+        reset_indices_session(slug, load_indices_template(restream["indices_template"]))
 
 
     flash(_("Restream réactivé."), "success")
@@ -610,24 +646,17 @@ def enable_restream(slug):
 def disable_restream(slug):
     db = get_db()
 
-    updated = db.execute(
-        """
-        UPDATE restreams
-        SET is_active = 0
-        WHERE slug = ? AND is_active = 1
-        """,
-        (slug,)
-    ).rowcount
+    updated = run_write(_set_restream_active, slug, 0)
 
     if not updated:
         abort(404)
-        
-    db.commit()
-    
-    # Suppression du fichier d’indices si présent
-    session_file = indices_sessions_dir() / f"{slug}.json"
-    if session_file.exists():
-        session_file.unlink()
+
+    # Dernier état tracker en attente d’écriture → base
+    # Les sessions (tracker + indices) restent en place : archivées après
+    # SESSION_ARCHIVE_AFTER_DAYS jours, restaurées à la réactivation
+    restream = db.execute("SELECT id FROM restreams WHERE slug = ?", (slug,)).fetchone()
+    flush_session_restream(int(restream["id"]))
+    flush_indices_session(slug)
 
 
     flash(_("Restream désactivé."), "success")
@@ -659,12 +688,13 @@ def restream_indices(slug):
     if restream["indices_template"] == "none":
         abort(404)
 
-    session_file = indices_sessions_dir() / f"{slug}.json"
-    if not session_file.exists():
+    indices_data = load_indices_session(slug)
+    if indices_data is None:
         abort(404)
 
-    with open(session_file, "r", encoding="utf-8") as f:
-        indices_data = json.load(f)
+    # Variante de langue du viewer (cookie lang, comme les pages)
+    lang = str(babel_get_locale() or "fr").strip().lower()
+    indices_data = localize_indices(indices_data, restream["indices_template"], lang)
 
     return render_template(
         "restream/indices.html",
@@ -682,46 +712,114 @@ def restream_indices(slug):
 @login_required
 @role_required("éditeur")
 def update_category(slug):
-    session_file = indices_sessions_dir() / f"{slug}.json"
-
-    if not session_file.exists():
-        abort(404)
-
     data = request.get_json()
     if not data:
         abort(400)
 
     category = data.get("category")
     lines = data.get("lines")
+    base_version = data.get("version")
 
     if not category or lines is None:
         abort(400)
 
-    with open(session_file, "r", encoding="utf-8") as f:
-        indices = json.load(f)
-
-    if category not in indices["categories"]:
+    try:
+        updated = update_indices_category(
+            slug,
+            category,
+            lines,
+            base_version=int(base_version) if base_version is not None else None,
+            author=current_user.username,
+        )
+    except FileNotFoundError:
+        abort(404)
+    except (KeyError, TypeError, ValueError):
         abort(400)
+    except IndicesConflict as conflict:
+        return _indices_conflict_response(slug, conflict)
 
-    columns = indices["categories"][category]["columns"]
-    items = []
+    return {"status": "ok", "version": updated["version"]}
 
-    for line in lines:
-        parts = [cell.strip() for cell in line.split("|")]
 
-        if columns == 2:
-            row = parts[:2] + [""] * (2 - len(parts))
-        else:
-            row = parts[:1]
+def _indices_template_key(slug: str) -> str:
+    row = get_db().execute(
+        "SELECT indices_template FROM restreams WHERE slug = ?",
+        (slug,),
+    ).fetchone()
+    return row["indices_template"] if row else "none"
 
-        items.append(row)
 
-    indices["categories"][category]["items"] = items
+def _localized_items(slug: str, category_key: str, items):
+    lang = str(babel_get_locale() or "fr").strip().lower()
+    return localize_category_items(items, category_key, _indices_template_key(slug), lang)
 
-    with open(session_file, "w", encoding="utf-8") as f:
-        json.dump(indices, f, ensure_ascii=False, indent=2)
 
-    return {"status": "ok"}
+def _indices_conflict_response(slug: str, conflict: IndicesConflict):
+    # Modifiée entre-temps par un autre éditeur : on renvoie l’état courant
+    return {
+        "status": "conflict",
+        "category": conflict.category_key,
+        "items": _localized_items(slug, conflict.category_key, conflict.category.get("items", [])),
+        "version": int(conflict.category.get("version", 0)),
+    }, 409
+
+
+# =========================================================
+# HISTORIQUE : ANNULATION + EXPORT
+# =========================================================
+
+@restream_bp.route("/<slug>/indices/undo", methods=["POST"])
+@login_required
+@role_required("éditeur")
+def undo_indices(slug):
+    try:
+        category, updated = undo_last_indices_change(slug, author=current_user.username)
+    except LookupError:
+        return {"status": "empty"}, 404
+    except FileNotFoundError:
+        abort(404)
+    except IndicesConflict as conflict:
+        return _indices_conflict_response(slug, conflict)
+
+    return {
+        "status": "ok",
+        "category": category,
+        "items": _localized_items(slug, category, updated["items"]),
+        "version": updated["version"],
+    }
+
+
+@restream_bp.route("/<slug>/indices/history")
+@login_required
+@role_required("éditeur")
+def export_indices_history(slug):
+    """
+    Chronologie des indices (annotations VOD) : JSON, ou CSV avec ?format=csv.
+    """
+    entries = export_history(slug)
+
+    if request.args.get("format") != "csv":
+        return jsonify({"slug": slug, "entries": entries})
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["at", "offset", "kind", "category", "version", "author", "items"])
+    for entry in entries:
+        writer.writerow([
+            entry["at"],
+            entry.get("offset", 0),
+            entry["kind"],
+            entry["category"] or "",
+            entry["version"],
+            entry["author"] or "",
+            " / ".join(" | ".join(row) for row in entry["items"]),
+        ])
+
+    return Response(
+        out.getvalue(),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="indices_{slug}.csv"'},
+    )
 
 
 # =========================================================
@@ -730,29 +828,52 @@ def update_category(slug):
 
 @restream_bp.route("/<slug>/indices/stream")
 def stream_indices(slug):
-    session_file = indices_sessions_dir() / f"{slug}.json"
-
-    if not session_file.exists():
+    data = load_indices_session(slug)
+    if data is None:
         abort(404)
 
+    # Langue figée à la connexion (cookie lang)
+    template_key = _indices_template_key(slug)
+    lang = str(babel_get_locale() or "fr").strip().lower()
+
+    def category_versions(indices: dict) -> dict:
+        return {
+            key: int(category.get("version", 0))
+            for key, category in indices.get("categories", {}).items()
+        }
+
+    @stream_with_context
     def event_stream():
-        last_mtime = session_file.stat().st_mtime
-        
-        with open(session_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+        # Premier message (et changement de structure) : document complet
+        # Ensuite : un event "category" par catégorie modifiée
+        last_version = int(data.get("version", 0))
+        last_categories = category_versions(data)
+        yield _indices_frame(slug, template_key, lang, data)
 
         while True:
-            time.sleep(SSE_POLL_INTERVAL)
+            version = wait_indices_change(slug, last_version, SSE_POLL_INTERVAL)
+            if version is None or version == last_version:
+                continue
+
+            current = load_indices_session(slug)
+            if current is None:
+                continue
+
+            last_version = int(current.get("version", 0))
+            versions = category_versions(current)
+
+            if versions.keys() != last_categories.keys():
+                last_categories = versions
+                yield _indices_frame(slug, template_key, lang, current)
+                continue
 
-            current_mtime = session_file.stat().st_mtime
-            if current_mtime != last_mtime:
-                last_mtime = current_mtime
+            for key, category_version in versions.items():
+                if category_version == last_categories[key]:
+                    continue
 
-                with open(session_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                yield _indices_frame(slug, template_key, lang, current, key)
 
-                yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+            last_categories = versions
 
     return Response(
         event_stream(),
@@ -764,6 +885,53 @@ def stream_indices(slug):
     )
 
 
+def _indices_frame(slug: str, template_key: str, lang: str, indices: dict, category_key: str = None) -> str:
+    """
+    Frame SSE localisée : document complet (category_key None) ou delta
+    d’une catégorie. Sérialisée une fois par version et par langue.
+    """
+    if category_key is None:
+        version = int(indices.get("version", 0))
+    else:
+        version = int(indices["categories"][category_key].get("version", 0))
+
+    cache_key = (indices.get("generation"), template_key, lang, category_key)
+    with _INDICES_FRAMES_LOCK:
+        cached = _INDICES_FRAMES.get(slug, {}).get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    if category_key is None:
+        localized = localize_indices(indices, template_key, lang)
+        frame = f"data: {json.dumps(localized, ensure_ascii=False)}\n\n"
+    else:
+        delta = {
+            "key": category_key,
+            "items": localize_category_items(
+                indices["categories"][category_key].get("items", []),
+                category_key,
+                template_key,
+                lang,
+            ),
+            "version": version,
+        }
+        frame = f"event: category\ndata: {json.dumps(delta, ensure_ascii=False)}\n\n"
+
+    with _INDICES_FRAMES_LOCK:
+        # Réinséré en fin : ordre d’insertion = ordre d’usage
+        frames = _INDICES_FRAMES.pop(slug, None) or {}
+        frames.pop(cache_key, None)
+        if len(frames) >= INDICES_FRAMES_PER_SLUG:
+            frames.pop(next(iter(frames)))
+        frames[cache_key] = (version, frame)
+        _INDICES_FRAMES[slug] = frames
+
+        while len(_INDICES_FRAMES) > INDICES_FRAMES_MAX_SLUGS:
+            _INDICES_FRAMES.pop(next(iter(_INDICES_FRAMES)))
+
+    return frame
+
+
 # =========================================================
 # RESET COMPLET DES INDICES (RECOPIE DU TEMPLATE)
 # =========================================================
@@ -781,15 +949,13 @@ def reset_all_indices(slug):
     if not restream or restream["indices_template"] == "none":
         abort(404)
 
-    template_file = get_indices_template_path(restream["indices_template"])
-    session_file = indices_sessions_dir() / f"{slug}.json"
-
-    if not template_file.exists():
+    # Template parsé gardé en mémoire par le registry (pas de relecture disque)
+    try:
+        template = load_indices_template(restream["indices_template"])
+    except FileNotFoundError:
         abort(404, description="Template d’indices introuvable")
         
-    session_file.parent.mkdir(parents=True, exist_ok=True)
-
-    copyfile(template_file, session_file)
+    reset_indices_session(slug, template, author=current_user.username)
 
     return "", 204
 
@@ -845,62 +1011,56 @@ def edit(slug):
         # --------------------------------------------------------------
         # Gestion des indices (delete & recreate)
         # --------------------------------------------------------------
-        session_path = indices_sessions_dir() / f"{slug}.json"
-
         if new_indices_template != restream["indices_template"]:
             # supprimer l’ancienne session si elle existe
-            if session_path.exists():
-                session_path.unlink()
+            delete_indices_session(slug)
 
             # recréer seulement si != "none"
             if new_indices_template != "none":
-                template_path = get_indices_template_path(new_indices_template)
-
-                if not template_path.exists():
+                try:
+                    template = load_indices_template(new_indices_template)
+                except FileNotFoundError:
                     flash(_("Template d’indices introuvable."), "error")
                     return redirect(url_for("restream.edit", slug=slug))
 
-                session_path.parent.mkdir(parents=True, exist_ok=True)
-                copyfile(template_path, session_path)
+                reset_indices_session(slug, template)
                 
         # --------------------------------------------------------------
         # Gestion du tracker (delete session si changement de type)
         # --------------------------------------------------------------
         if new_tracker_type != restream["tracker_type"]:
-            tracker_session_path: Path = tracker_session_path_restream(int(restream["id"]))
-
-            if tracker_session_path.exists():
-                tracker_session_path.unlink()
+            delete_session_restream(int(restream["id"]))
 
 
         # --------------------------------------------------------------
         # Update DB
         # --------------------------------------------------------------
-        db.execute(
-            """
-            UPDATE restreams
-            SET
-                title = ?,
-                twitch_url = ?,
-                restreamer_name = ?,
-                commentator_name = ?,
-                tracker_name = ?,
-                indices_template = ?,
-                tracker_type = ?
-            WHERE slug = ?
-            """,
-            (
-                title,
-                twitch_url,
-                restreamer_name,
-                commentator_name,
-                tracker_name,
-                new_indices_template,
-                new_tracker_type,
-                slug,
-            ),
+        run_write(
+            lambda: get_db().execute(
+                """
+                UPDATE restreams
+                SET
+                    title = ?,
+                    twitch_url = ?,
+                    restreamer_name = ?,
+                    commentator_name = ?,
+                    tracker_name = ?,
+                    indices_template = ?,
+                    tracker_type = ?
+                WHERE slug = ?
+                """,
+                (
+                    title,
+                    twitch_url,
+                    restreamer_name,
+                    commentator_name,
+                    tracker_name,
+                    new_indices_template,
+                    new_tracker_type,
+                    slug,
+                ),
+            )
         )
-        db.commit()
 
         flash(_("Restream mis à jour."), "success")
         return redirect(url_for("restream.manage"))
@@ -944,12 +1104,12 @@ def restream_live(slug: str):
     indices_data = None
 
     if restream["indices_template"] != "none":
-        session_file = indices_sessions_dir() / f"{slug}.json"
-        if not session_file.exists():
+        indices_data = load_indices_session(slug)
+        if indices_data is None:
             abort(404)
 
-        with open(session_file, "r", encoding="utf-8") as f:
-            indices_data = json.load(f)
+        lang = str(babel_get_locale() or "fr").strip().lower()
+        indices_data = localize_indices(indices_data, restream["indices_template"], lang)
 
     # --------------------------------------------------------------
     # Permissions
@@ -979,56 +1139,23 @@ def restream_live(slug: str):
         except KeyError:
             abort(500)  # tracker inconnu → incohérence DB
 
-        # --- participants ---
-        teams = db.execute(
-            """
-            SELECT t.id AS team_id, t.name AS team_name
-            FROM match_teams mt
-            JOIN teams t ON t.id = mt.team_id
-            WHERE mt.match_id = ?
-            ORDER BY mt.team_id ASC
-            """,
-            (restream["match_id"],),
-        ).fetchall()
-
-        participants_count = max(1, len(teams))
-
-        # --- session tracker ---
-        existing_session = load_session_restream(int(restream["id"]))
-
-        session = ensure_session_restream(
-            tracker_type=tracker_type,
-            restream_id=int(restream["id"]),
-            restream_slug=restream["slug"],
-            preset_factory=tracker_def["default_preset"],
-            participants_count=participants_count,
-        )
-
-        # --- injection slot / team / label UNIQUEMENT à la création ---
-        if existing_session is None:
-            for i, p in enumerate(session.get("participants", [])):
-                p["slot"] = i + 1
-                p.setdefault("show_final_time", False)
-                if i < len(teams):
-                    name = (teams[i]["team_name"] or f"Slot {i+1}").replace("Solo - ", "")
-                    p["team_id"] = int(teams[i]["team_id"])
-                    p["label"] = name
-                else:
-                    p.setdefault("team_id", 0)
-                    p.setdefault("label", f"Slot {i+1}")
-                
-            save_session_restream(int(restream["id"]), session)
+        # --- session tracker (créée + slots / labels injectés si absente) ---
+        session = _ensure_tracker_session(db, restream)
 
         # --- payload pour le template ---
         tracker_payload = {
             "tracker_type": tracker_type,
-            "catalog": tracker_def["catalog"](),
+            "catalog": catalog_with_atlas(tracker_def["catalog"]()),
             "session": session,
             "use_storage": False,
             "update_url": url_for(
                 "restream.restream_tracker_update",
                 slug=restream["slug"],
             ),
+            "ops_url": url_for(
+                "restream.restream_tracker_ops",
+                slug=restream["slug"],
+            ),
             "stream_url": url_for(
                 "restream.restream_tracker_stream",
                 slug=restream["slug"],
@@ -1075,16 +1202,206 @@ def restream_tracker_update(slug: str):
     if not restream:
         abort(404)
 
+    if restream["tracker_type"] == "none":
+        abort(404)
+
     payload = request.get_json(silent=True) or {}
     participant = payload.get("participant")
-    if not isinstance(participant, dict):
+    changes = payload.get("changes")
+
+    # Deux formats, même concurrence optimiste (champ par champ) :
+    # - {"slot", "version", "changes": {"items.bow": 2, ...}}
+    # - {"participant": {...}, "version"} : legacy, participant mis à plat en
+    #   changements ; sans version (base 0), tout champ déjà écrit par un
+    #   autre et différent est en conflit (409 + état courant)
+    if changes is not None:
+        if not isinstance(changes, dict):
+            abort(400, description="Payload invalide: changes doit être un objet")
+    elif not isinstance(participant, dict):
         abort(400, description="Payload invalide: participant manquant")
 
-    slot = int(participant.get("slot", 1))
+    try:
+        slot = int(payload.get("slot", (participant or {}).get("slot", 1)))
+        base_version = int(payload.get("version", 0))
+    except (TypeError, ValueError):
+        abort(400, description="Payload invalide: slot / version")
+
     if slot < 1:
         abort(400, description="slot invalide (doit être >= 1)")
 
-    # s’assurer session existante
+    # Validation contre le catalog AVANT toute lecture / écriture de session
+    validator = _tracker_validator(restream)
+    try:
+        if changes is not None:
+            validator.check_changes(changes)
+        else:
+            changes = validator.participant_changes(participant)
+    except TrackerOpError as e:
+        abort(400, description=f"Op invalide: {e}")
+
+    def mutate(session, new_version):
+        _check_tracker_slots(session, [slot])
+        apply_participant_changes(session, slot, changes, base_version, new_version)
+
+    try:
+        session = _update_tracker_session(db, restream, mutate)
+    except TrackerOpError as e:
+        abort(400, description=f"Op invalide: {e}")
+    except SessionConflict as conflict:
+        return _tracker_conflict_response(conflict)
+
+    return jsonify({
+        "ok": True,
+        "version": session["version"],
+        "participants": session.get("participants", []),
+    })
+
+
+@restream_bp.post("/<slug>/tracker/ops")
+@login_required
+@role_required("éditeur")
+def restream_tracker_ops(slug: str):
+    """
+    Lot d’opérations tracker (clics regroupés côté client) :
+    {"version": 12, "ops": [{"slot": 1, "path": "items.bow", "value": 2}, ...]}
+
+    Ops appliquées dans l’ordre, en UNE écriture de session (donc un seul
+    réveil SSE). Lot atomique : un conflit rejette tout le lot (409).
+    """
+    db = get_db()
+    restream = db.execute(
+        """
+        SELECT id, slug, match_id, tracker_type
+        FROM restreams
+        WHERE slug = ? AND is_active = 1
+        """,
+        (slug,),
+    ).fetchone()
+
+    if not restream:
+        abort(404)
+
+    if restream["tracker_type"] == "none":
+        abort(404)
+
+    payload = request.get_json(silent=True) or {}
+    ops = payload.get("ops")
+
+    if not isinstance(ops, list) or not ops:
+        abort(400, description="Payload invalide: ops doit être une liste non vide")
+
+    try:
+        base_version = int(payload.get("version", 0))
+    except (TypeError, ValueError):
+        abort(400, description="Payload invalide: version")
+
+    validator = _tracker_validator(restream)
+
+    # slot -> {path: value}, dans l’ordre (la dernière op sur un champ gagne)
+    # Chaque op est validée contre le catalog AVANT toute I/O de session.
+    changes_by_slot = {}
+    for op in ops:
+        if not isinstance(op, dict) or not isinstance(op.get("path"), str):
+            abort(400, description="Payload invalide: op")
+        try:
+            slot = int(op.get("slot", 1))
+        except (TypeError, ValueError):
+            abort(400, description="Payload invalide: slot")
+        if slot < 1:
+            abort(400, description="slot invalide (doit être >= 1)")
+        try:
+            validator.check(op["path"], op.get("value"))
+        except TrackerOpError as e:
+            abort(400, description=f"Op invalide: {e}")
+        changes_by_slot.setdefault(slot, {})[op["path"]] = op.get("value")
+
+    def mutate(session, new_version):
+        _check_tracker_slots(session, changes_by_slot)
+
+        for slot, changes in changes_by_slot.items():
+            apply_participant_changes(session, slot, changes, base_version, new_version)
+
+    try:
+        session = _update_tracker_session(db, restream, mutate)
+    except TrackerOpError as e:
+        abort(400, description=f"Op invalide: {e}")
+    except SessionConflict as conflict:
+        return _tracker_conflict_response(conflict)
+
+    return jsonify({
+        "ok": True,
+        "version": session["version"],
+        "participants": session.get("participants", []),
+    })
+
+
+def _tracker_validator(restream):
+    """
+    Validator compilé du tracker du restream (cf. registry).
+    """
+    if restream["tracker_type"] == "none":
+        abort(404)
+
+    try:
+        return get_tracker_definition(restream["tracker_type"])["validator"]
+    except KeyError:
+        abort(500)
+
+
+def _check_tracker_slots(session: dict, slots) -> None:
+    # Appelé dans mutate (boucle CAS ou verrou du store mémoire) : erreur
+    # métier, convertie en 400 par la route une fois sorti de l’écriture
+    participants_count = len(session.get("participants", []))
+    for slot in slots:
+        if slot > participants_count:
+            raise TrackerOpError("slot", f"hors bornes session ({slot})")
+
+
+def _update_tracker_session(db, restream, mutate) -> dict:
+    """
+    update_session_restream sur la session du restream : une seule lecture
+    par écriture. Session absente (première écriture) : créée puis écriture
+    rejouée.
+    """
+    try:
+        return update_session_restream(int(restream["id"]), mutate)
+    except KeyError:
+        _ensure_tracker_session(db, restream)
+        return update_session_restream(int(restream["id"]), mutate)
+
+
+def _tracker_conflict_response(conflict: SessionConflict):
+    # Conflit réel : on renvoie l’état courant pour que le client se resynchronise
+    return jsonify({
+        "ok": False,
+        "conflicts": conflict.conflicts,
+        "version": int(conflict.session.get("version", 0)),
+        "participants": conflict.session.get("participants", []),
+    }), 409
+
+
+def _tracker_conflict_redirect(slug: str):
+    # Formulaires (preset, reset, temps final) : session modifiée en continu,
+    # abandon après CAS_MAX_ATTEMPTS ; rien n’a été écrit
+    flash(_("Le tracker est modifié en ce moment, réessayez."), "error")
+    return redirect(url_for("restream.restream_live", slug=slug))
+
+
+def _ensure_tracker_session(db, restream) -> dict:
+    """
+    Session tracker du restream, créée depuis le preset par défaut si absente
+    (slot / team / label des participants injectés à la création).
+    """
+    tracker_type = restream["tracker_type"]
+    if tracker_type == "none":
+        abort(404)
+
+    try:
+        tracker_def = get_tracker_definition(tracker_type)
+    except KeyError:
+        abort(500)  # tracker inconnu → incohérence DB
+
+    # --- participants ---
     teams = db.execute(
         """
         SELECT t.id AS team_id, t.name AS team_name
@@ -1095,16 +1412,10 @@ def restream_tracker_update(slug: str):
         """,
         (restream["match_id"],),
     ).fetchall()
-    participants_count = max(1, len(teams))
 
-    tracker_type = restream["tracker_type"]
-    if tracker_type == "none":
-        abort(404)
+    participants_count = max(1, len(teams))
 
-    try:
-        tracker_def = get_tracker_definition(tracker_type)
-    except KeyError:
-        abort(500)
+    existing_session = load_session_restream(int(restream["id"]))
 
     session = ensure_session_restream(
         tracker_type=tracker_type,
@@ -1114,17 +1425,22 @@ def restream_tracker_update(slug: str):
         participants_count=participants_count,
     )
 
-    idx = slot - 1
-    if idx >= len(session.get("participants", [])):
-        abort(400, description="slot invalide (hors bornes session)")
+    # --- injection slot / team / label UNIQUEMENT à la création ---
+    if existing_session is None:
+        for i, p in enumerate(session.get("participants", [])):
+            p["slot"] = i + 1
+            p.setdefault("show_final_time", False)
+            if i < len(teams):
+                name = (teams[i]["team_name"] or f"Slot {i+1}").replace("Solo - ", "")
+                p["team_id"] = int(teams[i]["team_id"])
+                p["label"] = name
+            else:
+                p.setdefault("team_id", 0)
+                p.setdefault("label", f"Slot {i+1}")
 
-    existing_p = session["participants"][idx]
-    existing_p.update(participant)   # merge
-    session["participants"][idx] = existing_p
-    session["version"] = int(session.get("version", 0)) + 1
+        save_session_restream(int(restream["id"]), session)
 
-    save_session_restream(int(restream["id"]), session)
-    return jsonify({"ok": True, "version": session["version"]})
+    return session
 
 @restream_bp.get("/<slug>/tracker/stream")
 def restream_tracker_stream(slug: str):
@@ -1141,60 +1457,29 @@ def restream_tracker_stream(slug: str):
     if not restream:
         abort(404)
 
-    teams = db.execute(
-        """
-        SELECT t.id AS team_id, t.name AS team_name
-        FROM match_teams mt
-        JOIN teams t ON t.id = mt.team_id
-        WHERE mt.match_id = ?
-        ORDER BY mt.team_id ASC
-        """,
-        (restream["match_id"],),
-    ).fetchall()
-
-    participants_count = max(1, len(teams))
-
-    
-    tracker_type = restream["tracker_type"]
-    if tracker_type == "none":
+    if restream["tracker_type"] == "none":
         abort(404)
 
-    try:
-        tracker_def = get_tracker_definition(tracker_type)
-    except KeyError:
-        abort(500)
+    _ensure_tracker_session(db, restream)
 
-    ensure_session_restream(
-        tracker_type=tracker_type,
-        restream_id=int(restream["id"]),
-        restream_slug=restream["slug"],
-        preset_factory=tracker_def["default_preset"],
-        participants_count=participants_count,
-    )
-
-    session_file: Path = tracker_session_path_restream(int(restream["id"]))
+    restream_id = int(restream["id"])
 
     def read_session_json() -> dict:
-        if not session_file.exists():
-            return {}
-        try:
-            with session_file.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
+        return load_session_restream(restream_id) or {}
 
     @stream_with_context
     def event_stream():
-        last_mtime = session_file.stat().st_mtime if session_file.exists() else 0.0
+        # Notification de changement = version de session
+        # (réveil immédiat sur écriture en mémoire, sinon lecture en base)
+        last_version = session_version_restream(restream_id)
         yield f"data: {json.dumps(read_session_json(), ensure_ascii=False)}\n\n"
 
         while True:
-            time.sleep(SSE_POLL_INTERVAL)
-            if not session_file.exists():
+            version = wait_session_change(restream_id, last_version, SSE_POLL_INTERVAL)
+            if version is None:
                 continue
-            mtime = session_file.stat().st_mtime
-            if mtime != last_mtime:
-                last_mtime = mtime
+            if version != last_version:
+                last_version = version
                 yield f"data: {json.dumps(read_session_json(), ensure_ascii=False)}\n\n"
 
     headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
@@ -1279,17 +1564,22 @@ def restream_tracker_presets_apply(slug: str):
     )
 
     # applique à tous les slots, en préservant identité
-    new_participants = []
-    for i, existing in enumerate(session.get("participants", []), start=1):
-        new_p = json.loads(json.dumps(preset_participant))  # deep copy simple
-        new_p["slot"] = existing.get("slot", i)
-        new_p["team_id"] = existing.get("team_id", 0)
-        new_p["label"] = existing.get("label", f"Slot {i}")
-        new_participants.append(new_p)
-
-    session["participants"] = new_participants
-    session["version"] = int(session.get("version", 0)) + 1
-    save_session_restream(int(restream["id"]), session)
+    def mutate(session, new_version):
+        new_participants = []
+        for i, existing in enumerate(session.get("participants", []), start=1):
+            new_p = json.loads(json.dumps(preset_participant))  # deep copy simple
+            new_p["slot"] = existing.get("slot", i)
+            new_p["team_id"] = existing.get("team_id", 0)
+            new_p["label"] = existing.get("label", f"Slot {i}")
+            new_participants.append(new_p)
+
+        session["participants"] = new_participants
+        mark_session_replaced(session, new_version)
+
+    try:
+        update_session_restream(int(restream["id"]), mutate, flush=True)
+    except SessionConflict:
+        return _tracker_conflict_redirect(slug)
 
     flash(_("Preset chargé sur tous les slots."), "success")
     return redirect(url_for("restream.restream_live", slug=slug))
@@ -1336,18 +1626,23 @@ def restream_tracker_reset(slug: str):
     default_session = tracker_def["default_preset"](participants_count=participants_count)
     default_participants = default_session.get("participants", [])
 
-    new_participants = []
-    for i, existing in enumerate(session.get("participants", []), start=1):
-        base = default_participants[i - 1] if i - 1 < len(default_participants) else {}
-        new_p = json.loads(json.dumps(base))
-        new_p["slot"] = existing.get("slot", i)
-        new_p["team_id"] = existing.get("team_id", 0)
-        new_p["label"] = existing.get("label", f"Slot {i}")
-        new_participants.append(new_p)
+    def mutate(session, new_version):
+        new_participants = []
+        for i, existing in enumerate(session.get("participants", []), start=1):
+            base = default_participants[i - 1] if i - 1 < len(default_participants) else {}
+            new_p = json.loads(json.dumps(base))
+            new_p["slot"] = existing.get("slot", i)
+            new_p["team_id"] = existing.get("team_id", 0)
+            new_p["label"] = existing.get("label", f"Slot {i}")
+            new_participants.append(new_p)
+
+        session["participants"] = new_participants
+        mark_session_replaced(session, new_version)
 
-    session["participants"] = new_participants
-    session["version"] = int(session.get("version", 0)) + 1
-    save_session_restream(int(restream["id"]), session)
+    try:
+        update_session_restream(int(restream["id"]), mutate, flush=True)
+    except SessionConflict:
+        return _tracker_conflict_redirect(slug)
 
     flash(_("Tracker reset (preset par défaut)."), "success")
     return redirect(url_for("restream.restream_live", slug=slug))
@@ -1391,21 +1686,28 @@ def restream_toggle_final_time(slug: str, slot: int):
         participants_count=participants_count,
     )
 
-    participants = session.get("participants", [])
-    target = None
-    for p in participants:
-        if int(p.get("slot", 0)) == slot:
-            target = p
-            break
+    def find_target(session):
+        for p in session.get("participants", []):
+            if int(p.get("slot", 0)) == slot:
+                return p
+        return None
 
-    if not target:
+    if not find_target(session):
         abort(404)
 
-    current = bool(target.get("show_final_time", False))
-    target["show_final_time"] = not current
+    def mutate(session, new_version):
+        target = find_target(session)
+        if target is None:
+            return
+        target["show_final_time"] = not bool(target.get("show_final_time", False))
+        (session.setdefault("field_versions", {})
+                .setdefault(str(slot), {}))["show_final_time"] = new_version
 
-    session["version"] = int(session.get("version", 0)) + 1
-    save_session_restream(int(restream["id"]), session)
+    try:
+        session = update_session_restream(int(restream["id"]), mutate)
+    except SessionConflict:
+        return _tracker_conflict_redirect(slug)
+    target = find_target(session) or {}
 
     flash(
         _("Temps final Joueur %(slot)s : %(state)s .", slot=slot, state= 'ON' if target['show_final_time'] else 'OFF'),
@@ -1442,15 +1744,16 @@ def live_set_room_racetime(slug: str):
         flash(_("Room racetime trop longue."), "error")
         return redirect(url_for("restream.restream_live", slug=slug))
 
-    db.execute(
-        """
-        UPDATE matches
-        SET racetime_room = ?
-        WHERE id = ?
-        """,
-        (room, restream["match_id"]),
+    run_write(
+        lambda: get_db().execute(
+            """
+            UPDATE matches
+            SET racetime_room = ?
+            WHERE id = ?
+            """,
+            (room, restream["match_id"]),
+        )
     )
-    db.commit()
 
     flash(_("Room racetime enregistrée sur le match."), "success")
     return redirect(url_for("restream.restream_live", slug=slug))
@@ -1460,6 +1763,7 @@ def live_set_room_racetime(slug: str):
 ###############################################
 
 @restream_bp.get("/<slug>/overlay")
+@read_only_db
 def restream_overlay(slug: str):
     db = get_db()
 
@@ -1607,7 +1911,7 @@ def restream_overlay(slug: str):
     # --------------------------------------------------------------
     tracker_payload = {
         "tracker_type": tracker_type,
-        "catalog": tracker_def["catalog"](),
+        "catalog": catalog_with_atlas(tracker_def["catalog"]()),
         "session": session,
         "use_storage": False,
         "frontend": tracker_def["frontend"],
@@ -1672,6 +1976,7 @@ def restream_overlay(slug: str):
     )
     
 @restream_bp.get("/<slug>/overlay/intro")
+@read_only_db
 def restream_overlay_intro(slug: str):
     db = get_db()
     restream = get_active_restream_by_slug(db, slug)
@@ -1746,6 +2051,7 @@ def _format_dt_fr(scheduled_at: str | None) -> str:
 
 
 @restream_bp.get("/<slug>/overlay/next")
+@read_only_db
 def restream_overlay_next(slug: str):
     db = get_db()
     restream = get_active_restream_by_slug(db, slug)
@@ -1811,6 +2117,7 @@ def restream_overlay_next(slug: str):
     )
 
 @restream_bp.get("/<slug>/overlay/live-data")
+@read_only_db
 def restream_overlay_live_data(slug: str):
     db = get_db()
 
@@ -1883,6 +2190,7 @@ def restream_overlay_live_data(slug: str):
     return payload
 
 @restream_bp.get("/<slug>/overlay/interview")
+@read_only_db
 def restream_overlay_interview(slug: str):
     db = get_db()
 
@@ -1948,6 +2256,7 @@ def restream_overlay_interview(slug: str):
     )
 
 @restream_bp.get("/<slug>/overlay/interview/data")
+@read_only_db
 def restream_overlay_interview_data(slug: str):
     db = get_db()
 
@@ -0,0 +1,124 @@
+"""
+Lignes SQL typées : résultat de requête -> dataclasses à __slots__.
+
+Responsabilités :
+- fetch_rows / fetch_row : exécuter une requête et construire
+  directement les objets du type demandé (tuples bruts, sans
+  sqlite3.Row puis dict(row))
+- correspondance colonnes -> champs calculée une fois par
+  (type de ligne, colonnes de la requête), puis gardée en cache
+
+Un type de ligne = @dataclass(slots=True) qui hérite de Row.
+Les champs sans défaut viennent de la requête (nom de colonne ou
+alias SQL) ; les champs avec défaut, en fin de classe, peuvent
+manquer dans la requête et sont remplis par l'appelant
+(ex. display_name traduit).
+
+Les templates gardent l'accès par attribut (tournament.name) ;
+row["name"] reste possible pour le code écrit pour sqlite3.Row.
+
+NE FAIT PAS :
+- écrire en base
+- convertir / valider les valeurs (SQLite ne type pas les colonnes)
+"""
+
+from dataclasses import MISSING, fields
+from itertools import starmap
+from operator import itemgetter
+from typing import Callable, List, Optional, Tuple, Type, TypeVar
+
+from app.database import get_db
+
+
+R = TypeVar("R", bound="Row")
+
+
+class Row:
+    """
+    Base des types de ligne : accès row["colonne"] comme sqlite3.Row.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+# ======================================================================
+# Correspondance colonnes -> champs
+# ======================================================================
+
+# (type de ligne, colonnes) -> extracteur (None = colonnes déjà dans l'ordre)
+_column_maps = {}
+
+
+def _build_column_map(row_type: type, columns: Tuple[str, ...]) -> Optional[Callable]:
+    index = {name: i for i, name in enumerate(columns)}
+    positions = []
+    omitted = None
+
+    for f in fields(row_type):
+        if f.name in index:
+            if omitted is not None:
+                raise TypeError(
+                    f"{row_type.__name__}: colonne '{f.name}' après le champ "
+                    f"non sélectionné '{omitted}'"
+                )
+            positions.append(index[f.name])
+        elif f.default is MISSING and f.default_factory is MISSING:
+            raise TypeError(f"{row_type.__name__}: colonne '{f.name}' absente de la requête")
+        elif omitted is None:
+            omitted = f.name
+
+    if positions == list(range(len(columns))):
+        return None
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda values: (values[position],)
+    return itemgetter(*positions)
+
+
+def _column_map(row_type: type, description) -> Optional[Callable]:
+    key = (row_type, tuple(d[0] for d in description))
+    try:
+        return _column_maps[key]
+    except KeyError:
+        column_map = _column_maps[key] = _build_column_map(row_type, key[1])
+        return column_map
+
+
+# ======================================================================
+# API
+# ======================================================================
+
+def _execute(row_type: type, sql: str, params, db):
+    cursor = (db or get_db()).execute(sql, params)
+    # tuples bruts : la ligne est construite une seule fois, par le type
+    cursor.row_factory = None
+    return cursor, _column_map(row_type, cursor.description)
+
+
+def fetch_rows(row_type: Type[R], sql: str, params=(), db=None) -> List[R]:
+    """
+    Toutes les lignes de la requête, en objets row_type.
+    """
+    cursor, column_map = _execute(row_type, sql, params, db)
+
+    if column_map is None:
+        return list(starmap(row_type, cursor))
+    return list(starmap(row_type, map(column_map, cursor)))
+
+
+def fetch_row(row_type: Type[R], sql: str, params=(), db=None) -> Optional[R]:
+    """
+    Première ligne de la requête en objet row_type (None si aucune).
+    """
+    cursor, column_map = _execute(row_type, sql, params, db)
+
+    values = cursor.fetchone()
+    if values is None:
+        return None
+    return row_type(*(values if column_map is None else column_map(values)))
@@ -0,0 +1,224 @@
+"""
+Instrumentation SQL par requête HTTP (opt-in : SQL_PROFILING=1).
+
+Responsabilités :
+- envelopper la connexion rendue par get_db : nombre de requêtes,
+  temps total / max, empreintes des requêtes répétées
+- signaler les N+1 probables (même empreinte exécutée au moins
+  SQL_N_PLUS_ONE_THRESHOLD fois) dans les logs, et en debug dans
+  les en-têtes de réponse (X-SQL-*)
+- journal des requêtes lentes (> SQL_SLOW_QUERY_MS) avec leur
+  EXPLAIN QUERY PLAN : instance/logs/slow_queries.log
+
+Temps mesuré = exécution (premier pas de la requête), hors fetch.
+
+NE FAIT PAS :
+- modifier les requêtes ou leur résultat
+- tourner en production par défaut (désactivé = get_db inchangé)
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from flask import current_app, g, has_request_context, request
+
+
+# Littéraux remplacés par "?" dans les empreintes
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Une requête lente : EXPLAIN seulement sur ces instructions
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+slow_logger = logging.getLogger("app.sql.slow")
+
+
+# ======================================================================
+# Statistiques de la requête HTTP
+# ======================================================================
+
+def fingerprint(sql: str) -> str:
+    return _LITERALS.sub("?", " ".join(sql.split()))
+
+
+class QueryStats:
+    __slots__ = ("count", "total", "max", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, sql: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold: int):
+        """
+        Empreintes exécutées au moins `threshold` fois (N+1 probables),
+        de la plus répétée à la moins répétée.
+        """
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+def _log_slow(conn, sql: str, params, elapsed: float):
+    plan = []
+    if sql.lstrip().upper().startswith(_EXPLAINABLE):
+        try:
+            plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())]
+        except Exception:
+            plan = ["(plan indisponible)"]
+
+    where = f"{request.method} {request.path}" if has_request_context() else "-"
+    slow_logger.warning(
+        "%.1f ms | %s | %s | params=%.200r%s",
+        elapsed * 1000,
+        where,
+        " ".join(sql.split()),
+        params,
+        "".join(f"\n    {line}" for line in plan),
+    )
+
+
+def _timed(stats: QueryStats, conn, sql: str, params, run):
+    start = time.perf_counter()
+    try:
+        return run()
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.record(sql, elapsed)
+        if elapsed * 1000 >= current_app.config["SQL_SLOW_QUERY_MS"]:
+            _log_slow(conn, sql, params, elapsed)
+
+
+# ======================================================================
+# Proxies connexion / curseur
+# ======================================================================
+
+class InstrumentedCursor:
+    __slots__ = ("_cursor", "_conn", "_stats")
+
+    def __init__(self, cursor, conn, stats: QueryStats):
+        self._cursor = cursor
+        self._conn = conn
+        self._stats = stats
+
+    def execute(self, sql, params=()):
+        _timed(self._stats, self._conn, sql, params, lambda: self._cursor.execute(sql, params))
+        return self
+
+    def executemany(self, sql, seq):
+        _timed(self._stats, self._conn, sql, None, lambda: self._cursor.executemany(sql, seq))
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    Même interface que sqlite3.Connection pour le code appelant ;
+    `raw` = connexion du pool (rendue telle quelle dans close_db).
+    """
+
+    __slots__ = ("raw", "stats")
+
+    def __init__(self, conn, stats: QueryStats):
+        self.raw = conn
+        self.stats = stats
+
+    def execute(self, sql, params=()):
+        return _timed(self.stats, self.raw, sql, params, lambda: self.raw.execute(sql, params))
+
+    def executemany(self, sql, seq):
+        return _timed(self.stats, self.raw, sql, None, lambda: self.raw.executemany(sql, seq))
+
+    def executescript(self, script):
+        return _timed(self.stats, self.raw, script, None, lambda: self.raw.executescript(script))
+
+    def cursor(self):
+        return InstrumentedCursor(self.raw.cursor(), self.raw, self.stats)
+
+    def __enter__(self):
+        self.raw.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.raw.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def instrument(conn) -> InstrumentedConnection:
+    """
+    Enveloppe la connexion de la requête (appelé par get_db).
+    """
+    stats = g.get("sql_stats")
+    if stats is None:
+        stats = g.sql_stats = QueryStats()
+    return InstrumentedConnection(conn, stats)
+
+
+# ======================================================================
+# Intégration Flask
+# ======================================================================
+
+def init_sql_profiling(app):
+    """
+    Branche le rapport de fin de requête et le journal des requêtes
+    lentes. Sans effet si SQL_PROFILING est désactivé.
+    """
+    if not app.config.get("SQL_PROFILING"):
+        return
+
+    log_dir = Path(app.instance_path) / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    if not slow_logger.handlers:
+        handler = logging.FileHandler(log_dir / "slow_queries.log", encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_logger.addHandler(handler)
+        slow_logger.setLevel(logging.WARNING)
+        slow_logger.propagate = False
+
+    threshold = app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+
+    @app.after_request
+    def sql_profiling_headers(response):
+        stats = g.get("sql_stats")
+        if stats is None or not app.debug:
+            return response
+
+        response.headers["X-SQL-Queries"] = str(stats.count)
+        response.headers["X-SQL-Time-Ms"] = f"{stats.total * 1000:.1f}"
+        response.headers["X-SQL-Max-Ms"] = f"{stats.max * 1000:.1f}"
+
+        repeated = stats.repeated(threshold)
+        if repeated:
+            response.headers["X-SQL-N-Plus-One"] = f"{len(repeated)} pattern(s), max {repeated[0][1]}x"
+        return response
+
+    @app.teardown_request
+    def sql_profiling_report(exc=None):
+        # Après le streaming éventuel (SSE) : toutes les requêtes comptées
+        stats = g.get("sql_stats")
+        if stats is None or not stats.count:
+            return
+
+        where = f"{request.method} {request.path}"
+        app.logger.info(
+            "SQL %s : %s requête(s), %.1f ms (max %.1f ms)",
+            where, stats.count, stats.total * 1000, stats.max * 1000,
+        )
+
+        for sql, count in stats.repeated(threshold):
+            app.logger.warning("N+1 probable sur %s : %sx %s", where, count, sql)
@@ -6,6 +6,9 @@
 
 const currentIndicesState = {};
 
+// Version de chaque catégorie (concurrence optimiste côté serveur)
+const currentIndicesVersion = {};
+
 
 /* =========================================================
    UTILITAIRES
@@ -113,6 +116,11 @@ document.addEventListener("DOMContentLoaded", () => {
                 textarea.value = itemsToLines(currentIndicesState[category]).join("\n");
             }
 
+            // Version sur laquelle l'édition se base
+            if (currentIndicesVersion[category] !== undefined) {
+                form.dataset.version = currentIndicesVersion[category];
+            }
+
             form.classList.remove("hidden");
         });
     });
@@ -151,10 +159,22 @@ document.addEventListener("DOMContentLoaded", () => {
                     {
                         method: "POST",
                         headers: { "Content-Type": "application/json" },
-                        body: JSON.stringify({ category, lines })
+                        body: JSON.stringify({
+                            category,
+                            lines,
+                            version: Number(form.dataset.version || 0)
+                        })
                     }
                 );
 
+                if (res.status === 409) {
+                    // Catégorie modifiée entre-temps : on affiche l'état courant
+                    const data = await res.json();
+                    applyCategoryState(data.category, data.items || [], data.version);
+                    alert("Cette catégorie a été modifiée entre-temps. Vérifiez puis enregistrez à nouveau.");
+                    return;
+                }
+
                 if (!res.ok) {
                     throw new Error("Erreur serveur");
                 }
@@ -170,6 +190,46 @@ document.addEventListener("DOMContentLoaded", () => {
     });
 
 
+    /* ---------- ANNULATION DERNIÈRE MODIFICATION ---------- */
+
+    const undoBtn = document.getElementById("undo-btn");
+    if (undoBtn) {
+        undoBtn.addEventListener("click", async () => {
+            const slug = getRestreamSlug();
+
+            try {
+                const res = await fetch(
+                    `/restream/${slug}/indices/undo`,
+                    { method: "POST" }
+                );
+
+                if (res.status === 404) {
+                    alert("Aucune modification à annuler.");
+                    return;
+                }
+
+                const data = await res.json();
+
+                if (res.status === 409) {
+                    applyCategoryState(data.category, data.items || [], data.version);
+                    alert("Cette catégorie a été modifiée depuis. Annulation impossible.");
+                    return;
+                }
+
+                if (!res.ok) {
+                    throw new Error("Erreur annulation");
+                }
+
+                applyCategoryState(data.category, data.items || [], data.version);
+
+            } catch (err) {
+                console.error(err);
+                alert("Impossible d'annuler la modification.");
+            }
+        });
+    }
+
+
     /* ---------- RESET GLOBAL ---------- */
 
     const resetBtn = document.getElementById("reset-all-btn");
@@ -203,6 +263,31 @@ document.addEventListener("DOMContentLoaded", () => {
 });
 
 
+/* =========================================================
+   APPLICATION D'UN ÉTAT DE CATÉGORIE (SSE / conflit)
+========================================================= */
+
+function applyCategoryState(key, items, version) {
+    // Mise à jour de la source de vérité
+    currentIndicesState[key] = items;
+    currentIndicesVersion[key] = version || 0;
+
+    const lines = itemsToLines(items);
+    updateCategoryView(key, lines);
+
+    // Si le formulaire de cette catégorie est ouvert, on resynchronise
+    const form = document.querySelector(
+        `.edit-form[data-category="${key}"]:not(.hidden)`
+    );
+
+    if (form) {
+        const textarea = form.querySelector("textarea");
+        textarea.value = lines.join("\n");
+        form.dataset.version = currentIndicesVersion[key];
+    }
+}
+
+
 /* =========================================================
    SERVER-SENT EVENTS
 ========================================================= */
@@ -211,28 +296,23 @@ function initSSE() {
     const slug = getRestreamSlug();
     const source = new EventSource(`/restream/${slug}/indices/stream`);
 
+    // Document complet : connexion / reconnexion, changement de template
     source.onmessage = (event) => {
         try {
             const data = JSON.parse(event.data);
 
             for (const key in data.categories) {
-                const items = data.categories[key].items || [];
-
-                // Mise à jour de la source de vérité
-                currentIndicesState[key] = items;
-
-                const lines = itemsToLines(items);
-                updateCategoryView(key, lines);
-
-                // Si le formulaire de cette catégorie est ouvert, on resynchronise
-                const form = document.querySelector(
-                    `.edit-form[data-category="${key}"]:not(.hidden)`
-                );
-
-                if (form) {
-                    const textarea = form.querySelector("textarea");
-                    textarea.value = lines.join("\n");
+                const category = data.categories[key];
+
+                // Déjà affichée dans cette version : pas de re-rendu
+                if (
+                    currentIndicesState[key] !== undefined &&
+                    currentIndicesVersion[key] === (category.version || 0)
+                ) {
+                    continue;
                 }
+
+                applyCategoryState(key, category.items || [], category.version);
             }
 
         } catch (err) {
@@ -240,6 +320,16 @@ function initSSE() {
         }
     };
 
+    // Delta : une seule catégorie modifiée
+    source.addEventListener("category", (event) => {
+        try {
+            const delta = JSON.parse(event.data);
+            applyCategoryState(delta.key, delta.items || [], delta.version);
+        } catch (err) {
+            console.error("Erreur SSE :", err);
+        }
+    });
+
     source.onerror = () => {
         console.warn("SSE déconnecté — reconnexion automatique par le navigateur");
     };
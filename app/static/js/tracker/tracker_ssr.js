@@ -1,8 +1,18 @@
 /* DEV Tracker interactions (with SSE)
  * - multi-root init
  * - POST updates per slot (only if can_edit)
+ *   - only changed fields are sent ({slot, version, changes})
+ *   - server merges non-conflicting edits, 409 + current state on true conflict
+ *   - with TRACKER_OPS_URL: clicks from every slot are coalesced over a short
+ *     window and sent as ONE ordered batch (one session write, one SSE frame)
  * - SSE stream receives full session JSON (participants[]) and updates UI
  * - avoids feedback loops (SSE apply never triggers POST)
+ * - frames older than the last seen session version are ignored,
+ *   frames with the already applied version are skipped
+ * - remote states are diffed per slot: only changed nodes are patched,
+ *   DOM writes batched in requestAnimationFrame
+ * - sprites come from the tracker atlas (catalog.atlas, svg viewBox)
+ *   with a per-PNG fallback when no atlas is available
  *
  * + ADMIN PRESET MODE
  *   - no SSE
@@ -15,6 +25,13 @@
   const GLOBAL_CATALOG = window.TRACKER_CATALOG || {};
   const STREAM_URL = window.TRACKER_STREAM_URL || null;
 
+  // Last session version seen (SSE or POST response), sent as base version
+  let sessionVersion = Number(window.TRACKER_SESSION_VERSION || 0) || 0;
+
+  // Session rebuilt server-side (missing, tracker type changed): new
+  // generation, its versions may restart below sessionVersion
+  let sessionGeneration = window.TRACKER_SESSION_GENERATION ?? null;
+
   // ------------------------------------------------------------
   // ADMIN PRESET MODE (generic)
   // ------------------------------------------------------------
@@ -24,6 +41,71 @@
   const roots = document.querySelectorAll("[data-tracker-root]");
   if (!roots.length) return;
 
+  // ------------------------------------------------------------
+  // BATCHED OPS (session mode)
+  // ------------------------------------------------------------
+  const OPS_URL = IS_PRESET_MODE ? null : (window.TRACKER_OPS_URL || null);
+  const OPS_FLUSH_DELAY_MS = 150;
+
+  let _opQueue = []; // [{slot, path, value}] not yet sent, in click order
+  let _inflightOps = []; // sent, waiting for the response
+  let _opsTimer = null;
+  let _opsInflight = false;
+
+  function queueOp(op) {
+    _opQueue.push(op);
+    // Fixed window (not a debounce): a burst of clicks never delays forever
+    if (!_opsTimer) {
+      _opsTimer = setTimeout(() => {
+        _opsTimer = null;
+        void flushOps();
+      }, OPS_FLUSH_DELAY_MS);
+    }
+  }
+
+  // Ops of one slot not yet acknowledged (re-applied over remote states)
+  function unacknowledgedOps(slot) {
+    return _inflightOps.concat(_opQueue).filter((op) => op.slot === slot);
+  }
+
+  async function flushOps() {
+    if (_opsInflight || !_opQueue.length) return;
+
+    _opsInflight = true;
+    _inflightOps = _opQueue;
+    _opQueue = [];
+
+    try {
+      const res = await fetch(OPS_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ version: sessionVersion, ops: _inflightOps }),
+      });
+
+      if (res.ok || res.status === 409) {
+        const data = await res.json().catch(() => null);
+        if (res.status === 409) {
+          // True conflict: someone else changed these fields, keep theirs
+          console.warn("[tracker] conflict, batch dropped", data?.conflicts);
+        }
+        _inflightOps = [];
+        if (data) applySessionFromSse(data, true);
+      } else {
+        const txt = await res.text().catch(() => "");
+        console.warn("[tracker] batch save failed", res.status, txt);
+        _inflightOps = [];
+      }
+    } catch (e) {
+      console.warn("[tracker] batch save error", e);
+      // Network error: resend with the next batch, original order kept
+      _opQueue = _inflightOps.concat(_opQueue);
+      _inflightOps = [];
+    } finally {
+      _opsInflight = false;
+      if (_opQueue.length && !_opsTimer) void flushOps();
+    }
+  }
+
   // slot -> api
   const instancesBySlot = new Map();
 
@@ -75,9 +157,37 @@
     }
   }
 
-  function applySessionFromSse(session) {
+  // ------------------------------------------------------------
+  // DOM patch scheduler: one requestAnimationFrame for the whole page
+  // ------------------------------------------------------------
+  const _dirtyApis = new Set();
+  let _patchFrame = null;
+
+  function requestPatch(api) {
+    _dirtyApis.add(api);
+    if (_patchFrame !== null) return;
+    _patchFrame = requestAnimationFrame(() => {
+      _patchFrame = null;
+      const apis = Array.from(_dirtyApis);
+      _dirtyApis.clear();
+      apis.forEach((a) => a.flushPatches());
+    });
+  }
+
+  // force: POST responses (a 409 must overwrite optimistic local values
+  // even when the SSE frame with the same version was already applied)
+  function applySessionFromSse(session, force = false) {
     if (!session || !Array.isArray(session.participants)) return;
 
+    const version = Number(session.version || 0) || 0;
+    if ("generation" in session && session.generation !== sessionGeneration) {
+      sessionGeneration = session.generation;
+      sessionVersion = -1; // accept the new session whatever its version
+    }
+    if (version < sessionVersion) return; // stale frame
+    if (version === sessionVersion && !force) return; // already applied
+    sessionVersion = version;
+
     for (const p of session.participants) {
       const slot = Number(p?.slot);
       if (!Number.isFinite(slot)) continue;
@@ -184,8 +294,32 @@
     // When applying SSE updates, we must not POST back (avoid loops)
     let _suppressNetworkSaves = false;
 
+    // Changed fields ("items.bow" -> 2) not yet sent / currently in flight.
+    // Re-applied over remote states so local edits are never visually lost.
+    const _pendingChanges = new Map();
+    let _inflightChanges = new Map();
+
+    function setPath(obj, path, value) {
+      const keys = path.split(".");
+      let cur = obj;
+      for (const key of keys.slice(0, -1)) {
+        if (!cur[key] || typeof cur[key] !== "object") cur[key] = {};
+        cur = cur[key];
+      }
+      cur[keys[keys.length - 1]] = value;
+    }
+
+    function recordChange(path, value) {
+      if (OPS_URL) {
+        if (CAN_EDIT && !_suppressNetworkSaves) queueOp({ slot, path, value });
+        return;
+      }
+      _pendingChanges.set(path, value);
+    }
+
     function scheduleServerSave() {
       if (IS_PRESET_MODE) return; // NEW: preset admin never POST
+      if (OPS_URL) return; // batched at page level (queueOp)
       if (!UPDATE_URL) return;
       if (!CAN_EDIT) return; // NEW: viewers never POST
       if (_suppressNetworkSaves) return;
@@ -207,22 +341,45 @@
         return;
       }
 
+      if (!_pendingChanges.size) return;
+
       _inflight = true;
       _needsAnother = false;
 
+      _inflightChanges = new Map(_pendingChanges);
+      _pendingChanges.clear();
+
       try {
         const res = await fetch(UPDATE_URL, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ participant: state }),
+          body: JSON.stringify({
+            slot,
+            version: sessionVersion,
+            changes: Object.fromEntries(_inflightChanges),
+          }),
         });
 
-        if (!res.ok) {
+        if (res.ok || res.status === 409) {
+          const data = await res.json().catch(() => null);
+          if (res.status === 409) {
+            // True conflict: someone else changed these fields, keep theirs
+            console.warn("[tracker] conflict, local changes dropped", data?.conflicts);
+          }
+          _inflightChanges = new Map();
+          if (data) applySessionFromSse(data, true);
+        } else {
           const txt = await res.text().catch(() => "");
           console.warn("[tracker] server save failed", res.status, txt);
+          _inflightChanges = new Map();
         }
       } catch (e) {
         console.warn("[tracker] server save error", e);
+        // Network error: keep changes for the next attempt (newer values win)
+        for (const [path, value] of _inflightChanges) {
+          if (!_pendingChanges.has(path)) _pendingChanges.set(path, value);
+        }
+        _inflightChanges = new Map();
       } finally {
         _inflight = false;
         if (_needsAnother) {
@@ -233,10 +390,20 @@
     }
 
     // ----- Asset helpers -----
-    function buildAssetUrl(itemMeta, level) {
-      const dir = catalog.asset_dir || "";
-      const base = itemMeta.asset_base || "";
-      return `/static/${dir}/${base}${level}.png`;
+    function spriteName(itemMeta, level) {
+      return `${itemMeta.asset_base || ""}${level}.png`;
+    }
+
+    // Atlas sprite (<svg viewBox>) or standalone PNG (<img>)
+    function setSprite(el, filename) {
+      if (el.tagName.toLowerCase() === "svg") {
+        const s = catalog.atlas?.sprites?.[filename];
+        if (!s) return;
+        el.setAttribute("viewBox", `${s.x} ${s.y} ${s.w} ${s.h}`);
+        el.dataset.sprite = filename;
+        return;
+      }
+      el.src = `/static/${catalog.asset_dir || ""}/${filename}`;
     }
 
     // ----- Render helpers -----
@@ -247,10 +414,10 @@
       const level = state.items?.[itemId] ?? 0;
 
       const nodes = root.querySelectorAll(
-        `[data-item-id="${CSS.escape(itemId)}"] img`
+        `[data-item-id="${CSS.escape(itemId)}"] .tracker-sprite`
       );
-      nodes.forEach((img) => {
-        img.src = buildAssetUrl(itemMeta, level);
+      nodes.forEach((el) => {
+        setSprite(el, spriteName(itemMeta, level));
       });
 
       const wrappers = root.querySelectorAll(
@@ -274,10 +441,10 @@
         const overlay = w.querySelector(".tracker-overlay");
         if (overlay) overlay.textContent = String(value);
 
-        const img = w.querySelector("img");
-        if (img) {
+        const sprite = w.querySelector(".tracker-sprite");
+        if (sprite) {
           const itemMeta = getItemMeta(itemId);
-          if (itemMeta) img.src = buildAssetUrl(itemMeta, iconLevel);
+          if (itemMeta) setSprite(sprite, spriteName(itemMeta, iconLevel));
         }
       });
     }
@@ -292,10 +459,10 @@
       wrappers.forEach((w) => {
         w.dataset.level = String(level);
 
-        const img = w.querySelector("img");
-        if (img) {
+        const sprite = w.querySelector(".tracker-sprite");
+        if (sprite) {
           const itemMeta = getItemMeta(itemId);
-          if (itemMeta) img.src = buildAssetUrl(itemMeta, level);
+          if (itemMeta) setSprite(sprite, spriteName(itemMeta, level));
         }
 
         const overlay = w.querySelector(".tracker-overlay");
@@ -321,6 +488,7 @@
 
       idx = clamp(idx + delta, 0, values.length - 1);
       state.wallet_bonus = values[idx];
+      recordChange("wallet_bonus", state.wallet_bonus);
 
       renderWallet("wallet");
     }
@@ -419,6 +587,7 @@
       const nextVal = levels[idx];
 
       state.items[itemId] = nextVal;
+      recordChange(`items.${itemId}`, nextVal);
 
       if (meta.kind === "wallet") renderWallet(itemId);
       else renderItemSimple(itemId);
@@ -437,6 +606,7 @@
       cur = clamp(cur, minV, maxV);
 
       state.items[itemId] = cur;
+      recordChange(`items.${itemId}`, cur);
       renderCounter(itemId);
     }
 
@@ -444,6 +614,7 @@
       let cur = Number(state.dungeons?.[code] ?? 0);
       cur = clamp(cur + delta, 0, 2);
       state.dungeons[code] = cur;
+      recordChange(`dungeons.${code}`, cur);
       renderDungeon(code);
     }
 
@@ -452,6 +623,7 @@
       const next = forceValue === null ? !obj[key] : !!forceValue;
       obj[key] = next;
       state[compositeId] = obj;
+      recordChange(`${compositeId}.${key}`, next);
       renderComposite(compositeId);
     }
 
@@ -507,6 +679,19 @@
       });
     }
 
+    // Atlas pixels are loaded once and shared by every overlay
+    let atlasDataPromise = null;
+
+    function loadAtlasData() {
+      if (!atlasDataPromise) {
+        const atlas = catalog.atlas;
+        atlasDataPromise = loadImageDataFromUrl(
+          `/static/${atlas.image}?v=${atlas.hash}`
+        );
+      }
+      return atlasDataPromise;
+    }
+
     function ensureCompositeHitCache(compositeId) {
       if (compositeLoadPromises.has(compositeId)) {
         return compositeLoadPromises.get(compositeId);
@@ -517,10 +702,28 @@
         const map = new Map();
 
         await Promise.all(
-          overlays.map(async (imgEl) => {
-            const key = imgEl.dataset.overlayKey;
-            const src = imgEl.currentSrc || imgEl.src;
-            if (!key || !src) return;
+          overlays.map(async (el) => {
+            const key = el.dataset.overlayKey;
+            if (!key) return;
+
+            // Atlas: same pixels, read through the sprite rectangle
+            if (el.tagName.toLowerCase() === "svg") {
+              const s = catalog.atlas?.sprites?.[el.dataset.sprite];
+              if (!s) return;
+              const atlasData = await loadAtlasData();
+              map.set(key, {
+                w: s.w,
+                h: s.h,
+                data: atlasData.data,
+                offX: s.x,
+                offY: s.y,
+                stride: atlasData.w,
+              });
+              return;
+            }
+
+            const src = el.currentSrc || el.src;
+            if (!src) return;
             const entry = await loadImageDataFromUrl(src);
             map.set(key, entry);
           })
@@ -564,7 +767,10 @@
     }
 
     function alphaAt(entry, px, py) {
-      const idx = (py * entry.w + px) * 4 + 3;
+      const stride = entry.stride || entry.w;
+      const x = px + (entry.offX || 0);
+      const y = py + (entry.offY || 0);
+      const idx = (y * stride + x) * 4 + 3;
       return entry.data[idx] || 0;
     }
 
@@ -653,6 +859,7 @@
 
 	  const cur = Number(state.gomode || 0) ? 1 : 0;
 	  state.gomode = cur ? 0 : 1;
+	  recordChange("gomode", state.gomode);
 
 	  renderGoMode();
 	  afterChangePersist();
@@ -690,6 +897,90 @@
       root.addEventListener("contextmenu", (ev) => ev.preventDefault());
     }
 
+    // --- Keyed patching (remote states) ---
+    // Render keys: "item:<id>", "dungeon:<code>", "composite:<id>", "wallet", "gomode"
+    const _dirtyKeys = new Set();
+
+    // Clés présentes d'un côté ou de l'autre : une clé supprimée à distance
+    // doit aussi être re-rendue (avec sa valeur par défaut)
+    function unionKeys(a, b) {
+      return new Set([...Object.keys(a), ...Object.keys(b)]);
+    }
+
+    // Valeur absente = défaut des fonctions de rendu (wallet : 1, sinon 0)
+    function itemValue(items, itemId) {
+      const fallback = getItemMeta(itemId)?.kind === "wallet" ? 1 : 0;
+      return Number(items[itemId] ?? fallback);
+    }
+
+    function markDiff(prev, next) {
+      const prevItems = prev.items || {};
+      const nextItems = next.items || {};
+      for (const itemId of unionKeys(prevItems, nextItems)) {
+        if (itemValue(prevItems, itemId) !== itemValue(nextItems, itemId)) {
+          _dirtyKeys.add(`item:${itemId}`);
+        }
+      }
+
+      const prevDungeons = prev.dungeons || {};
+      const nextDungeons = next.dungeons || {};
+      for (const code of unionKeys(prevDungeons, nextDungeons)) {
+        if (Number(prevDungeons[code] ?? 0) !== Number(nextDungeons[code] ?? 0)) {
+          _dirtyKeys.add(`dungeon:${code}`);
+        }
+      }
+
+      for (const [compositeId, itemMeta] of itemsById.entries()) {
+        if (itemMeta.kind !== "composite") continue;
+        const p = prev[compositeId] || {};
+        const n = next[compositeId] || {};
+        for (const key of unionKeys(p, n)) {
+          if (!!p[key] !== !!n[key]) {
+            _dirtyKeys.add(`composite:${compositeId}`);
+            break;
+          }
+        }
+      }
+
+      if (Number(prev.wallet_bonus ?? 0) !== Number(next.wallet_bonus ?? 0)) _dirtyKeys.add("wallet");
+      if (Number(prev.gomode || 0) !== Number(next.gomode || 0)) _dirtyKeys.add("gomode");
+    }
+
+    function renderGoOverlay() {
+      // --- Overlay Go Mode ---
+      const goEl = document.querySelector(
+        `.overlay-go-mode[data-slot="${slot}"]`
+      );
+
+      if (goEl) {
+        goEl.classList.toggle("is-active", Number(state.gomode) === 1);
+      }
+    }
+
+    function flushPatches() {
+      for (const key of _dirtyKeys) {
+        const [type, id] = key.split(":");
+
+        if (type === "item") {
+          const meta = getItemMeta(id);
+          if (!meta || meta.kind === "composite") continue;
+          if (meta.kind === "counter") renderCounter(id);
+          else if (meta.kind === "wallet") renderWallet(id);
+          else renderItemSimple(id);
+        } else if (type === "dungeon") {
+          renderDungeon(id);
+        } else if (type === "composite") {
+          renderComposite(id);
+        } else if (type === "wallet") {
+          renderWallet("wallet");
+        } else if (type === "gomode") {
+          renderGoMode();
+          renderGoOverlay();
+        }
+      }
+      _dirtyKeys.clear();
+    }
+
     // --- Public API for SSE apply ---
     function applyRemoteParticipant(participant) {
       if (!participant || typeof participant !== "object") return;
@@ -699,21 +990,18 @@
 
       _suppressNetworkSaves = true;
       try {
-        state = JSON.parse(JSON.stringify(participant));
-        renderAll();
-		
-		// --- Overlay Go Mode ---
-		const goEl = document.querySelector(
-		  `.overlay-go-mode[data-slot="${participant.slot}"]`
-		);
-
-		if (goEl) {
-		  goEl.classList.toggle(
-			"is-active",
-			Number(participant.gomode) === 1
-		  );
-		}
-		
+        const next = JSON.parse(JSON.stringify(participant));
+
+        // Local edits not yet acknowledged stay visible
+        for (const [path, value] of _inflightChanges) setPath(next, path, value);
+        for (const [path, value] of _pendingChanges) setPath(next, path, value);
+        for (const op of unacknowledgedOps(slot)) setPath(next, op.path, op.value);
+
+        // Only nodes whose value changed are patched (next animation frame)
+        markDiff(state, next);
+        state = next;
+        if (_dirtyKeys.size) requestPatch(api);
+
         // Keep localStorage in sync (even in read-only, helps refresh keep last seen state)
         saveLocal();
       } finally {
@@ -728,6 +1016,7 @@
       exportPresetState();
     }
 
-    return { slot, applyRemoteParticipant, toggleGoMode };
+    const api = { slot, applyRemoteParticipant, flushPatches, toggleGoMode };
+    return api;
   }
 })();
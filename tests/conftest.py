@@ -0,0 +1,85 @@
+"""
+Fixtures communes : base SQLite de test créée depuis
+instance/database.sql puis migrée, application Flask branchée dessus.
+
+Lancement : python -m pytest -q (depuis la racine du dépôt).
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.migrations import run_migrations
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_SQL = ROOT / "instance" / "database.sql"
+
+ADMIN_PASSWORD = "admin-pw"
+
+
+def build_database(db_path: Path) -> Path:
+    """
+    Base vide au schéma de production : dump + migrations.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA_SQL.read_text(encoding="utf-8"))
+    finally:
+        conn.close()
+
+    run_migrations(str(db_path))
+    return db_path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return build_database(tmp_path / "database.db")
+
+
+@pytest.fixture
+def app(db_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "test")
+    # Pas de migration / jobs de fond sur la vraie base instance/
+    monkeypatch.setenv("DB_MIGRATE_ON_STARTUP", "0")
+    monkeypatch.setenv("SESSION_ARCHIVE_INTERVAL_HOURS", "0")
+    monkeypatch.setenv("BACKUP_INTERVAL_HOURS", "0")
+
+    from app import create_app
+
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        DATABASE=str(db_path),
+        DATABASE_READONLY=str(db_path),
+    )
+    # Sessions tracker / indices, historique : hors du vrai instance/
+    instance = tmp_path / "instance"
+    for folder in ("trackers", "indices/sessions"):
+        (instance / folder).mkdir(parents=True)
+    app.instance_path = str(instance)
+    app.config["BACKUP_DIR"] = str(instance / "backups")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO users (username, password_hash, role, created_at) "
+        "VALUES ('admin', ?, 'admin', datetime('now'))",
+        (generate_password_hash(ADMIN_PASSWORD),),
+    )
+    conn.commit()
+    conn.close()
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    client.post("/login", data={"username": "admin", "password": ADMIN_PASSWORD})
+    return client
@@ -0,0 +1,109 @@
+"""
+Sauvegardes de instance/ (app/backups.py) : création, vérification,
+restauration, une seule sauvegarde à la fois.
+"""
+
+import io
+import json
+import sqlite3
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from app import backups
+from app.backups import (
+    MANIFEST_NAME, BackupInProgress, create_backup, list_backups, restore_backup, verify_backup,
+)
+
+
+@pytest.fixture
+def instance(app):
+    with app.app_context():
+        root = Path(app.instance_path)
+
+        conn = sqlite3.connect(root / "trackers" / "sessions.db")
+        conn.execute("CREATE TABLE t (v TEXT)")
+        conn.execute("INSERT INTO t VALUES ('avant')")
+        conn.commit()
+        conn.close()
+
+        (root / "indices" / "sessions" / "rs.json").write_text('{"version": 1}', encoding="utf-8")
+        yield root
+
+
+def _rewrite(archive: Path, contents: dict, manifest: dict) -> Path:
+    """
+    Archive reconstruite avec d'autres contenus / manifest.
+    """
+    target = archive.with_name("backup-tampered.tar.gz")
+    with tarfile.open(target, "w:gz") as tar:
+        for name, data in {**contents, MANIFEST_NAME: json.dumps(manifest).encode()}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return target
+
+
+def test_create_verify_restore_round_trip(instance):
+    archive = create_backup()
+    assert list_backups() == [archive]
+    assert verify_backup(archive) == []
+
+    (instance / "indices" / "sessions" / "rs.json").write_text('{"version": 9}', encoding="utf-8")
+    conn = sqlite3.connect(instance / "trackers" / "sessions.db")
+    conn.execute("UPDATE t SET v = 'après'")
+    conn.commit()
+    conn.close()
+
+    assert restore_backup(archive) == 2
+
+    assert json.loads((instance / "indices" / "sessions" / "rs.json").read_text()) == {"version": 1}
+    conn = sqlite3.connect(instance / "trackers" / "sessions.db")
+    assert conn.execute("SELECT v FROM t").fetchone()[0] == "avant"
+    conn.close()
+
+
+def test_verify_reports_tampered_sha256(instance):
+    archive = create_backup()
+    manifest, contents = backups._read_archive(archive)
+    contents["indices/sessions/rs.json"] = b'{"version": 2}'
+
+    tampered = _rewrite(archive, contents, manifest)
+
+    assert verify_backup(tampered) == ["indices/sessions/rs.json : sha256 différent du manifest"]
+    with pytest.raises(ValueError):
+        restore_backup(tampered)
+
+
+def test_verify_reports_integrity_check_failure(instance, monkeypatch):
+    archive = create_backup()
+    monkeypatch.setattr(backups, "_sqlite_integrity", lambda data: "page 2 corrompue")
+
+    problems = verify_backup(archive)
+
+    assert problems == ["trackers/sessions.db : integrity_check = page 2 corrompue"]
+
+
+def test_restore_refuses_paths_outside_instance(instance):
+    archive = create_backup()
+    manifest, contents = backups._read_archive(archive)
+
+    data = b'{"x": 1}'
+    name = "../evil.json"
+    contents[name] = data
+    manifest["files"][name] = {"kind": "json", "size": len(data), "sha256": backups._sha256(data)}
+    tampered = _rewrite(archive, contents, manifest)
+
+    assert verify_backup(tampered) == []
+    with pytest.raises(ValueError, match="hors de instance"):
+        restore_backup(tampered)
+    assert not (instance.parent / "evil.json").exists()
+
+
+def test_one_backup_at_a_time(instance):
+    with backups._backups_lock(backups.backups_dir()):
+        with pytest.raises(BackupInProgress):
+            create_backup()
+
+    assert list_backups() == []
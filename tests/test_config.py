@@ -0,0 +1,28 @@
+"""
+Valeurs par défaut de la configuration (app/__init__.py).
+"""
+
+import pytest
+
+
+@pytest.fixture
+def default_app(monkeypatch):
+    for name in ("TRACKER_PERSIST_INTERVAL", "INDICES_PERSIST_INTERVAL"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("SECRET_KEY", "test")
+    monkeypatch.setenv("DB_MIGRATE_ON_STARTUP", "0")
+    monkeypatch.setenv("SESSION_ARCHIVE_INTERVAL_HOURS", "0")
+    monkeypatch.setenv("BACKUP_INTERVAL_HOURS", "0")
+
+    from app import create_app
+    return create_app()
+
+
+def test_tracker_write_behind_is_opt_in(default_app):
+    # État en mémoire du process : correct avec un seul worker seulement
+    assert default_app.config["TRACKER_PERSIST_INTERVAL"] == 0
+
+
+def test_indices_memory_store_is_opt_in(default_app):
+    # Versions par catégorie vérifiées sur la copie du process : un seul worker
+    assert default_app.config["INDICES_PERSIST_INTERVAL"] == 0
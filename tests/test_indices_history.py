@@ -0,0 +1,91 @@
+"""
+Compaction de l'historique des indices (app/modules/indices/history.py) :
+les rafales de corrections sont fusionnées sans perdre l'heure de
+révélation ni les entrées visées par un undo.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.modules.indices import history
+from app.modules.indices.history import KIND_EDIT, KIND_RESET, KIND_UNDO
+
+
+@pytest.fixture
+def clock(app, monkeypatch):
+    """
+    Horloge du journal : entrées datées de 2 jours, avancée à la main.
+    """
+    now = {"at": datetime.now(timezone.utc) - timedelta(days=2)}
+
+    def tick(seconds=0):
+        now["at"] += timedelta(seconds=seconds)
+
+    monkeypatch.setattr(history, "_now", lambda: now["at"].isoformat(timespec="milliseconds"))
+    with app.app_context():
+        yield tick
+
+
+def _edit(category, items):
+    return history.record_change("rs", KIND_EDIT, category=category, items=[items])
+
+
+def _timeline():
+    return [(e["id"], e["kind"], e["category"], e["at"]) for e in history.export_history("rs")]
+
+
+def test_burst_keeps_last_items_at_first_time(clock):
+    first = _edit("cat", ["a"])
+    first_at = _timeline()[0][3]
+    clock(10)
+    _edit("cat", ["b"])
+    clock(10)
+    last = _edit("cat", ["c"])
+
+    assert history.compact_history() == 2
+
+    entries = history.export_history("rs")
+    assert [(e["id"], e["items"], e["at"]) for e in entries] == [(last, [["c"]], first_at)]
+    assert first < last
+
+
+def test_undo_reset_and_other_category_split_bursts(clock):
+    _edit("cat", ["a"])
+    clock(5)
+    history.record_change("rs", KIND_RESET)
+    clock(5)
+    _edit("cat", ["b"])
+    clock(5)
+    _edit("other", ["x"])
+    clock(5)
+    _edit("cat", ["c"])
+    before = _timeline()
+
+    assert history.compact_history() == 0
+    assert _timeline() == before
+
+
+def test_reverted_edits_are_kept(clock):
+    first = _edit("cat", ["a"])
+    clock(5)
+    second = _edit("cat", ["b"])
+    clock(5)
+    history.record_change("rs", KIND_UNDO, category="cat", reverts=second)
+    clock(5)
+    history.record_change("rs", KIND_UNDO, category="cat", reverts=first)
+
+    assert history.compact_history() == 0
+
+    ids = {entry_id for entry_id, _, _, _ in _timeline()}
+    reverts = {e["reverts"] for e in history.export_history("rs") if e["reverts"]}
+    assert reverts == {first, second} and reverts <= ids
+
+
+def test_recent_entries_are_not_compacted(app):
+    with app.app_context():
+        _edit("cat", ["a"])
+        _edit("cat", ["b"])
+
+        assert history.compact_history() == 0
+        assert len(history.export_history("rs")) == 2
@@ -0,0 +1,112 @@
+"""
+Sessions d'indices (app/modules/indices/sessions.py) en mode direct
+(INDICES_PERSIST_INTERVAL = 0) : ordre des verrous, suppression,
+version lue par les flux SSE.
+"""
+
+import threading
+
+import pytest
+from flask import current_app
+
+from app.modules.indices import sessions
+from app.modules.indices.sessions import (
+    delete_indices_session, indices_session_path, indices_session_version,
+    reset_indices_session, update_indices_category,
+)
+
+
+def _template():
+    return {"categories": {"cat": {"columns": 1, "items": []}}}
+
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        reset_indices_session("rs", _template())
+        yield "rs"
+
+
+def test_version_reads_file_only_when_replaced(session, monkeypatch):
+    reads = []
+    read_json = sessions._read_json
+    monkeypatch.setattr(sessions, "_read_json", lambda path: reads.append(path) or read_json(path))
+
+    assert indices_session_version(session) == 1
+    assert indices_session_version(session) == 1
+    assert len(reads) == 1
+
+    update_indices_category(session, "cat", ["a"], base_version=1)
+
+    assert indices_session_version(session) == 2
+
+
+def test_reset_waits_on_flock_without_holding_live_cond(session):
+    path = indices_session_path(session)
+    started = threading.Event()
+    done = threading.Event()
+
+    def reset(app):
+        with app.app_context():
+            started.set()
+            reset_indices_session(session, _template())
+            done.set()
+
+    with sessions._session_lock(path):
+        worker = threading.Thread(target=reset, args=(current_app._get_current_object(),))
+        worker.start()
+        started.wait(1)
+
+        # Reset bloqué sur le flock : les waiters SSE ne doivent pas l'être
+        assert not done.wait(0.2)
+        assert sessions._live_cond.acquire(timeout=1)
+        sessions._live_cond.release()
+
+    worker.join(2)
+    assert done.is_set()
+    assert indices_session_version(session) == 2
+
+
+def test_delete_keeps_lock_file(session):
+    path = indices_session_path(session)
+    lock_path = path.with_name(path.name + ".lock")
+    assert lock_path.exists()
+
+    delete_indices_session(session)
+
+    assert not path.exists()
+    assert lock_path.exists()
+    assert indices_session_version(session) is None
+
+
+def test_sse_frames_follow_recreated_session(session):
+    from app.restream import routes
+
+    first = routes._indices_frame(session, "none", "fr", sessions.load_indices_session(session))
+    assert session in routes._INDICES_FRAMES
+
+    # Slug réutilisé : la nouvelle session repart à la version 1
+    delete_indices_session(session)
+    assert session not in routes._INDICES_FRAMES
+
+    template = _template()
+    template["categories"]["cat"]["items"] = [["nouveau"]]
+    reset_indices_session(session, template)
+    current = sessions.load_indices_session(session)
+    assert current["version"] == 1
+
+    frame = routes._indices_frame(session, "none", "fr", current)
+    assert frame != first and "nouveau" in frame
+
+
+def test_sse_frames_cache_is_bounded(app, monkeypatch):
+    from app.restream import routes
+
+    monkeypatch.setattr(routes, "INDICES_FRAMES_MAX_SLUGS", 3)
+    with app.app_context():
+        for index in range(5):
+            indices = dict(_template(), version=1, generation=str(index))
+            routes._indices_frame(f"rs{index}", "none", "fr", indices)
+
+    assert list(routes._INDICES_FRAMES)[-3:] == ["rs2", "rs3", "rs4"]
+    assert len(routes._INDICES_FRAMES) <= 3
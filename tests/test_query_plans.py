@@ -0,0 +1,160 @@
+"""
+Index des requêtes fréquentes (migrations 002 / 005) : EXPLAIN QUERY PLAN
+des requêtes réellement exécutées par les routes clés.
+
+Les requêtes sont capturées (trace SQLite, paramètres inclus) sur les
+connexions du pool pendant l'appel de la route, puis expliquées sur la
+base migrée.
+"""
+
+import re
+import sqlite3
+
+import pytest
+
+from app import database
+
+
+# Tables lues à chaque affichage : jamais de SCAN complet
+HOT_TABLES = {
+    "matches", "match_teams", "series", "restreams", "translations",
+    "tournament_phases", "tournament_teams", "group_standings",
+}
+
+# Clé de lookup des traductions (clé primaire, ou index de la migration 002)
+TRANSLATION_INDEXES = {"sqlite_autoindex_translations_1", "idx_translations_lookup"}
+
+_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SQL_KEYWORDS = {"on", "where", "left", "join", "inner", "order", "group", "limit", "using"}
+
+
+@pytest.fixture
+def seeded(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Tournoi', 'active', 1, 't1', 'internal');
+        INSERT INTO players (name) VALUES ('A'), ('B');
+        INSERT INTO tournament_phases (tournament_id, name, type, position)
+            VALUES (1, 'Groupes', 'groups', 1), (1, 'Bracket', 'bracket_simple_elim', 2);
+        INSERT INTO tournament_teams (tournament_id, team_id, group_name)
+            VALUES (1, 1, 'G1'), (1, 2, 'G1');
+        INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, stage, best_of, round)
+            VALUES (1, 1, 1, 2, 'G1 M1', 1, 1), (1, 2, 1, 2, '1', 1, 1);
+        INSERT INTO matches (series_id, tournament_id, scheduled_at)
+            VALUES (1, 1, datetime('now', '+1 day'));
+        INSERT INTO matches (series_id, tournament_id, is_completed) VALUES (NULL, 1, 1);
+        INSERT INTO match_teams (match_id, team_id) VALUES (1, 1), (1, 2), (2, 1), (2, 2);
+        INSERT INTO restreams (slug, title, created_by, match_id, is_active, indices_template)
+            VALUES ('rs', 'RS', 1, 1, 1, 'ssr-s4');
+        INSERT INTO group_standings (phase_id, group_name, team_id, wins, played, rank)
+            VALUES (1, 'G1', 1, 0, 1, 1), (1, 'G1', 2, 0, 1, 2);
+        """
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def captured_sql(monkeypatch):
+    statements = []
+    open_connection = database.ConnectionPool._open
+
+    def _open(self):
+        conn = open_connection(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(database.ConnectionPool, "_open", _open)
+    return statements
+
+
+def _plans(db_path, statements):
+    """
+    [(sql, [détail du plan, ...]), ...] pour les SELECT capturés.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return [
+            (sql, [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)])
+            for sql in statements
+            if sql.lstrip().upper().startswith(("SELECT", "WITH"))
+        ]
+    finally:
+        conn.close()
+
+
+def _tables_by_alias(sql):
+    aliases = {}
+    for table, alias in _ALIAS.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _route_plans(client, db_path, statements, url):
+    statements.clear()
+    assert client.get(url).status_code == 200
+    return _plans(db_path, statements)
+
+
+def _assert_no_hot_scan(plans):
+    for sql, details in plans:
+        aliases = _tables_by_alias(sql)
+        for detail in details:
+            match = re.match(r"SCAN (\w+)", detail)
+            if match and aliases.get(match.group(1)) in HOT_TABLES:
+                pytest.fail(f"{detail}\n{' '.join(sql.split())}")
+
+
+def _indexes_used(plans):
+    return {
+        match.group(1)
+        for _, details in plans
+        for detail in details
+        for match in re.finditer(r"INDEX (\w+)", detail)
+    }
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("/restream/planning", {"idx_matches_scheduled_at"}),
+        ("/restream/planning?tournament=1", {"idx_matches_tournament_id"}),
+        (
+            "/tournament/t1/results",
+            {
+                "idx_tournament_phases_tournament",
+                "idx_series_phase_id",
+                "idx_matches_series_id",
+                "idx_matches_tournament_id",
+            },
+        ),
+        (
+            "/tournament/t1/bracket",
+            {
+                "idx_tournament_phases_tournament",
+                "idx_series_phase_id",
+                "idx_group_standings_rank",
+            },
+        ),
+    ],
+)
+def test_route_queries_use_indexes(client, seeded, captured_sql, url, expected):
+    plans = _route_plans(client, seeded, captured_sql, url)
+
+    assert expected <= _indexes_used(plans)
+    _assert_no_hot_scan(plans)
+
+
+def test_translation_lookup_uses_key_index(client, seeded, captured_sql):
+    plans = _route_plans(client, seeded, captured_sql, "/tournament/t1/results")
+    lookups = [(sql, details) for sql, details in plans if "FROM translations" in sql]
+
+    assert lookups
+    for sql, details in lookups:
+        assert _indexes_used([(sql, details)]) & TRANSLATION_INDEXES, details
@@ -0,0 +1,117 @@
+"""
+Résultats de séries (app/modules/results.py) : la propagation du
+vainqueur met aussi à jour les compteurs et classements des séries
+dépendantes.
+"""
+
+import sqlite3
+
+import pytest
+
+from app.database import get_db
+from app.modules.results import update_series_result
+from app.modules.standings import refresh_group_standings
+
+
+def _nullable_series_slots(conn):
+    """
+    Slots d'équipe NULL (série alimentée par une source), comme en
+    production : instance/database.sql garde encore NOT NULL.
+    """
+    table_sql, = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'series'"
+    ).fetchone()
+    indexes = [
+        row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'series' AND sql IS NOT NULL"
+        )
+    ]
+
+    conn.execute("DROP TABLE series")
+    conn.execute(
+        table_sql
+        .replace("team1_id INTEGER NOT NULL", "team1_id INTEGER")
+        .replace("team2_id INTEGER NOT NULL", "team2_id INTEGER")
+    )
+    for index_sql in indexes:
+        conn.execute(index_sql)
+
+
+@pytest.fixture
+def bracket(app, db_path):
+    """
+    Équipes 1, 2 en G1, équipe 3 en G2 ; série 1 (1 contre 2) dont le
+    vainqueur rejoint la série 2 (? contre 3).
+    """
+    conn = sqlite3.connect(db_path)
+    _nullable_series_slots(conn)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Tournoi', 'active', 1, 't1', 'internal');
+        INSERT INTO players (name) VALUES ('A'), ('B'), ('C');
+        INSERT INTO tournament_teams (tournament_id, team_id, group_name)
+            VALUES (1, 1, 'G1'), (1, 2, 'G1'), (1, 3, 'G2');
+        INSERT INTO tournament_phases (tournament_id, name, type, position)
+            VALUES (1, 'Groupes', 'groups', 1);
+        INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, best_of)
+            VALUES (1, 1, 1, 2, 1);
+        INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, best_of,
+                            source_team1_series_id, source_team1_type)
+            VALUES (1, 1, NULL, 3, 1, 1, 'winner');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    with app.app_context():
+        refresh_group_standings(1)
+        get_db().commit()
+        yield
+
+
+def _play(series_id, winner, loser):
+    db = get_db()
+    match_id = db.execute(
+        "INSERT INTO matches (series_id, tournament_id, is_completed) VALUES (?, 1, 1)",
+        (series_id,),
+    ).lastrowid
+    db.executemany(
+        "INSERT INTO match_teams (match_id, team_id, is_winner) VALUES (?, ?, ?)",
+        [(match_id, winner, 1), (match_id, loser, 0)],
+    )
+    update_series_result(series_id)
+    return match_id
+
+
+def _series_2():
+    return get_db().execute(
+        "SELECT team1_id, team1_wins FROM series WHERE id = 2"
+    ).fetchone()
+
+
+def _played():
+    return dict(get_db().execute("SELECT team_id, played FROM group_standings").fetchall())
+
+
+def test_propagation_refreshes_dependent_standings(bracket):
+    _play(1, winner=1, loser=2)
+
+    assert _series_2()["team1_id"] == 1
+    # Série 2 jouable : l'équipe 3 (G2) a une série de plus
+    assert _played() == {1: 2, 2: 1, 3: 1}
+
+
+def test_corrected_result_refreshes_dependent_counters(bracket):
+    first = _play(1, winner=1, loser=2)
+    _play(2, winner=1, loser=3)
+    assert tuple(_series_2()) == (1, 1)
+
+    # Correction de la série 1 : 2 gagne, l'équipe 1 sort de la série 2
+    db = get_db()
+    db.execute("UPDATE match_teams SET is_winner = (team_id = 2) WHERE match_id = ?", (first,))
+    update_series_result(1)
+
+    assert tuple(_series_2()) == (2, 0)
+    assert _played() == {1: 1, 2: 2, 3: 1}
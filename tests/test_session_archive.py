@@ -0,0 +1,99 @@
+"""
+Archivage des sessions de restreams désactivés (app/modules/session_archive.py)
+et démarrage unique des jobs périodiques (app/jobs.py).
+"""
+
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask
+
+from app import jobs
+from app.modules import session_archive
+from app.modules.indices.sessions import load_indices_session, reset_indices_session
+from app.modules.session_archive import archive_path, archive_restream_sessions
+
+
+@pytest.fixture
+def restream(app, db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Tournoi', 'active', 1, 't1', 'internal');
+        INSERT INTO matches (tournament_id) VALUES (1);
+        INSERT INTO restreams (slug, title, created_by, match_id, is_active, indices_template, tracker_type)
+            VALUES ('rs', 'RS', 1, 1, 0, 'none', 'none');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    with app.app_context():
+        reset_indices_session("rs", {"categories": {"cat": {"columns": 1, "items": []}}})
+        yield "rs"
+
+
+def _archived_count(tournament_id=1):
+    conn = sqlite3.connect(archive_path(tournament_id))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM archived_sessions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_archive_moves_sessions_of_inactive_restream(restream):
+    assert archive_restream_sessions(1, restream, 1) == 1
+
+    assert load_indices_session(restream) is None
+    assert _archived_count() == 1
+
+
+def test_archive_keeps_sessions_of_reenabled_restream(restream, db_path, monkeypatch):
+    load = session_archive.load_indices_session
+
+    def load_then_enable(slug):
+        # enable_restream passe entre la lecture des sessions et leur suppression
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE restreams SET is_active = 1 WHERE slug = ?", (slug,))
+        conn.commit()
+        conn.close()
+        return load(slug)
+
+    monkeypatch.setattr(session_archive, "load_indices_session", load_then_enable)
+
+    assert archive_restream_sessions(1, restream, 1) == 0
+
+    assert load_indices_session(restream) is not None
+    assert _archived_count() == 0
+
+
+def test_periodic_job_starts_once_per_instance(tmp_path):
+    def make_app():
+        app = Flask(__name__, instance_path=str(tmp_path))
+        app.add_url_rule("/", "index", lambda: "ok")
+        jobs.start_periodic_job(app, "test-job", 3600, lambda: None)
+        return app
+
+    def job_threads():
+        return [t for t in threading.enumerate() if t.name == "test-job"]
+
+    first, second = make_app(), make_app()
+    held = None
+    try:
+        # Application créée (CLI) : aucun job tant qu’aucune requête n’est servie
+        assert not job_threads()
+
+        first.test_client().get("/")
+        assert len(job_threads()) == 1
+
+        # Autre worker, même instance/ : le verrou reste tenu par le premier
+        held = jobs._held_locks.pop("test-job")
+        second.test_client().get("/")
+        assert len(job_threads()) == 1
+        assert "test-job" not in jobs._held_locks
+    finally:
+        if held is not None:
+            held.close()
@@ -0,0 +1,102 @@
+"""
+Classements des phases de groupes (app/modules/standings.py) tenus à
+jour par les routes admin.
+"""
+
+import sqlite3
+
+from app.migrations import run_migrations
+
+
+def _seed_tournament(db_path):
+    """
+    Tournoi interne, 4 joueurs (équipes solo via trigger) inscrits en G1 / G2.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO games (name, short_name) VALUES ('Game', 'G')")
+    conn.execute(
+        "INSERT INTO tournaments (name, status, game_id, slug, source) "
+        "VALUES ('Tournoi', 'active', 1, 't1', 'internal')"
+    )
+    for name in ("A", "B", "C", "D"):
+        conn.execute("INSERT INTO players (name) VALUES (?)", (name,))
+
+    team_ids = [row[0] for row in conn.execute("SELECT id FROM teams ORDER BY id")]
+    for index, team_id in enumerate(team_ids):
+        conn.execute(
+            "INSERT INTO tournament_teams (tournament_id, team_id, group_name) VALUES (1, ?, ?)",
+            (team_id, "G1" if index < 2 else "G2"),
+        )
+    conn.commit()
+    conn.close()
+    return team_ids
+
+
+def test_phase_create_fills_group_standings(admin_client, db_path):
+    team_ids = _seed_tournament(db_path)
+
+    response = admin_client.post(
+        "/admin/tournaments/1/phases/create",
+        data={"name": "Groupes", "type": "groups", "position": "1"},
+    )
+    assert response.status_code == 302
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT group_name, team_id, wins, played FROM group_standings ORDER BY group_name, rank"
+    ).fetchall()
+    conn.close()
+
+    assert sorted(team_id for _, team_id, _, _ in rows) == sorted(team_ids)
+    assert {group for group, _, _, _ in rows} == {"G1", "G2"}
+    assert all(wins == 0 and played == 0 for _, _, wins, played in rows)
+
+    page = admin_client.get("/tournament/t1/bracket").get_data(as_text=True)
+    assert "G1" in page and "G2" in page
+
+
+def test_phase_create_other_type_has_no_standings(admin_client, db_path):
+    _seed_tournament(db_path)
+
+    admin_client.post(
+        "/admin/tournaments/1/phases/create",
+        data={"name": "Bracket", "type": "bracket_simple_elim", "position": "1"},
+    )
+
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM group_standings").fetchone()[0]
+    conn.close()
+
+    assert count == 0
+
+
+def test_migration_backfill_ranks_like_refresh(db_path):
+    team_ids = _seed_tournament(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO tournament_phases (tournament_id, name, type, position) "
+        "VALUES (1, 'Groupes', 'groups', 1)"
+    )
+    # G1 : la 2e équipe gagne sa série => 1re du groupe
+    conn.execute(
+        "INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, winner_team_id) "
+        "VALUES (1, 1, ?, ?, ?)",
+        (team_ids[0], team_ids[1], team_ids[1]),
+    )
+    # Base d'avant la migration 004
+    conn.execute("DROP TABLE group_standings")
+    conn.execute("DELETE FROM schema_version WHERE version = 4")
+    conn.commit()
+    conn.close()
+
+    run_migrations(str(db_path))
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT team_id, wins, played, rank FROM group_standings "
+        "WHERE group_name = 'G1' ORDER BY rank"
+    ).fetchall()
+    conn.close()
+
+    assert rows == [(team_ids[1], 1, 1, 1), (team_ids[0], 0, 1, 2)]
@@ -0,0 +1,158 @@
+"""
+Import / export de la mise en place d'un tournoi
+(app/modules/tournament_io.py) : aller-retour, erreurs de validation,
+conflit avec une écriture faite pendant l'import.
+"""
+
+import io
+import json
+import sqlite3
+
+import pytest
+
+from app.admin import routes_legacy
+from app.database import get_db
+from app.modules.tournament_io import (
+    TournamentImportError, export_tournament, run_import, validate_import,
+)
+
+
+@pytest.fixture
+def tournaments(app, db_path):
+    """
+    Tournoi 1 : A, B en solo + équipe « Duo » (C, D), une phase de
+    groupes, un bracket de deux séries (la seconde alimentée par la
+    première), un match planifié. Tournoi 2 : vide, en brouillon.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Source', 'active', 1, 'source', 'internal'),
+                   ('Cible', 'draft', 1, 'cible', 'internal');
+        INSERT INTO players (name, racetime_user) VALUES ('A', 'a#1'), ('B', NULL), ('C', NULL), ('D', NULL);
+        INSERT INTO teams (name) VALUES ('Duo');
+        INSERT INTO team_players (team_id, player_id, position)
+            SELECT t.id, p.id, p.id - 2 FROM teams t, players p
+            WHERE t.name = 'Duo' AND p.name IN ('C', 'D');
+        INSERT INTO tournament_teams (tournament_id, team_id, seed, group_name, position)
+            SELECT 1, id, id, 'G1', NULL FROM teams WHERE name IN ('Solo - A', 'Solo - B', 'Duo');
+        INSERT INTO tournament_phases (tournament_id, name, type, position)
+            VALUES (1, 'Groupes', 'groups', 1), (1, 'Bracket', 'bracket_simple_elim', 2);
+        INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, stage, best_of)
+            SELECT 1, 2, a.id, b.id, 'Demi-finale', 3 FROM teams a, teams b
+            WHERE a.name = 'Solo - A' AND b.name = 'Solo - B';
+        INSERT INTO series (tournament_id, phase_id, team1_id, team2_id, stage, best_of,
+                            source_team1_series_id, source_team1_type)
+            SELECT 1, 2, a.id, b.id, 'Finale', 1, 1, 'winner' FROM teams a, teams b
+            WHERE a.name = 'Solo - A' AND b.name = 'Duo';
+        INSERT INTO matches (tournament_id, series_id, match_index, scheduled_at)
+            VALUES (1, 1, 1, '2026-11-01 20:00');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    with app.app_context():
+        yield
+
+
+def _structure(data):
+    """
+    Export sans ce qui dépend du tournoi : identité, clés de séries (ids).
+    """
+    data = json.loads(json.dumps(data))
+    keys = {s["key"]: str(index) for index, s in enumerate(data["series"])}
+
+    for s in data["series"]:
+        s["key"] = keys[s["key"]]
+        for side in ("source_team1", "source_team2"):
+            if s[side]:
+                s[side]["series"] = keys[s[side]["series"]]
+    for m in data["matches"]:
+        if "series" in m:
+            m["series"] = keys[m["series"]]
+
+    del data["tournament"]
+    return data
+
+
+def _count(table, tournament_id=2):
+    return get_db().execute(
+        f"SELECT COUNT(*) FROM {table} WHERE tournament_id = ?", (tournament_id,)
+    ).fetchone()[0]
+
+
+def test_export_import_round_trip(tournaments):
+    exported = export_tournament(1)
+
+    counts = run_import(2, validate_import(2, exported))
+
+    assert counts["registrations"] == 3 and counts["series"] == 2 and counts["matches"] == 1
+    assert _structure(export_tournament(2)) == _structure(exported)
+
+
+def test_validation_reports_every_error(tournaments):
+    data = {
+        "players": [{"name": "E"}, {"name": "E"}],
+        "registrations": [{"team": "Inconnue"}, {"team": "Solo - E", "seed": "x"}],
+        "phases": [{"name": "Groupes", "type": "swiss"}],
+    }
+
+    with pytest.raises(TournamentImportError) as error:
+        validate_import(2, data)
+
+    messages = "\n".join(error.value.errors)
+    assert len(error.value.errors) == 4
+    assert "« E » : présent plusieurs fois" in messages
+    assert "équipe inconnue « Inconnue »" in messages
+    assert _count("tournament_teams") == 0
+
+
+def test_concurrent_write_is_reported_and_rolled_back(tournaments):
+    plan = validate_import(2, export_tournament(1))
+
+    # Inscription faite entre la validation et l'écriture
+    db = get_db()
+    db.execute(
+        "INSERT INTO tournament_teams (tournament_id, team_id) "
+        "SELECT 2, id FROM teams WHERE name = 'Duo'"
+    )
+    db.commit()
+
+    with pytest.raises(TournamentImportError, match="modifié pendant l'import"):
+        run_import(2, plan)
+
+    assert _count("tournament_teams") == 1
+    assert _count("tournament_phases") == 0
+    assert _count("series") == 0
+
+
+def test_import_route_flashes_concurrent_write(tournaments, admin_client, monkeypatch):
+    validate = routes_legacy.validate_import
+
+    def validate_then_register(tournament_id, data):
+        plan = validate(tournament_id, data)
+        conn = sqlite3.connect(admin_client.application.config["DATABASE"])
+        conn.execute(
+            "INSERT INTO tournament_teams (tournament_id, team_id) "
+            "SELECT 2, id FROM teams WHERE name = 'Duo'"
+        )
+        conn.commit()
+        conn.close()
+        return plan
+
+    monkeypatch.setattr(routes_legacy, "validate_import", validate_then_register)
+    body = json.dumps(export_tournament(1)).encode()
+
+    response = admin_client.post(
+        "/admin/tournaments/2/import",
+        data={"file": (io.BytesIO(body), "setup.json")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    with admin_client.session_transaction() as session:
+        assert any("modifié pendant l'import" in message for _cat, message in session["_flashes"])
+    assert _count("series") == 0
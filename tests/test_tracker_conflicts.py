@@ -0,0 +1,90 @@
+"""
+Concurrence sur les sessions tracker :
+- formulaires (reset, temps final) quand la session change en continu :
+  compare-and-swap épuisé => message + redirection, pas de 500
+- payload legacy (participant complet) : conflits champ par champ
+- session reconstruite : version au-dessus de l'ancienne
+"""
+
+import sqlite3
+
+import pytest
+
+from app.modules.tracker import base
+
+
+@pytest.fixture
+def restream(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Tournoi', 'active', 1, 't1', 'internal');
+        INSERT INTO players (name) VALUES ('A'), ('B');
+        INSERT INTO matches (tournament_id) VALUES (1);
+        INSERT INTO match_teams (match_id, team_id) VALUES (1, 1), (1, 2);
+        INSERT INTO restreams (slug, title, created_by, match_id, is_active, indices_template, tracker_type)
+            VALUES ('rs', 'RS', 1, 1, 1, 'none', 'ssr_inventory');
+        """
+    )
+    conn.commit()
+    conn.close()
+    return "rs"
+
+
+@pytest.mark.parametrize("action", ["tracker/reset", "final-time/1/toggle"])
+def test_tracker_form_conflict_redirects(admin_client, restream, monkeypatch, action):
+    # Session créée sans concurrence
+    assert admin_client.post(f"/restream/{restream}/tracker/reset").status_code == 302
+
+    # Puis une autre écriture passe toujours avant : le CAS échoue à chaque tentative
+    monkeypatch.setattr(base, "compare_and_swap_session_restream", lambda *args, **kwargs: False)
+
+    response = admin_client.post(f"/restream/{restream}/{action}")
+
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(f"/restream/{restream}/live")
+
+    with admin_client.session_transaction() as flask_session:
+        categories = [category for category, _ in flask_session.get("_flashes", [])]
+    assert categories[-1] == "error"
+
+
+def _post_participant(client, slug, version, level):
+    return client.post(
+        f"/restream/{slug}/tracker/update",
+        json={"version": version, "participant": {"slot": 1, "items": {"epee": level}}},
+    )
+
+
+def test_legacy_participant_payload_detects_conflicts(app, admin_client, restream):
+    assert admin_client.post(f"/restream/{restream}/tracker/reset").status_code == 302
+    with app.app_context():
+        version = base.session_version_restream(1)
+
+    first = _post_participant(admin_client, restream, version, 2)
+    assert first.status_code == 200
+
+    # Second éditeur resté sur l'ancienne version : l'épée a changé depuis
+    second = _post_participant(admin_client, restream, version, 3)
+    assert second.status_code == 409
+    assert second.get_json()["conflicts"] == ["items.epee"]
+    assert second.get_json()["participants"][0]["items"]["epee"] == 2
+
+
+def test_rebuilt_session_version_stays_above_previous(app, restream):
+    with app.app_context():
+        base.save_session_restream(1, {"tracker_type": "old", "version": 7, "participants": []})
+
+        session = base.ensure_session_restream(
+            tracker_type="ssr_inventory",
+            restream_id=1,
+            restream_slug=restream,
+            preset_factory=lambda count: {"participants": [{} for _ in range(count)]},
+            participants_count=2,
+        )
+
+        assert session["version"] == 8
+        assert session["generation"]
+        assert base.load_session_restream(1)["version"] == 8
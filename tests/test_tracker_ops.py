@@ -0,0 +1,72 @@
+"""
+Écritures tracker par clic (/tracker/update, /tracker/ops) : une seule
+lecture de session par écriture, slots hors bornes refusés sans écrire.
+"""
+
+import sqlite3
+
+import pytest
+
+from app.modules.tracker import base
+from app.restream import routes
+
+
+@pytest.fixture
+def restream(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO games (name, short_name) VALUES ('Game', 'G');
+        INSERT INTO tournaments (name, status, game_id, slug, source)
+            VALUES ('Tournoi', 'active', 1, 't1', 'internal');
+        INSERT INTO players (name) VALUES ('A'), ('B');
+        INSERT INTO matches (tournament_id) VALUES (1);
+        INSERT INTO match_teams (match_id, team_id) VALUES (1, 1), (1, 2);
+        INSERT INTO restreams (slug, title, created_by, match_id, is_active, indices_template, tracker_type)
+            VALUES ('rs', 'RS', 1, 1, 1, 'none', 'ssr_inventory');
+        """
+    )
+    conn.commit()
+    conn.close()
+    return "rs"
+
+
+def _version(app):
+    with app.app_context():
+        return base.session_version_restream(1)
+
+
+def test_first_click_creates_session_then_no_ensure(app, admin_client, restream, monkeypatch):
+    ensure = routes._ensure_tracker_session
+    calls = []
+    monkeypatch.setattr(
+        routes, "_ensure_tracker_session", lambda *args: calls.append(1) or ensure(*args)
+    )
+
+    for level in (1, 2):
+        response = admin_client.post(
+            f"/restream/{restream}/tracker/update",
+            json={"slot": 1, "version": _version(app) or 0, "changes": {"items.epee": level}},
+        )
+        assert response.status_code == 200
+
+    # Session créée au premier clic seulement
+    assert calls == [1]
+    assert response.get_json()["participants"][0]["items"]["epee"] == 2
+
+
+@pytest.mark.parametrize(
+    "url, payload",
+    [
+        ("tracker/ops", {"version": 0, "ops": [{"slot": 3, "path": "items.epee", "value": 1}]}),
+        ("tracker/update", {"slot": 3, "version": 0, "changes": {"items.epee": 1}}),
+    ],
+)
+def test_slot_out_of_bounds_is_rejected_without_write(app, admin_client, restream, url, payload):
+    assert admin_client.post(f"/restream/{restream}/tracker/reset").status_code == 302
+    version = _version(app)
+
+    response = admin_client.post(f"/restream/{restream}/{url}", json=payload)
+
+    assert response.status_code == 400
+    assert _version(app) == version
@@ -0,0 +1,81 @@
+"""
+Presets de tracker (app/modules/tracker/presets.py) : manifest par type,
+fichiers déposés à la main, slugs uniques.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from app.modules.tracker import presets
+from app.modules.tracker.presets import create_preset, list_presets
+
+
+TRACKER = "ssr_inventory"
+
+
+@pytest.fixture
+def presets_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(presets, "INSTANCE_PRESETS_DIR", tmp_path)
+    folder = tmp_path / TRACKER
+    folder.mkdir()
+    return folder
+
+
+def _labels():
+    return [p["label"] for p in list_presets(TRACKER)]
+
+
+def _age(folder, seconds=10):
+    """
+    Dernière modification du dossier dans le passé (mtime non « racy »).
+    """
+    past = time.time_ns() - seconds * 1_000_000_000
+    os.utime(folder, ns=(past, past))
+
+
+def test_listing_trusts_manifest_while_directory_unchanged(presets_dir, monkeypatch):
+    create_preset(TRACKER, "Alpha", {})
+    _age(presets_dir)
+    assert _labels() == ["Alpha"]
+
+    def no_scan(path):
+        raise AssertionError("scandir")
+
+    monkeypatch.setattr(presets.os, "scandir", no_scan)
+    assert _labels() == ["Alpha"]
+
+
+def test_recent_directory_mtime_is_not_trusted(presets_dir):
+    create_preset(TRACKER, "Alpha", {})
+    assert _labels() == ["Alpha"]
+
+    # Même tick d'horloge : le mtime du dossier ne change pas
+    stat = presets_dir.stat()
+    (presets_dir / "beta.json").write_text(json.dumps({"label": "Beta"}), encoding="utf-8")
+    os.utime(presets_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert _labels() == ["Alpha", "Beta"]
+
+
+def test_listing_picks_up_files_dropped_by_hand(presets_dir):
+    create_preset(TRACKER, "Alpha", {})
+    _age(presets_dir)
+    assert _labels() == ["Alpha"]
+
+    (presets_dir / "beta.json").write_text(json.dumps({"label": "Beta"}), encoding="utf-8")
+    assert _labels() == ["Alpha", "Beta"]
+
+    (presets_dir / "alpha.json").unlink()
+    assert _labels() == ["Beta"]
+
+
+def test_unique_slug_never_overwrites_invalid_file(presets_dir):
+    invalid = presets_dir / "alpha.json"
+    invalid.write_text("{ pas du json", encoding="utf-8")
+    assert _labels() == []
+
+    assert create_preset(TRACKER, "Alpha", {}) == "alpha-2"
+    assert invalid.read_text(encoding="utf-8") == "{ pas du json"